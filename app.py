@@ -11,6 +11,8 @@ from modules.ocr import init_ocr
 from modules.translator import init_translator
 from modules.recommender import init_recommender
 from modules.cache_manager import init_cache
+from modules.result_cache import init_result_cache
+from modules.ocr_store import init_ocr_store
 from routes.info import info_bp
 
 from celery_config import init_celery
@@ -62,6 +64,8 @@ def create_app(config_name='default'):
     
     # 캐시 초기화
     init_cache(app)
+    init_result_cache(app)
+    init_ocr_store(app)
     
     # 모델 초기화
     init_vision_models(app)
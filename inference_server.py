@@ -0,0 +1,42 @@
+# inference_server.py
+import os
+import logging
+from flask import Flask
+
+from config import get_config
+from modules.vision import init_vision_models
+from modules.ocr import init_ocr
+from modules.ocr_store import init_ocr_store
+from modules.inference_server import InferenceServer
+
+# 환경 변수 로드
+from dotenv import load_dotenv
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def create_server():
+    """모델을 로드하고 추론 서버를 생성합니다."""
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    
+    if not app.config.get('INFERENCE_SERVER_ADDRESS'):
+        raise RuntimeError("INFERENCE_SERVER_ADDRESS가 설정되지 않았습니다.")
+    
+    # 추론 서버 프로세스만 실제 모델을 로드
+    init_vision_models(app, use_inference_server=False)
+    init_ocr(app, use_inference_server=False)
+    init_ocr_store(app)
+    
+    return InferenceServer.from_app(app)
+
+if __name__ == '__main__':
+    # 현재 파일 위치를 기준으로 프로젝트 루트 설정
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    
+    server = create_server()
+    server.serve_forever()
@@ -1,35 +1,161 @@
 # modules/database.py
 import json
+import time
+import heapq
 import logging
-from pymongo import MongoClient, DESCENDING
+import threading
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne, monitoring
 from flask import current_app, g, session
 from datetime import datetime
+from itertools import islice
 from bson.objectid import ObjectId
 import os
 
+from modules.food_index import get_food_index, bump_catalog_version
+from modules.monitoring import record_metric
+
 logger = logging.getLogger(__name__)
 
+# 프로세스당 하나의 MongoClient (fork된 자식 프로세스에서는 새로 생성)
+_mongo_client = None
+_mongo_client_pid = None
+_mongo_client_lock = threading.Lock()
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """MongoDB 연결 풀 이벤트를 집계하는 리스너"""
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkout_failures': 0,
+            'checked_out': 0,
+            'pool_cleared': 0
+        }
+    
+    def _inc(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        self._inc('pool_cleared')
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        self._inc('connections_created')
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        self._inc('connections_closed')
+        record_metric('mongo_pool_connection_closed', 1, {'reason': str(event.reason)})
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.monotonic()
+    
+    def connection_check_out_failed(self, event):
+        self._inc('checkout_failures')
+        record_metric('mongo_pool_checkout_failed', 1, {'reason': str(event.reason)})
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.stats['checkouts'] += 1
+            self.stats['checked_out'] += 1
+        started = getattr(self._local, 'started', None)
+        if started is not None:
+            record_metric('mongo_pool_checkout_wait', time.monotonic() - started)
+    
+    def connection_checked_in(self, event):
+        self._inc('checked_out', -1)
+
+_pool_listener = PoolMetricsListener()
+
+def _reset_mongo_client_after_fork():
+    """fork된 자식 프로세스에서 부모의 클라이언트를 사용하지 않도록 초기화합니다."""
+    global _mongo_client, _mongo_client_pid, _mongo_client_lock
+    _mongo_client = None
+    _mongo_client_pid = None
+    _mongo_client_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_mongo_client_after_fork)
+
+def get_mongo_client(config=None):
+    """프로세스 공유 MongoClient를 반환합니다. (처음 호출 시 생성)"""
+    global _mongo_client, _mongo_client_pid
+    
+    pid = os.getpid()
+    if _mongo_client is not None and _mongo_client_pid == pid:
+        return _mongo_client
+    
+    with _mongo_client_lock:
+        if _mongo_client is None or _mongo_client_pid != pid:
+            config = config or current_app.config
+            mongo_uri = config['MONGO_URI']
+            _mongo_client = MongoClient(
+                mongo_uri,
+                maxPoolSize=config.get('MONGO_MAX_POOL_SIZE', 50),
+                minPoolSize=config.get('MONGO_MIN_POOL_SIZE', 0),
+                maxIdleTimeMS=config.get('MONGO_MAX_IDLE_TIME_MS', 60000),
+                waitQueueTimeoutMS=config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000),
+                connect=False,
+                event_listeners=[_pool_listener]
+            )
+            _mongo_client_pid = pid
+            logger.info(f"MongoDB 공유 클라이언트 생성 (pid={pid}): {mongo_uri}")
+    return _mongo_client
+
+def close_mongo_client():
+    """프로세스 공유 MongoClient를 닫습니다. (프로세스 종료 시)"""
+    global _mongo_client, _mongo_client_pid
+    with _mongo_client_lock:
+        if _mongo_client is not None and _mongo_client_pid == os.getpid():
+            _mongo_client.close()
+            logger.info("MongoDB 공유 클라이언트 종료")
+        _mongo_client = None
+        _mongo_client_pid = None
+
+def get_pool_stats():
+    """MongoDB 연결 풀 설정과 이벤트 통계를 반환합니다."""
+    with _pool_listener._lock:
+        stats = dict(_pool_listener.stats)
+    client = _mongo_client if _mongo_client_pid == os.getpid() else None
+    if client is not None:
+        pool_options = client.options.pool_options
+        stats.update({
+            'max_pool_size': pool_options.max_pool_size,
+            'min_pool_size': pool_options.min_pool_size,
+            'max_idle_time_seconds': pool_options.max_idle_time_seconds,
+            'wait_queue_timeout': pool_options.wait_queue_timeout
+        })
+    stats['open_connections'] = stats['connections_created'] - stats['connections_closed']
+    return stats
+
 def get_db():
-    """애플리케이션 컨텍스트에서 데이터베이스 연결을 가져옵니다."""
+    """애플리케이션 컨텍스트에서 데이터베이스를 가져옵니다. (공유 클라이언트 사용)"""
     if 'db' not in g:
         try:
-            mongo_uri = current_app.config['MONGO_URI']
-            mongo_db = current_app.config['MONGO_DB']
-            client = MongoClient(mongo_uri)
-            g.client = client
-            g.db = client[mongo_db]
-            logger.info(f"MongoDB 연결 성공: {mongo_uri}/{mongo_db}")
+            g.db = get_mongo_client()[current_app.config['MONGO_DB']]
         except Exception as e:
             logger.error(f"MongoDB 연결 실패: {e}")
             raise e
     return g.db
 
 def close_db(e=None):
-    """애플리케이션 컨텍스트 종료 시 데이터베이스 연결을 닫습니다."""
-    client = g.pop('client', None)
-    if client is not None:
-        client.close()
-        logger.info("MongoDB 연결 종료")
+    """애플리케이션 컨텍스트 종료 시 DB 참조를 정리합니다. (공유 클라이언트는 닫지 않음)"""
+    g.pop('db', None)
 
 def init_db(app):
     """데이터베이스를 초기화하고 필요한 컬렉션과 인덱스를 생성합니다."""
@@ -38,6 +164,14 @@ def init_db(app):
         db = get_db()
         initialize_collections(db, app)
         initialize_food_metadata(db, app)
+        
+        # 음식 메타데이터 인메모리 인덱스 로드
+        food_index = get_food_index()
+        food_index.refresh_interval = app.config.get('FOOD_INDEX_REFRESH_INTERVAL', 30)
+        try:
+            food_index.load(db)
+        except Exception as e:
+            logger.error(f"음식 인덱스 로드 중 오류 발생: {e}")
 
 def initialize_collections(db, app):
     """필요한 컬렉션이 존재하는지 확인하고, 인덱스를 생성합니다."""
@@ -86,6 +220,12 @@ def initialize_collections(db, app):
     menu_recognitions.create_index([("timestamp", DESCENDING)])
     menu_recognitions.create_index("user_id")
     
+    # 통합 기록 키셋 페이지네이션용 (timestamp, _id) 정렬 인덱스
+    history_sort_index = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+    for collection in (recognitions, menu_recognitions):
+        collection.create_index(history_sort_index)
+        collection.create_index([("user_id", 1)] + history_sort_index)
+    
     logger.info("컬렉션 및 인덱스 초기화 완료")
 
 def initialize_food_metadata(db, app):
@@ -105,6 +245,7 @@ def initialize_food_metadata(db, app):
                 
                 # 새 데이터 삽입
                 db.foods.insert_many(food_metadata)
+                bump_catalog_version(db)
                 logger.info(f"{len(food_metadata)}개 음식 메타데이터가 데이터베이스에 추가되었습니다.")
             else:
                 logger.error("메타데이터 형식이 올바르지 않습니다. 리스트 형식이어야 합니다.")
@@ -114,19 +255,13 @@ def initialize_food_metadata(db, app):
         logger.info("음식 메타데이터가 이미 데이터베이스에 존재합니다.")
 
 def get_mongodb_connection():
-    """MongoDB 연결을 가져옵니다."""
-    from pymongo import MongoClient
-    from flask import current_app
-    
-    mongo_uri = current_app.config['MONGO_URI']
-    logger.info(f"MongoDB 연결 생성: {mongo_uri}")
-    return MongoClient(mongo_uri)
+    """MongoDB 클라이언트를 가져옵니다. (프로세스 공유 클라이언트)"""
+    return get_mongo_client()
 
 def get_food_info(food_name, class_to_metadata_mapping=None):
-    """MongoDB에서 음식 정보를 가져옵니다."""
+    """음식 정보를 가져옵니다. (foods 컬렉션의 인메모리 인덱스 사용)"""
     try:
         db = get_db()
-        foods_collection = db.foods
         
         # YOLO 클래스 이름을 메타데이터 이름으로 변환
         metadata_name = food_name
@@ -135,61 +270,9 @@ def get_food_info(food_name, class_to_metadata_mapping=None):
         
         logger.info(f"음식 정보 조회: {food_name} -> 매핑된 이름: {metadata_name}")
         
-        # DB 검색 전략 - 다양한 방법으로 찾기
-        food_info = None
-        
-        # 1. 정확한 영어 이름(nameEn)으로 검색
-        food_info = foods_collection.find_one({
-            'nameEn': metadata_name
-        })
+        # 1~7. 인메모리 인덱스에서 이름, 별칭, 부분 일치, dishId 순서로 검색
+        food_info = get_food_index().lookup(food_name, metadata_name, db=db)
         
-        # 2. 정확한 한국어 이름(nameKo)으로 검색
-        if not food_info:
-            food_info = foods_collection.find_one({
-                'nameKo': metadata_name
-            })
-        
-        # 3. 클래스 이름과 정확히 일치하는 nameEn으로 검색
-        if not food_info:
-            food_info = foods_collection.find_one({
-                'nameEn': food_name
-            })
-            
-        # 4. 부분 일치로 nameEn 검색 
-        if not food_info:
-            food_info = foods_collection.find_one({
-                'nameEn': {'$regex': metadata_name, '$options': 'i'}
-            })
-        
-        # 5. 부분 일치로 nameKo 검색
-        if not food_info:
-            food_info = foods_collection.find_one({
-                'nameKo': {'$regex': metadata_name, '$options': 'i'}
-            })
-        
-        # 6. 직접 클래스 이름과 부분 일치로 검색
-        if not food_info:
-            food_info = foods_collection.find_one({
-                '$or': [
-                    {'nameEn': {'$regex': food_name, '$options': 'i'}},
-                    {'nameKo': {'$regex': food_name, '$options': 'i'}}
-                ]
-            })
-            
-        # 7. dishId로 검색 (문자열 또는 숫자일 수 있음)
-        if not food_info:
-            # 숫자로 변환 가능한지 확인
-            try:
-                class_id = int(food_name)
-                food_info = foods_collection.find_one({
-                    'dishId': str(class_id)  # 문자열로 변환하여 검색
-                })
-            except (ValueError, TypeError):
-                # dishId가 문자열일 수도 있으니 직접 검색
-                food_info = foods_collection.find_one({
-                    'dishId': food_name
-                })
-                
         # 8. 하드코딩된 기본값 (김밥의 경우)
         if not food_info and food_name.lower() in ['gimbap', '김밥', 'kimbap']:
             food_info = {
@@ -260,8 +343,88 @@ def get_food_info(food_name, class_to_metadata_mapping=None):
         logger.error(f"음식 정보 조회 중 오류 발생: {e}")
         return None
 
-def save_recognition_result(image_path, detected_foods, overlay_image_path=None):
-    """인식 결과를 데이터베이스에 저장합니다."""
+# 인식 기록에 저장하는 음식 스냅샷 형식 버전 (필드 구성이 바뀌면 올리고 백필 실행)
+FOOD_SNAPSHOT_VERSION = 1
+FOOD_SNAPSHOT_FIELDS = ('dishId', 'nameKo', 'nameEn', 'allergens', 'vegetarianStatus', 'descriptionEn', 'ingredients')
+
+def build_food_snapshot(food_name, food_info=None, defaults=None):
+    """기록 화면에 필요한 음식 정보만 담은 스냅샷을 만듭니다. (음식 정보가 없으면 defaults 사용)"""
+    food_info = food_info or {}
+    defaults = defaults or {}
+    snapshot = {field: food_info.get(field) for field in FOOD_SNAPSHOT_FIELDS if field in food_info}
+    snapshot.setdefault('nameKo', defaults.get('nameKo', food_name))
+    snapshot.setdefault('nameEn', defaults.get('nameEn', food_name))
+    snapshot.setdefault('allergens', defaults.get('allergens', []))
+    snapshot.setdefault('vegetarianStatus', defaults.get('vegetarianStatus', '알 수 없음'))
+    snapshot['v'] = FOOD_SNAPSHOT_VERSION
+    return snapshot
+
+def _lookup_food_info(food_name, class_to_metadata_mapping=None, db=None):
+    """db가 주어지면 앱 컨텍스트 없이 음식 인덱스에서 직접 조회하고, 없으면 get_food_info를 사용합니다."""
+    if db is None:
+        return get_food_info(food_name, class_to_metadata_mapping)
+    
+    metadata_name = food_name
+    if class_to_metadata_mapping and food_name in class_to_metadata_mapping:
+        metadata_name = class_to_metadata_mapping[food_name]
+    return get_food_index().lookup(food_name, metadata_name, db=db)
+
+def attach_food_snapshots(detected_foods, class_to_metadata_mapping=None, db=None):
+    """인식된 음식 목록에 최신 버전의 음식 스냅샷과 요약 필드를 채웁니다. 변경된 경우 True."""
+    changed = False
+    for food in detected_foods:
+        snapshot = food.get('food_snapshot')
+        if snapshot and snapshot.get('v') == FOOD_SNAPSHOT_VERSION:
+            continue
+        
+        food_name = food.get('food_name', '')
+        food_info = _lookup_food_info(food_name, class_to_metadata_mapping, db)
+        snapshot = build_food_snapshot(food_name, food_info, food)
+        food['food_snapshot'] = snapshot
+        # 기록 목록 화면에서 바로 사용하는 요약 필드 (저장 당시 값이 있으면 유지)
+        for field in ('nameKo', 'nameEn', 'allergens', 'vegetarianStatus'):
+            food.setdefault(field, snapshot[field])
+        changed = True
+    return changed
+
+def backfill_food_snapshots(db, batch_size=200, class_to_metadata_mapping=None):
+    """음식 스냅샷이 없거나 이전 버전인 인식 기록을 일괄 갱신합니다.
+    
+    전달받은 db로 음식 인덱스를 직접 조회하므로 앱 컨텍스트가 없는 작업 프로세스에서도 실행할 수 있습니다.
+    """
+    query = {'detected_foods': {'$elemMatch': {'food_snapshot.v': {'$ne': FOOD_SNAPSHOT_VERSION}}}}
+    total_updated = 0
+    last_id = None
+    
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query['_id'] = {'$gt': last_id}
+        
+        records = list(db.recognitions.find(batch_query, {'detected_foods': 1})
+                       .sort('_id', 1).limit(batch_size))
+        if not records:
+            break
+        
+        operations = []
+        for record in records:
+            detected_foods = record.get('detected_foods') or []
+            if attach_food_snapshots(detected_foods, class_to_metadata_mapping, db=db):
+                operations.append(UpdateOne(
+                    {'_id': record['_id']},
+                    {'$set': {'detected_foods': detected_foods}}
+                ))
+        
+        if operations:
+            result = db.recognitions.bulk_write(operations, ordered=False)
+            total_updated += result.modified_count
+        last_id = records[-1]['_id']
+    
+    logger.info(f"음식 스냅샷 백필 완료: {total_updated}개 기록 갱신")
+    return total_updated
+
+def save_recognition_result(image_path, detected_foods, overlay_image_path=None, class_to_metadata_mapping=None):
+    """인식 결과를 데이터베이스에 저장합니다. (음식별 스냅샷 포함)"""
     try:
         from flask import session
         from bson.objectid import ObjectId
@@ -270,6 +433,9 @@ def save_recognition_result(image_path, detected_foods, overlay_image_path=None)
         
         db = get_db()
         
+        # 기록 조회 시 음식 정보를 다시 찾지 않도록 스냅샷을 함께 저장
+        attach_food_snapshots(detected_foods, class_to_metadata_mapping)
+        
         # 이미지 파일 이름 추출
         image_filename = os.path.basename(image_path)
         
@@ -420,6 +586,68 @@ def get_recent_menu_recognitions(limit=20, page=1, filter=None):
         logger.error(f"메뉴판 인식 기록 조회 중 오류 발생: {e}")
         return []
 
+def encode_history_cursor(record):
+    """기록의 (timestamp, _id)를 다음 페이지 커서 문자열로 변환합니다."""
+    return f"{record['timestamp'].isoformat()}_{record['_id']}"
+
+def decode_history_cursor(cursor):
+    """커서 문자열을 (timestamp, ObjectId)로 변환합니다. 잘못된 경우 None."""
+    try:
+        timestamp, record_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), ObjectId(record_id)
+    except Exception:
+        logger.warning(f"잘못된 기록 커서: {cursor}")
+        return None
+
+def get_unified_history(db, query=None, limit=10, cursor=None, direction='next', projection=None,
+                        collections=('recognitions', 'menu_recognitions')):
+    """인식 기록을 (timestamp, _id) 내림차순으로 병합하여 한 페이지를 반환합니다.
+    
+    cursor 위치를 기준으로 키셋 방식으로만 조회하므로 기록 깊이와 관계없이 컬렉션당 최대 limit + 1개만 읽습니다.
+    timestamp가 날짜가 아닌(없거나 null인) 기록은 포함하지 않습니다.
+    direction='next'는 cursor보다 오래된 기록, 'prev'는 cursor보다 최근 기록을 가져옵니다.
+    반환값: (records, next_cursor, prev_cursor) - 해당 방향의 페이지가 없으면 None
+    """
+    # timestamp가 없거나 null인 기록은 커서로 위치를 표현할 수 없고 MongoDB 정렬 순서도 병합 키와 달라 제외
+    conditions = [query] if query else []
+    conditions.append({'timestamp': {'$type': 'date'}})
+    position = decode_history_cursor(cursor) if cursor else None
+    backward = position is not None and direction == 'prev'
+    
+    if position is not None:
+        timestamp, record_id = position
+        op = '$gt' if backward else '$lt'
+        conditions.append({'$or': [
+            {'timestamp': {op: timestamp}},
+            {'timestamp': timestamp, '_id': {op: record_id}}
+        ]})
+    query = {'$and': conditions} if len(conditions) > 1 else conditions[0]
+    
+    # 해당 방향으로 페이지가 더 있는지 확인하기 위해 1개 더 읽음
+    order = ASCENDING if backward else DESCENDING
+    sort = [('timestamp', order), ('_id', order)]
+    cursors = [db[name].find(query, projection).sort(sort).limit(limit + 1) for name in collections]
+    
+    # 정렬된 커서들을 스트리밍 방식으로 병합
+    merged = heapq.merge(
+        *cursors,
+        key=lambda record: (record['timestamp'], record['_id']),
+        reverse=not backward
+    )
+    window = list(islice(merged, limit + 1))
+    has_more = len(window) > limit
+    records = window[:limit]
+    
+    if backward:
+        # 이전 페이지는 오름차순으로 읽었으므로 뒤집고, 다음 페이지는 항상 존재 (cursor 기록)
+        records.reverse()
+        prev_cursor = encode_history_cursor(records[0]) if has_more else None
+        next_cursor = encode_history_cursor(records[-1]) if records else None
+    else:
+        next_cursor = encode_history_cursor(records[-1]) if has_more else None
+        prev_cursor = encode_history_cursor(records[0]) if position is not None and records else None
+    return records, next_cursor, prev_cursor
+
 def get_user_favorites(user_id, limit=20, page=1):
     """사용자의 즐겨찾기 기록을 가져옵니다."""
     try:
@@ -1,10 +1,13 @@
 # modules/db_manager.py
+import time
 import logging
 import threading
+from collections import deque
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from flask import current_app, g
 
+from modules.monitoring import record_metric
+
 logger = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
@@ -12,68 +15,207 @@ class DatabaseError(Exception):
     pass
 
 class ConnectionPool:
-    """MongoDB 연결 풀 클래스"""
+    """MongoDB 연결 풀 클래스
+
+    최대 max_connections개까지만 연결을 만들고, 모두 사용 중이면 checkout_timeout초 동안 반환을 기다립니다.
+    유휴 연결의 상태 확인(ping)과 오래된 연결 정리는 백그라운드 스레드에서 수행합니다.
+    """
     
-    def __init__(self, max_connections=10):
+    def __init__(self, max_connections=10, checkout_timeout=5.0, health_check_interval=30.0, max_idle_time=300.0):
         self.max_connections = max_connections
-        self.connections = []
-        self.lock = threading.Lock()
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle_time = max_idle_time
+        self.connections = deque()  # (client, 반환 시각) - 오른쪽이 가장 최근
+        self.lock = threading.Condition()
         self.connection_count = 0
+        self.closed = False
+        self.stats = {
+            'created': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'evictions': 0
+        }
+        self._stop_event = threading.Event()
+        self._health_thread = None
     
-    def get_connection(self, uri, timeout=5000):
-        """사용 가능한 연결을 반환하거나 새 연결 생성"""
+    def get_connection(self, uri, timeout=5000, checkout_timeout=None):
+        """사용 가능한 연결을 반환하거나 새 연결 생성. 풀이 가득 차면 반환될 때까지 대기합니다."""
+        checkout_timeout = self.checkout_timeout if checkout_timeout is None else checkout_timeout
+        deadline = time.monotonic() + checkout_timeout
+        wait_started = None
+        
         with self.lock:
-            # 사용 가능한 연결이 있는지 확인
-            if self.connections:
-                return self.connections.pop()
-            
-            # 최대 연결 수를 초과하지 않았는지 확인
-            if self.connection_count >= self.max_connections:
-                # 연결 풀이 가득 찼지만 연결이 없음 - 대기 후 재시도 로직을 구현할 수 있음
-                logger.warning(f"연결 풀이 가득 찼습니다. (max={self.max_connections})")
-                # 여기서는 단순히 새 연결 생성 (실제로는 대기 또는 예외 처리가 필요)
-            
-            # 새 연결 생성
-            try:
-                client = MongoClient(uri, serverSelectionTimeoutMS=timeout)
-                # 연결 테스트 - 간단한 명령 실행
-                client.admin.command('ping')
-                self.connection_count += 1
-                logger.debug(f"새 MongoDB 연결 생성 (현재 연결 수: {self.connection_count})")
-                return client
-            except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-                logger.error(f"MongoDB 연결 생성 실패: {e}")
-                raise DatabaseError(f"MongoDB 연결 실패: {e}")
+            while True:
+                if self.closed:
+                    raise DatabaseError("연결 풀이 종료되었습니다.")
+                
+                # 사용 가능한 연결이 있는지 확인 (최근에 반환된 연결 우선)
+                if self.connections:
+                    client, _ = self.connections.pop()
+                    self.stats['checkouts'] += 1
+                    self._record_wait(wait_started)
+                    return client
+                
+                # 최대 연결 수 이내이면 새 연결 자리 확보
+                if self.connection_count < self.max_connections:
+                    self.connection_count += 1
+                    self.stats['checkouts'] += 1
+                    break
+                
+                # 풀이 가득 찬 경우 반환될 때까지 대기
+                if wait_started is None:
+                    wait_started = time.monotonic()
+                    self.stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    record_metric('db_pool_checkout_timeout', 1)
+                    logger.warning(f"연결 풀 대기 시간 초과 (max={self.max_connections}, "
+                                   f"timeout={checkout_timeout}초)")
+                    raise DatabaseError(f"연결 풀에서 {checkout_timeout}초 내에 연결을 얻지 못했습니다.")
+                self.lock.wait(remaining)
+        
+        self._record_wait(wait_started)
+        
+        # 새 연결 생성 (락 밖에서 수행, 실제 연결은 첫 명령 실행 시 이루어짐)
+        try:
+            client = MongoClient(uri, serverSelectionTimeoutMS=timeout, connect=False)
+        except Exception as e:
+            with self.lock:
+                self.connection_count -= 1
+                self.lock.notify()
+            logger.error(f"MongoDB 연결 생성 실패: {e}")
+            raise DatabaseError(f"MongoDB 연결 실패: {e}")
+        
+        with self.lock:
+            self.stats['created'] += 1
+        self._ensure_health_checker()
+        logger.debug(f"새 MongoDB 연결 생성 (현재 연결 수: {self.connection_count})")
+        return client
+    
+    def _record_wait(self, wait_started):
+        """대기한 경우 대기 시간을 기록합니다."""
+        if wait_started is not None:
+            record_metric('db_pool_checkout_wait', time.monotonic() - wait_started)
     
     def release_connection(self, client):
-        """연결을 풀로 반환"""
+        """연결을 풀로 반환 (상태 확인은 백그라운드 스레드에서 수행)"""
         with self.lock:
-            # 연결이 여전히 살아있는지 확인
+            if self.closed:
+                self.connection_count -= 1
+                self._close_client(client)
+                return
+            self.connections.append((client, time.monotonic()))
+            self.lock.notify()
+            logger.debug(f"연결이 풀로 반환됨 (사용 가능 연결: {len(self.connections)})")
+    
+    def discard_connection(self, client):
+        """손상된 연결을 풀에 반환하지 않고 폐기"""
+        with self.lock:
+            self.connection_count -= 1
+            self.stats['evictions'] += 1
+            self.lock.notify()
+        self._close_client(client)
+    
+    def _ensure_health_checker(self):
+        """백그라운드 상태 확인 스레드를 시작합니다."""
+        if self._health_thread is not None or self.health_check_interval <= 0:
+            return
+        with self.lock:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(
+                    target=self._health_check_loop, name='db-pool-health', daemon=True
+                )
+                self._health_thread.start()
+    
+    def _health_check_loop(self):
+        """주기적으로 유휴 연결을 확인하는 루프"""
+        while not self._stop_event.wait(self.health_check_interval):
+            try:
+                self.check_idle_connections()
+            except Exception as e:
+                logger.error(f"연결 풀 상태 확인 중 오류: {e}")
+    
+    def check_idle_connections(self):
+        """유휴 연결을 ping하고, 응답이 없거나 너무 오래된 연결은 제거합니다.
+
+        오래된 연결은 락 안에서 바로 제거하고, 나머지는 한 번에 하나씩만 꺼내 ping하므로
+        확인 중에도 다른 유휴 연결은 계속 대여할 수 있습니다.
+        """
+        evicted = []
+        with self.lock:
+            # 왼쪽이 가장 오래된 연결
+            now = time.monotonic()
+            while self.connections and now - self.connections[0][1] > self.max_idle_time:
+                evicted.append(self.connections.popleft()[0])
+            self.connection_count -= len(evicted)
+            self.stats['evictions'] += len(evicted)
+            self.lock.notify(len(evicted))
+            candidates = [client for client, _ in self.connections]
+        for client in evicted:
+            self._close_client(client)
+        
+        for client in candidates:
+            with self.lock:
+                item = next((item for item in self.connections if item[0] is client), None)
+                if item is None:
+                    # 확인 전에 이미 대여된 연결
+                    continue
+                self.connections.remove(item)
+            
             try:
                 client.admin.command('ping')
-                self.connections.append(client)
-                logger.debug(f"연결이 풀로 반환됨 (사용 가능 연결: {len(self.connections)})")
             except Exception as e:
-                # 연결이 끊어졌으면 카운트만 감소
                 logger.warning(f"손상된 연결 폐기: {e}")
-                self.connection_count -= 1
-                try:
-                    client.close()
-                except:
-                    pass
+                self.discard_connection(client)
+                evicted.append(client)
+                continue
+            
+            with self.lock:
+                if self.closed:
+                    self.connection_count -= 1
+                    self._close_client(client)
+                    continue
+                # 반환 시각 순서를 유지하도록 제자리에 다시 넣음
+                position = sum(1 for _, released_at in self.connections if released_at <= item[1])
+                self.connections.insert(position, item)
+                self.lock.notify()
+        
+        if evicted:
+            record_metric('db_pool_evictions', len(evicted))
+        return len(evicted)
+    
+    def _close_client(self, client):
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"연결 닫기 중 오류: {e}")
+    
+    def get_stats(self):
+        """풀 사용 현황과 대기/시간 초과/제거 횟수를 반환합니다."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['total'] = self.connection_count
+            stats['idle'] = len(self.connections)
+            stats['in_use'] = self.connection_count - len(self.connections)
+            stats['max_connections'] = self.max_connections
+        return stats
     
     def close_all(self):
         """모든 연결 닫기"""
+        self._stop_event.set()
         with self.lock:
-            for client in self.connections:
-                try:
-                    client.close()
-                except Exception as e:
-                    logger.warning(f"연결 닫기 중 오류: {e}")
-            
-            self.connections = []
-            self.connection_count = 0
-            logger.info("모든 데이터베이스 연결이 닫혔습니다.")
+            self.closed = True
+            clients = [client for client, _ in self.connections]
+            self.connection_count -= len(clients)
+            self.connections.clear()
+            self.lock.notify_all()
+        
+        for client in clients:
+            self._close_client(client)
+        logger.info("모든 데이터베이스 연결이 닫혔습니다.")
 
 class DBManager:
     """데이터베이스 관리자 싱글톤 클래스"""
@@ -95,6 +237,7 @@ class DBManager:
         self.app = None
         self.connection_pools = {}
         self.db_instances = {}
+        self._pools_lock = threading.Lock()
     
     def init_app(self, app):
         """Flask 앱으로 초기화"""
@@ -106,6 +249,29 @@ class DBManager:
         logger.info("DBManager가 Flask 앱에 초기화되었습니다.")
         return self
     
+    def get_pool(self, pool_name='default', **overrides):
+        """이름별 연결 풀을 반환합니다. 없으면 앱 설정으로 생성합니다."""
+        with self._pools_lock:
+            pool = self.connection_pools.get(pool_name)
+            if pool is None:
+                config = self.app.config if self.app else {}
+                options = {
+                    'max_connections': config.get('DB_POOL_MAX_CONNECTIONS', 10),
+                    'checkout_timeout': config.get('DB_POOL_CHECKOUT_TIMEOUT', 5.0),
+                    'health_check_interval': config.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30.0),
+                    'max_idle_time': config.get('DB_POOL_MAX_IDLE_TIME', 300.0)
+                }
+                options.update(overrides)
+                pool = ConnectionPool(**options)
+                self.connection_pools[pool_name] = pool
+            return pool
+    
+    def get_pool_stats(self):
+        """모든 연결 풀의 통계를 반환합니다."""
+        with self._pools_lock:
+            pools = dict(self.connection_pools)
+        return {pool_name: pool.get_stats() for pool_name, pool in pools.items()}
+    
     def get_db(self, db_name=None, uri=None, pool_name='default'):
         """데이터베이스 인스턴스 반환"""
         # 앱 컨텍스트에서 설정 가져오기
@@ -122,12 +288,17 @@ class DBManager:
         if hasattr(g, 'dbs') and pool_name in g.dbs and db_name in g.dbs[pool_name]:
             return g.dbs[pool_name][db_name]
         
-        # 연결 풀 가져오기
-        if pool_name not in self.connection_pools:
-            self.connection_pools[pool_name] = ConnectionPool()
+        # 앱과 같은 URI는 프로세스 공유 MongoClient와 그 내부 연결 풀 사용
+        if self.app and uri == self.app.config.get('MONGO_URI'):
+            from modules.database import get_mongo_client
+            db = get_mongo_client(self.app.config)[db_name]
+            if not hasattr(g, 'dbs'):
+                g.dbs = {}
+            g.dbs.setdefault(pool_name, {})[db_name] = db
+            return db
         
-        # 연결 가져오기
-        client = self.connection_pools[pool_name].get_connection(uri)
+        # 연결 풀에서 연결 가져오기 (풀이 가득 차면 대기, 시간 초과 시 DatabaseError)
+        client = self.get_pool(pool_name).get_connection(uri)
         
         # DB 인스턴스 생성
         db = client[db_name]
@@ -170,7 +341,9 @@ class DBManager:
     
     def shutdown(self):
         """모든 연결 풀 종료"""
-        for pool_name, pool in self.connection_pools.items():
+        with self._pools_lock:
+            pools = dict(self.connection_pools)
+        for pool_name, pool in pools.items():
             try:
                 pool.close_all()
             except Exception as e:
@@ -205,7 +378,6 @@ def get_db():
 
 def get_mongodb_connection():
     """MongoDB 연결을 직접 가져옵니다."""
-    from flask import current_app
     global db_manager
     
     mongo_uri = current_app.config['MONGO_URI']
@@ -213,15 +385,11 @@ def get_mongodb_connection():
     
     # 연결 풀에서 연결 가져오기
     pool_name = 'direct'  # 직접 접근용 풀 이름
-    if pool_name not in db_manager.connection_pools:
-        db_manager.connection_pools[pool_name] = ConnectionPool(max_connections=5)
-    
-    return db_manager.connection_pools[pool_name].get_connection(mongo_uri)
+    return db_manager.get_pool(pool_name, max_connections=5).get_connection(mongo_uri)
 
 # 추천 시스템용 함수 대체
 def get_fresh_db_connection():
     """추천 시스템을 위한 새로운 MongoDB 연결을 생성합니다."""
-    from flask import current_app
     global db_manager
     
     try:
@@ -60,6 +60,10 @@ class TextRecognitionError(OCRError):
     """텍스트 인식 실패 예외"""
     pass
 
+class OCRPoolTimeoutError(OCRError):
+    """OCR 리더 풀에서 제한 시간 내에 리더를 얻지 못한 예외"""
+    pass
+
 # 번역 관련 예외
 class TranslationError(KFoodLensException):
     """번역 관련 예외"""
@@ -0,0 +1,193 @@
+# modules/food_index.py
+import re
+import copy
+import time
+import logging
+import threading
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# 음식 카탈로그 버전을 기록하는 메타 문서
+CATALOG_META_COLLECTION = 'meta'
+CATALOG_VERSION_ID = 'foods_version'
+
+def normalize_food_name(name):
+    """대소문자, 공백, 구분자 차이를 없앤 별칭 키를 반환합니다."""
+    if name is None:
+        return ''
+    return re.sub(r'[\s_\-\'()]+', '', str(name)).lower()
+
+def _regex_search(pattern, value):
+    """MongoDB의 $regex(옵션 i)와 같은 방식으로 부분 일치를 검사합니다."""
+    if not isinstance(value, str):
+        return False
+    try:
+        return re.search(pattern, value, re.IGNORECASE) is not None
+    except re.error:
+        return re.search(re.escape(pattern), value, re.IGNORECASE) is not None
+
+class _FoodIndexSnapshot:
+    """한 시점의 음식 카탈로그와 조회용 사전"""
+
+    def __init__(self, foods, version):
+        self.foods = foods
+        self.version = version
+        self.by_name_en = {}
+        self.by_name_ko = {}
+        self.by_dish_id = {}
+        self.by_alias = {}
+
+        # find_one과 같이 먼저 저장된 문서가 우선하도록 setdefault 사용
+        for food in foods:
+            name_en = food.get('nameEn')
+            name_ko = food.get('nameKo')
+            dish_id = food.get('dishId')
+            if name_en is not None:
+                self.by_name_en.setdefault(name_en, food)
+            if name_ko is not None:
+                self.by_name_ko.setdefault(name_ko, food)
+            if dish_id is not None:
+                self.by_dish_id.setdefault(str(dish_id), food)
+
+            for alias in [name_en, name_ko] + list(food.get('aliases', [])):
+                key = normalize_food_name(alias)
+                if key:
+                    self.by_alias.setdefault(key, food)
+
+class FoodIndex:
+    """음식 메타데이터를 프로세스 메모리에 보관하고 이름/별칭/dishId로 O(1) 조회하는 인덱스
+
+    foods 컬렉션이 변경되면 meta 컬렉션의 버전 문서가 증가하며,
+    인덱스는 refresh_interval초마다 버전만 확인하여 바뀐 경우에만 전체를 다시 읽습니다.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """싱글톤 인스턴스 반환"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    @staticmethod
+    def get_catalog_version(db):
+        """DB에 기록된 카탈로그 버전을 반환합니다."""
+        meta = db[CATALOG_META_COLLECTION].find_one({'_id': CATALOG_VERSION_ID})
+        return meta.get('version', 0) if meta else 0
+
+    def load(self, db):
+        """foods 컬렉션 전체를 읽어 인덱스를 새로 만듭니다."""
+        with self._reload_lock:
+            version = self.get_catalog_version(db)
+            foods = list(db.foods.find({}, {'_id': 0}))
+            self._snapshot = _FoodIndexSnapshot(foods, version)
+            self._last_check = time.monotonic()
+        logger.info(f"음식 인덱스 로드 완료: {len(foods)}개 음식 (버전 {version})")
+        return self._snapshot
+
+    def ensure_fresh(self, db):
+        """버전이 바뀌었거나 아직 로드되지 않은 경우 인덱스를 다시 읽습니다."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load(db)
+
+        if time.monotonic() - self._last_check < self.refresh_interval:
+            return snapshot
+
+        self._last_check = time.monotonic()
+        version = self.get_catalog_version(db)
+        if version != snapshot.version:
+            logger.info(f"음식 카탈로그 변경 감지 (버전 {snapshot.version} -> {version})")
+            return self.load(db)
+        return snapshot
+
+    @property
+    def version(self):
+        """현재 메모리에 있는 카탈로그의 버전 (아직 로드하지 않았으면 None)"""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def invalidate(self):
+        """다음 조회 시 인덱스를 다시 읽도록 표시합니다."""
+        self._snapshot = None
+
+    def lookup(self, food_name, metadata_name=None, db=None):
+        """기존 get_food_info 조회 순서를 그대로 따라 음식 문서의 복사본을 반환합니다. 없으면 None."""
+        snapshot = self.ensure_fresh(db) if db is not None else self._snapshot
+        if snapshot is None:
+            return None
+
+        metadata_name = metadata_name or food_name
+        food_info = (
+            # 1~3. 정확한 이름 일치
+            snapshot.by_name_en.get(metadata_name)
+            or snapshot.by_name_ko.get(metadata_name)
+            or snapshot.by_name_en.get(food_name)
+            # 정규화된 별칭 일치
+            or snapshot.by_alias.get(normalize_food_name(metadata_name))
+            or snapshot.by_alias.get(normalize_food_name(food_name))
+        )
+
+        # 4~6. 부분 일치 (카탈로그 순서대로 검색)
+        if food_info is None:
+            food_info = (
+                next((f for f in snapshot.foods if _regex_search(metadata_name, f.get('nameEn'))), None)
+                or next((f for f in snapshot.foods if _regex_search(metadata_name, f.get('nameKo'))), None)
+                or next((f for f in snapshot.foods
+                         if _regex_search(food_name, f.get('nameEn'))
+                         or _regex_search(food_name, f.get('nameKo'))), None)
+            )
+
+        # 7. dishId로 검색 (숫자 문자열 정규화)
+        if food_info is None:
+            try:
+                food_info = snapshot.by_dish_id.get(str(int(food_name)))
+            except (ValueError, TypeError):
+                food_info = snapshot.by_dish_id.get(str(food_name))
+
+        # 호출자가 결과를 수정해도 인덱스가 바뀌지 않도록 복사본 반환
+        return copy.deepcopy(food_info) if food_info is not None else None
+
+    def get_all(self, db=None):
+        """인덱스에 있는 모든 음식 문서의 복사본을 반환합니다."""
+        snapshot = self.ensure_fresh(db) if db is not None else self._snapshot
+        return copy.deepcopy(snapshot.foods) if snapshot is not None else []
+
+# 음식 인덱스 인스턴스 생성
+food_index = FoodIndex.get_instance()
+
+def get_food_index():
+    """음식 인덱스 인스턴스를 반환합니다."""
+    return food_index
+
+def bump_catalog_version(db):
+    """foods 컬렉션 변경 후 카탈로그 버전을 올려 모든 프로세스의 인덱스를 갱신하게 합니다.
+
+    올린 뒤의 버전을 반환합니다. (실패 시 None)
+    """
+    version = None
+    try:
+        meta = db[CATALOG_META_COLLECTION].find_one_and_update(
+            {'_id': CATALOG_VERSION_ID},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        version = meta.get('version')
+    except Exception as e:
+        logger.error(f"카탈로그 버전 갱신 중 오류 발생: {e}")
+    # 현재 프로세스는 즉시 다시 읽음
+    food_index.invalidate()
+    return version
@@ -0,0 +1,342 @@
+# modules/inference_server.py
+import os
+import time
+import queue
+import logging
+import threading
+from multiprocessing.connection import Listener, Client
+
+from modules.exceptions import InferenceError
+from modules.monitoring import record_metric
+
+logger = logging.getLogger(__name__)
+
+# 프로세스당 하나의 추론 서버 클라이언트
+_inference_client = None
+
+class _InferenceJob:
+    """서버 내부에서 처리 대기 중인 단일 요청"""
+
+    def __init__(self, request):
+        self.request = request
+        self.reply = None
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.cancelled = False  # 응답 대기 시간 초과로 결과가 필요 없어진 요청
+
+    def finish(self, reply):
+        self.reply = reply
+        self.done.set()
+
+class InferenceServer:
+    """YOLO/EasyOCR 모델을 소유하고 요청을 마이크로 배치로 처리하는 로컬 추론 서버
+
+    Celery 워커와 웹 프로세스는 모델을 직접 로드하지 않고 Unix 소켓으로 요청을 보냅니다.
+    음식 인식 요청은 max_wait_ms 이내에 도착한 요청을 최대 max_batch개까지 묶어 한 번에 추론하고,
+    OCR 요청은 별도 스레드에서 순서대로 처리합니다.
+    """
+
+    def __init__(self, address, authkey, max_batch=8, max_wait_ms=10, job_timeout=60, app=None):
+        if not authkey:
+            # 인증된 연결이 보낸 요청은 그대로 언피클되므로 공개된 기본 키로는 실행하지 않음
+            raise InferenceError("INFERENCE_SERVER_AUTHKEY가 설정되지 않아 추론 서버를 시작할 수 없습니다.",
+                                 code='inference_authkey_missing')
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.job_timeout = job_timeout  # 요청 하나의 최대 처리 대기 시간(초)
+        self.app = app
+        self._detect_queue = queue.Queue()
+        self._ocr_queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._listener = None
+
+    @classmethod
+    def from_app(cls, app):
+        """Flask 앱 설정으로 서버를 생성합니다."""
+        return cls(
+            address=app.config['INFERENCE_SERVER_ADDRESS'],
+            authkey=_get_authkey(app),
+            max_batch=app.config.get('INFERENCE_MAX_BATCH', 8),
+            max_wait_ms=app.config.get('INFERENCE_MAX_WAIT_MS', 10),
+            job_timeout=app.config.get('INFERENCE_TIMEOUT', 60),
+            app=app
+        )
+
+    def serve_forever(self):
+        """소켓을 열고 연결을 받아 처리합니다."""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+        # 소켓 파일은 서버 실행 사용자만 접근할 수 있도록 0600으로 생성
+        old_umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+        logger.info(f"추론 서버 시작: {self.address} (max_batch={self.max_batch}, "
+                    f"max_wait={self.max_wait * 1000:.0f}ms)")
+
+        threading.Thread(target=self._detect_loop, name='inference-detect', daemon=True).start()
+        threading.Thread(target=self._ocr_loop, name='inference-ocr', daemon=True).start()
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    conn = self._listener.accept()
+                except Exception as e:
+                    if not self._stop_event.is_set():
+                        logger.warning(f"추론 서버 연결 수락 실패: {e}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """서버를 종료합니다."""
+        self._stop_event.set()
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except Exception:
+                pass
+            self._listener = None
+        if os.path.exists(self.address):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        logger.info("추론 서버가 종료되었습니다.")
+
+    def _handle_connection(self, conn):
+        """하나의 클라이언트 연결에서 들어오는 요청을 처리합니다."""
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    break
+
+                op = request.get('op')
+                if op == 'info':
+                    reply = self._info()
+                elif op in ('detect', 'ocr'):
+                    job = _InferenceJob(request)
+                    (self._detect_queue if op == 'detect' else self._ocr_queue).put(job)
+                    if job.done.wait(self.job_timeout):
+                        reply = job.reply
+                    else:
+                        job.cancelled = True
+                        record_metric('inference_job_timeout', 1, {'op': op})
+                        logger.warning(f"추론 요청 처리 시간 초과: {op} ({self.job_timeout}초)")
+                        reply = {'ok': False, 'error': f"추론 요청 처리 시간 초과 ({self.job_timeout}초)"}
+                else:
+                    reply = {'ok': False, 'error': f"알 수 없는 요청: {op}"}
+
+                conn.send(reply)
+        except Exception as e:
+            logger.error(f"추론 서버 연결 처리 중 오류: {e}")
+        finally:
+            conn.close()
+
+    def _info(self):
+        """클래스 이름 등 모델 메타데이터를 반환합니다."""
+        from modules.vision import get_class_names
+        class_names = get_class_names()
+        if class_names is None:
+            return {'ok': False, 'error': 'YOLO 모델이 초기화되지 않았습니다.'}
+        return {'ok': True, 'result': {'class_names': dict(class_names)}}
+
+    def _collect_batch(self, first_job):
+        """첫 요청 이후 max_wait 동안 도착한 요청을 max_batch개까지 모읍니다."""
+        batch = [first_job]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._detect_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _detect_loop(self):
+        """음식 인식 요청을 마이크로 배치로 처리하는 루프"""
+        while not self._stop_event.is_set():
+            try:
+                first_job = self._detect_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # 이미 시간 초과된 요청은 추론하지 않음
+            batch = [job for job in self._collect_batch(first_job) if not job.cancelled]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                self._run_detect_batch(batch)
+            except Exception as e:
+                logger.error(f"배치 추론 중 오류 발생: {e}", exc_info=True)
+                for job in batch:
+                    if not job.done.is_set():
+                        job.finish({'ok': False, 'error': str(e)})
+
+            record_metric('inference_batch_size', len(batch))
+            record_metric('inference_batch_latency', time.monotonic() - started)
+            record_metric('inference_queue_wait', started - batch[0].enqueued_at)
+
+    def _run_detect_batch(self, batch):
+        """신뢰도 임계값별로 묶어 앙상블 엔진으로 직접 추론합니다.
+
+        결과 캐시는 요청을 보낸 프로세스가 이미 확인하고 저장하므로 서버에서는 모델 실행과 결합만 수행합니다.
+        """
+        from modules.vision import decode_image_bytes, get_ensemble_engine, run_ensemble, run_ensemble_batch
+
+        engine = get_ensemble_engine()
+        if engine is None:
+            raise InferenceError("YOLO 모델이 초기화되지 않았습니다.")
+
+        groups = {}
+        for job in batch:
+            groups.setdefault(job.request.get('conf', 0.25), []).append(job)
+
+        for conf_threshold, jobs in groups.items():
+            images = [decode_image_bytes(job.request['data'], job.request.get('path')) for job in jobs]
+            valid = [i for i, image in enumerate(images) if image is not None]
+            results = [([], [], []) for _ in jobs]
+            with self._app_context():
+                if len(valid) == 1:
+                    # 단일 요청은 적응형 앙상블 등 단일 이미지 경로 사용
+                    results[valid[0]] = run_ensemble(engine, images[valid[0]], conf_threshold)
+                elif valid:
+                    merged = run_ensemble_batch(engine, [images[i] for i in valid], conf_threshold)
+                    for i, result in zip(valid, merged):
+                        results[i] = result
+
+            for job, (boxes, scores, class_ids) in zip(jobs, results):
+                job.finish({'ok': True, 'result': (boxes, scores, class_ids)})
+
+    def _ocr_loop(self):
+        """OCR 요청을 순서대로 처리하는 루프"""
+        from modules.ocr import process_image_text
+
+        while not self._stop_event.is_set():
+            try:
+                job = self._ocr_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if job.cancelled:
+                continue
+
+            try:
+                with self._app_context():
+                    result = process_image_text(job.request['data'], job.request.get('min_confidence', 0.3))
+                job.finish({'ok': True, 'result': result})
+            except Exception as e:
+                logger.error(f"OCR 요청 처리 중 오류 발생: {e}")
+                job.finish({'ok': False, 'error': str(e)})
+
+    def _app_context(self):
+        """앱이 설정된 경우 앱 컨텍스트를 반환합니다."""
+        if self.app is not None:
+            return self.app.app_context()
+        return _NullContext()
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class InferenceClient:
+    """로컬 추론 서버에 요청을 보내는 클라이언트"""
+
+    def __init__(self, address, authkey, timeout=60):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._class_names = None
+
+    def _call(self, request):
+        """요청을 보내고 응답을 기다립니다."""
+        try:
+            conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+        except Exception as e:
+            raise InferenceError(f"추론 서버에 연결할 수 없습니다: {e}")
+
+        try:
+            conn.send(request)
+            if not conn.poll(self.timeout):
+                raise InferenceError(f"추론 서버 응답 시간 초과 ({self.timeout}초)")
+            reply = conn.recv()
+        finally:
+            conn.close()
+
+        if not reply.get('ok'):
+            raise InferenceError(reply.get('error', '알 수 없는 추론 서버 오류'))
+        return reply['result']
+
+    def get_class_names(self):
+        """YOLO 클래스 이름 사전을 반환합니다. (최초 1회만 조회)"""
+        if self._class_names is None:
+            self._class_names = self._call({'op': 'info'})['class_names']
+        return self._class_names
+
+    def detect(self, image, conf_threshold=0.25):
+        """디코딩된 이미지에 대한 앙상블 결과 (boxes, scores, class_ids)를 반환합니다."""
+        # 원본 파일 바이트만 전송하여 픽셀 배열 직렬화 비용을 피함
+        return self._call({
+            'op': 'detect',
+            'path': image.path,
+            'data': image.data,
+            'conf': conf_threshold
+        })
+
+    def ocr(self, image_path, min_confidence=0.3):
+        """이미지 파일에 대한 OCR 결과를 반환합니다."""
+        # 서버와 파일 시스템을 공유하지 않아도 되도록 파일 바이트를 전송
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        return self._call({
+            'op': 'ocr',
+            'path': image_path,
+            'data': data,
+            'min_confidence': min_confidence
+        })
+
+def _get_authkey(app):
+    """추론 서버 인증 키를 바이트로 반환합니다. 설정되지 않았으면 None"""
+    authkey = app.config.get('INFERENCE_SERVER_AUTHKEY')
+    if not authkey:
+        return None
+    return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+
+def init_inference_client(app):
+    """INFERENCE_SERVER_ADDRESS가 설정된 경우 추론 서버 클라이언트를 초기화합니다."""
+    global _inference_client
+
+    address = app.config.get('INFERENCE_SERVER_ADDRESS')
+    if not address:
+        return None
+
+    authkey = _get_authkey(app)
+    if authkey is None:
+        logger.error("INFERENCE_SERVER_AUTHKEY가 설정되지 않아 추론 서버를 사용하지 않습니다.")
+        return None
+
+    if _inference_client is None:
+        _inference_client = InferenceClient(
+            address,
+            authkey,
+            timeout=app.config.get('INFERENCE_TIMEOUT', 60)
+        )
+        logger.info(f"추론 서버 클라이언트 초기화: {address}")
+    return _inference_client
+
+def get_inference_client():
+    """추론 서버 클라이언트를 반환합니다. 설정되지 않은 경우 None."""
+    return _inference_client
@@ -3,10 +3,357 @@ import logging
 import easyocr
 from flask import current_app
 import os
+import time
 import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from modules.exceptions import OCRError, OCRPoolTimeoutError
+from modules.inference_server import init_inference_client, get_inference_client
+from modules.monitoring import record_metric
+from modules.ocr_store import ocr_store, file_content_hash, bytes_content_hash
 
 logger = logging.getLogger(__name__)
 
+class PreprocessedImage:
+    """전처리된 이미지와 원본 좌표 -> 전처리 좌표 변환 행렬(3x3)"""
+    
+    def __init__(self, image, matrix=None, scale=1.0, angle=0.0):
+        self.image = image
+        self.matrix = matrix if matrix is not None else np.eye(3)
+        self.scale = scale
+        self.angle = angle
+    
+    @property
+    def is_identity(self):
+        return np.allclose(self.matrix, np.eye(3))
+    
+    def regions_to_original(self, horizontal_list, free_list):
+        """전처리 이미지에서 검출한 EasyOCR 영역을 원본 이미지 좌표로 되돌립니다.
+
+        크기만 바꾼 경우 가로 박스([x_min, x_max, y_min, y_max])를 유지하고,
+        회전한 경우 원본에서는 기울어진 영역이므로 네 꼭짓점 다각형(free)으로 바꿉니다.
+        """
+        if self.is_identity:
+            return horizontal_list, free_list
+        inverse = np.linalg.inv(self.matrix)[:2]
+        
+        def mapped(points):
+            points = np.asarray(points, dtype=np.float64) @ inverse[:, :2].T + inverse[:, 2]
+            return [[int(round(x)), int(round(y))] for x, y in points]
+        
+        free = [mapped(box) for box in free_list]
+        if np.isclose(self.matrix[0, 1], 0) and np.isclose(self.matrix[1, 0], 0):
+            horizontal = []
+            for x_min, x_max, y_min, y_max in horizontal_list:
+                (x1, y1), (x2, y2) = mapped([[x_min, y_min], [x_max, y_max]])
+                horizontal.append([x1, x2, y1, y2])
+            return horizontal, free
+        
+        free = [
+            mapped([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]])
+            for x_min, x_max, y_min, y_max in horizontal_list
+        ] + free
+        return [], free
+
+class OCRPreprocessor:
+    """EasyOCR 검출 입력 전처리: 글자 높이 추정 기반 축소, 기울기 보정, 대비 정규화
+
+    CRAFT 검출 비용은 픽셀 수에 비례하므로 글자가 목표 높이가 되도록 이미지를 줄여 검출하고,
+    적용한 변환 행렬로 검출 영역을 원본 좌표로 되돌려 인식은 원본 해상도에서 수행합니다.
+    """
+    
+    def __init__(self, enabled=False, target_text_height=28, min_scale=0.25, max_scale=1.0,
+                 deskew=False, max_skew=10.0, contrast=False, sample_side=1024):
+        self.enabled = enabled
+        self.target_text_height = target_text_height
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.deskew = deskew
+        self.max_skew = max_skew
+        self.contrast = contrast
+        self.sample_side = sample_side  # 글자 높이/기울기 추정용 축소 이미지 크기
+    
+    def configure(self, config):
+        """앱 설정에서 전처리 설정을 읽습니다."""
+        self.enabled = config.get('OCR_PRESCALE', self.enabled)
+        self.target_text_height = config.get('OCR_TARGET_TEXT_HEIGHT', self.target_text_height)
+        self.min_scale = config.get('OCR_PRESCALE_MIN_SCALE', self.min_scale)
+        self.max_scale = config.get('OCR_PRESCALE_MAX_SCALE', self.max_scale)
+        self.deskew = config.get('OCR_DESKEW', self.deskew)
+        self.max_skew = config.get('OCR_MAX_SKEW', self.max_skew)
+        self.contrast = config.get('OCR_CONTRAST_NORMALIZE', self.contrast)
+    
+    @property
+    def key(self):
+        """OCR 결과 저장소 키에 포함할 전처리 설정 식별자"""
+        if not self.enabled:
+            return 'raw'
+        return (f"detect-h{self.target_text_height}-s{self.min_scale}-{self.max_scale}"
+                f"-d{int(bool(self.deskew))}{self.max_skew}-c{int(bool(self.contrast))}")
+    
+    def _sample(self, grey):
+        """추정용 축소 이미지와 축소 비율을 반환합니다."""
+        ratio = min(1.0, self.sample_side / max(grey.shape[:2]))
+        if ratio < 1.0:
+            grey = cv2.resize(grey, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+        return grey, ratio
+    
+    @staticmethod
+    def _binarize(grey):
+        """글자 픽셀을 전경(255)으로 하는 이진 이미지"""
+        return cv2.adaptiveThreshold(grey, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 15)
+    
+    def estimate_text_height(self, grey):
+        """연결 요소 높이 분포로 원본 이미지의 대표 글자 높이(픽셀)를 추정합니다. 추정 불가면 None"""
+        sample, ratio = self._sample(grey)
+        binary = self._binarize(sample)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        
+        # 잡음, 선, 큰 그림 영역을 제외한 글자 크기 요소
+        aspect = widths / np.maximum(heights, 1)
+        fill = areas / np.maximum(widths * heights, 1)
+        mask = (
+            (heights >= 4) & (heights <= sample.shape[0] * 0.2)
+            & (aspect > 0.1) & (aspect < 10) & (fill > 0.1)
+        )
+        if mask.sum() < 10:
+            return None
+        # 한글은 자모 단위로 요소가 나뉘므로 중앙값보다 큰 백분위수를 글자 높이로 사용
+        return float(np.percentile(heights[mask], 75)) / ratio
+    
+    def estimate_skew(self, grey):
+        """행 투영 분산이 최대가 되는 각도(도)로 텍스트 줄의 기울기를 추정합니다."""
+        sample, _ = self._sample(grey)
+        sample = cv2.resize(sample, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        binary = self._binarize(sample)
+        center = (binary.shape[1] / 2, binary.shape[0] / 2)
+        
+        best_angle, best_score = 0.0, -1.0
+        for angle in np.arange(-self.max_skew, self.max_skew + 1e-6, 0.5):
+            rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+            rotated = cv2.warpAffine(binary, rotation, (binary.shape[1], binary.shape[0]), flags=cv2.INTER_NEAREST)
+            score = float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+            if score > best_score:
+                best_angle, best_score = float(angle), score
+        return best_angle
+    
+    def prepare(self, image):
+        """BGR 이미지를 전처리하고 PreprocessedImage를 반환합니다."""
+        if not self.enabled:
+            return PreprocessedImage(image)
+        
+        start_time = time.time()
+        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        matrix = np.eye(3)
+        
+        # 1. 글자 높이가 목표 높이가 되도록 크기 조정 (원본 비율에 가까우면 그대로)
+        scale = 1.0
+        text_height = self.estimate_text_height(grey)
+        if text_height:
+            scale = float(np.clip(self.target_text_height / text_height, self.min_scale, self.max_scale))
+            if abs(scale - 1.0) < 0.1:
+                scale = 1.0
+        # 기울기는 크기와 무관하므로 원본 회색조 이미지에서 추정
+        angle = self.estimate_skew(grey) if self.deskew else 0.0
+        
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+            matrix = np.diag([scale, scale, 1.0])
+        
+        # 2. 기울기 보정 (회전 후 잘리지 않도록 캔버스 확장)
+        if angle:
+            height, width = image.shape[:2]
+            rotation = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+            cos, sin = abs(rotation[0, 0]), abs(rotation[0, 1])
+            new_width, new_height = int(height * sin + width * cos), int(height * cos + width * sin)
+            rotation[0, 2] += new_width / 2 - width / 2
+            rotation[1, 2] += new_height / 2 - height / 2
+            image = cv2.warpAffine(image, rotation, (new_width, new_height),
+                                   flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+            matrix = np.vstack([rotation, [0, 0, 1]]) @ matrix
+        
+        # 3. 대비 정규화 (밝기 채널에 CLAHE)
+        if self.contrast:
+            lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            lab[:, :, 0] = clahe.apply(lab[:, :, 0])
+            image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+        
+        record_metric('ocr_preprocess_latency', time.time() - start_time)
+        logger.info(f"OCR 전처리: 글자 높이 {text_height or 0:.1f}px, 배율 {scale:.2f}, 기울기 {angle:.1f}도")
+        return PreprocessedImage(image, matrix, scale, angle)
+
+class OCRReaderPool:
+    """EasyOCR Reader 인스턴스 풀
+
+    EasyOCR Reader는 스레드 안전하지 않으므로 요청마다 하나를 대여해 단독으로 사용합니다.
+    최대 max_size개까지 필요할 때 생성하고, 모두 사용 중이면 checkout_timeout초 동안 반환을 기다립니다.
+    """
+    
+    def __init__(self, factory, max_size=1, checkout_timeout=30.0):
+        self.factory = factory  # Reader 생성 함수
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.readers = deque()  # 유휴 Reader
+        self.lock = threading.Condition()
+        self.reader_count = 0
+        self.in_use = 0
+        self.started_at = time.monotonic()
+        self.stats = {
+            'created': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'busy_time': 0.0,
+            'peak_in_use': 0
+        }
+    
+    def warm_up(self, count=1):
+        """Reader를 미리 count개까지 생성해 둡니다."""
+        while True:
+            with self.lock:
+                if self.reader_count >= min(count, self.max_size):
+                    return self.reader_count
+                self.reader_count += 1
+            reader = self._create()
+            with self.lock:
+                self.readers.append(reader)
+                self.lock.notify()
+    
+    def _create(self):
+        """새 Reader를 생성합니다. (락 밖에서 호출, 자리는 미리 확보된 상태)"""
+        try:
+            reader = self.factory()
+        except Exception as e:
+            with self.lock:
+                self.reader_count -= 1
+                self.lock.notify()
+            logger.error(f"EasyOCR Reader 생성 실패: {e}")
+            raise OCRError(f"OCR 리더를 생성할 수 없습니다: {e}")
+        with self.lock:
+            self.stats['created'] += 1
+        logger.info(f"EasyOCR Reader 생성 ({self.reader_count}/{self.max_size})")
+        return reader
+    
+    def acquire(self, checkout_timeout=None):
+        """유휴 Reader를 대여합니다. 없으면 새로 만들거나 반환될 때까지 기다립니다."""
+        checkout_timeout = self.checkout_timeout if checkout_timeout is None else checkout_timeout
+        requested_at = time.monotonic()
+        deadline = requested_at + checkout_timeout
+        waited = False
+        reader = None
+        
+        with self.lock:
+            while True:
+                if self.readers:
+                    reader = self.readers.pop()
+                    break
+                
+                # 최대 개수 이내이면 새 Reader 자리 확보
+                if self.reader_count < self.max_size:
+                    self.reader_count += 1
+                    break
+                
+                if not waited:
+                    waited = True
+                    self.stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    record_metric('ocr_pool_checkout_timeout', 1)
+                    logger.warning(f"OCR 리더 풀 대기 시간 초과 (max={self.max_size}, timeout={checkout_timeout}초)")
+                    raise OCRPoolTimeoutError(
+                        f"OCR 리더 풀에서 {checkout_timeout}초 내에 리더를 얻지 못했습니다.",
+                        code='ocr_pool_timeout'
+                    )
+                self.lock.wait(remaining)
+        
+        if reader is None:
+            reader = self._create()
+        
+        wait_time = time.monotonic() - requested_at
+        with self.lock:
+            self.in_use += 1
+            self.stats['checkouts'] += 1
+            self.stats['wait_time'] += wait_time
+            self.stats['max_wait_time'] = max(self.stats['max_wait_time'], wait_time)
+            self.stats['peak_in_use'] = max(self.stats['peak_in_use'], self.in_use)
+            utilization = self.in_use / self.max_size
+        record_metric('ocr_pool_checkout_wait', wait_time)
+        record_metric('ocr_pool_utilization', utilization)
+        return reader
+    
+    def try_acquire(self, count):
+        """기다리지 않고 Reader를 최대 count개 대여합니다. (유휴 Reader 우선, 자리가 있으면 새로 생성)"""
+        readers, to_create = [], 0
+        with self.lock:
+            while len(readers) + to_create < count:
+                if self.readers:
+                    readers.append(self.readers.pop())
+                elif self.reader_count < self.max_size:
+                    self.reader_count += 1
+                    to_create += 1
+                else:
+                    break
+        
+        for i in range(to_create):
+            try:
+                readers.append(self._create())
+            except OCRError:
+                # 실패한 자리는 _create에서 반환하므로 남은 예약 자리만 반환
+                with self.lock:
+                    self.reader_count -= to_create - i - 1
+                    self.lock.notify_all()
+                break
+        
+        with self.lock:
+            self.in_use += len(readers)
+            self.stats['checkouts'] += len(readers)
+            self.stats['peak_in_use'] = max(self.stats['peak_in_use'], self.in_use)
+        return readers
+    
+    def release(self, reader, busy_time=0.0):
+        """대여한 Reader를 풀로 반환합니다."""
+        with self.lock:
+            self.in_use -= 1
+            self.stats['busy_time'] += busy_time
+            self.readers.append(reader)
+            self.lock.notify()
+    
+    @contextmanager
+    def checkout(self, checkout_timeout=None):
+        """with 블록 동안 Reader를 대여합니다."""
+        reader = self.acquire(checkout_timeout)
+        checked_out_at = time.monotonic()
+        try:
+            yield reader
+        finally:
+            self.release(reader, time.monotonic() - checked_out_at)
+    
+    def get_stats(self):
+        """풀 사용 현황, 대기 시간, 사용률(사용 시간 / 경과 시간 x 최대 개수)을 반환합니다."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['total'] = self.reader_count
+            stats['idle'] = len(self.readers)
+            stats['in_use'] = self.in_use
+            stats['max_size'] = self.max_size
+        elapsed = time.monotonic() - self.started_at
+        stats['avg_wait_time'] = stats['wait_time'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        stats['utilization'] = stats['busy_time'] / (elapsed * self.max_size) if elapsed > 0 else 0.0
+        return stats
+
 class OCRReader:
     """OCR 리더 싱글톤 클래스"""
     
@@ -25,9 +372,29 @@ class OCRReader:
     
     def __init__(self, app=None):
         """초기화 - 직접 호출하지 말고 get_instance() 사용"""
-        self.reader = None
         self.app = app
         self.initialized = False
+        # 타일 OCR 설정: 큰 이미지는 축소 이미지로 한 번 검출하고 영역 묶음을 병렬로 인식
+        self.tiled = False
+        self.tile_min_pixels = 4000000
+        self.detect_max_side = 1600
+        self.tile_workers = min(4, os.cpu_count() or 1)
+        self._executor = None
+        self.preprocessor = OCRPreprocessor()
+        # 동시 요청용 Reader 풀 설정
+        self.pool = None
+        self.pool_size = 1
+        self.pool_timeout = 30.0
+    
+    def configure(self, config):
+        """앱 설정에서 타일 OCR/전처리 설정을 읽습니다. (모델을 로드하지 않는 프로세스도 같은 저장소 키를 쓰도록 분리)"""
+        self.tiled = config.get('OCR_TILED', self.tiled)
+        self.tile_min_pixels = config.get('OCR_TILE_MIN_PIXELS', self.tile_min_pixels)
+        self.detect_max_side = config.get('OCR_DETECT_MAX_SIDE', self.detect_max_side)
+        self.tile_workers = config.get('OCR_TILE_WORKERS', self.tile_workers)
+        self.pool_size = max(1, config.get('OCR_POOL_SIZE', self.pool_size))
+        self.pool_timeout = config.get('OCR_POOL_TIMEOUT', self.pool_timeout)
+        self.preprocessor.configure(config)
     
     def initialize(self, app=None):
         """모델 지연 초기화 메서드"""
@@ -55,15 +422,148 @@ class OCRReader:
                 if not os.path.exists(model_path):
                     os.makedirs(model_path, exist_ok=True)
                 
-                # 한국어와 영어를 인식하도록 설정
-                self.reader = easyocr.Reader(['ko', 'en'], gpu=False, model_storage_directory=model_path)
+                if self.app:
+                    self.configure(self.app.config)
+                # 타일 작업자는 각자 풀에서 Reader를 대여하므로 풀이 2개 이상일 때만 병렬 인식
+                if self.tiled and self.tile_workers > 1 and self.pool_size > 1 and self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.tile_workers,
+                                                        thread_name_prefix='ocr-tile')
+                
+                # 여러 Reader가 동시에 추론하면 코어를 나눠 쓰도록 torch 스레드 수 제한
+                # (요청과 타일 작업자를 합쳐 동시에 추론하는 Reader는 최대 pool_size개)
+                if self.pool_size > 1:
+                    import torch
+                    torch.set_num_threads(max(1, (os.cpu_count() or 1) // self.pool_size))
+                
+                # 한국어와 영어를 인식하도록 설정 (첫 Reader만 미리 만들고 나머지는 필요할 때 생성)
+                self.pool = OCRReaderPool(
+                    lambda: easyocr.Reader(['ko', 'en'], gpu=False, model_storage_directory=model_path),
+                    max_size=self.pool_size,
+                    checkout_timeout=self.pool_timeout
+                )
+                self.pool.warm_up(1)
                 self.initialized = True
-                logger.info("EasyOCR 모델 로딩 완료")
+                logger.info(f"EasyOCR 모델 로딩 완료 (리더 풀 최대 {self.pool_size}개)")
                 return True
             except Exception as e:
                 logger.error(f"EasyOCR 모델 로딩 중 오류 발생: {e}")
                 return False
     
+    @property
+    def pipeline(self):
+        """저장된 OCR 결과를 재사용할 수 있는지 판단하는 OCR 설정 식별자"""
+        pipeline = f"easyocr:ko,en:{self.preprocessor.key}"
+        if self.tiled:
+            pipeline += f":tiled-{self.tile_min_pixels}-{self.detect_max_side}"
+        return pipeline
+    
+    def recognize(self, image_path):
+        """신뢰도 필터링 전의 OCR 결과 목록 [{'text', 'bbox', 'confidence'}]을 반환합니다.
+
+        image_path에는 파일 경로 또는 인코딩된 이미지 바이트를 전달할 수 있습니다.
+        """
+        if not self.initialized and not self.initialize():
+            raise RuntimeError("OCR 모델을 초기화할 수 없습니다.")
+        
+        logger.info(f"이미지 텍스트 인식 중: {_describe_source(image_path)}")
+        image = _load_image(image_path) if self.tiled or self.preprocessor.enabled else None
+        if image is None:
+            with self.pool.checkout() as reader:
+                return _format_results(reader.readtext(image_path))
+        
+        # 전처리는 Reader 없이 수행하고, 검출/인식 동안만 Reader를 대여
+        # (전처리 이미지는 검출에만 쓰고 인식은 원본 해상도에서 수행하므로 결과 좌표는 원본 기준)
+        prepared = self.preprocessor.prepare(image)
+        with self.pool.checkout() as reader:
+            if self.tiled and image.shape[0] * image.shape[1] >= self.tile_min_pixels:
+                return self._recognize_tiled(reader, image, prepared)
+            return self._recognize_whole(reader, image, prepared)
+    
+    def _recognize_whole(self, reader, image, prepared=None):
+        """전처리 이미지 전체에서 한 번에 검출하고, 원본 해상도 회색조 이미지에서 인식합니다."""
+        prepared = prepared if prepared is not None else PreprocessedImage(image)
+        start_time = time.time()
+        horizontal_list, free_list = reader.detect(cv2.cvtColor(prepared.image, cv2.COLOR_BGR2RGB))
+        record_metric('ocr_detect_latency', time.time() - start_time, {'tiled': False})
+        
+        horizontal_list, free_list = prepared.regions_to_original(horizontal_list[0], free_list[0])
+        results = reader.recognize(
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+            horizontal_list=horizontal_list,
+            free_list=free_list,
+            reformat=False
+        )
+        return _format_results(results)
+    
+    def _recognize_tiled(self, reader, image, prepared=None):
+        """축소한 전처리 이미지로 텍스트 영역을 한 번 검출한 뒤, 원본 해상도에서 영역 묶음별로 병렬 인식합니다."""
+        prepared = prepared if prepared is not None else PreprocessedImage(image)
+        height, width = prepared.image.shape[:2]
+        scale = min(1.0, self.detect_max_side / max(height, width))
+        
+        # 1. 축소 이미지로 검출 (CRAFT 비용은 픽셀 수에 비례)
+        start_time = time.time()
+        if scale < 1.0:
+            small = cv2.resize(prepared.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = prepared.image
+        horizontal_list, free_list = reader.detect(
+            cv2.cvtColor(small, cv2.COLOR_BGR2RGB),
+            min_size=max(1, int(round(20 * scale))),
+            canvas_size=max(small.shape[:2])
+        )
+        record_metric('ocr_detect_latency', time.time() - start_time, {'tiled': True})
+        
+        # 검출 좌표를 원본 해상도로 변환 (검출용 축소와 전처리 변환을 합친 행렬 사용)
+        # detect()는 이미지별 목록을 반환하므로 첫 번째 이미지의 결과만 사용
+        detected = PreprocessedImage(small, np.diag([scale, scale, 1.0]) @ prepared.matrix)
+        horizontal_list, free_list = detected.regions_to_original(horizontal_list[0], free_list[0])
+        regions = [('horizontal', box) for box in horizontal_list] + [('free', box) for box in free_list]
+        if not regions:
+            return []
+        
+        # 2. 위에서 아래 순서로 정렬한 영역을 묶어 병렬 인식
+        # Reader는 스레드 안전하지 않으므로 작업자마다 풀에서 기다리지 않고 대여한 별도 Reader를 사용
+        regions.sort(key=lambda region: _region_top(*region))
+        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        extra_readers = []
+        if self._executor is not None:
+            extra_readers = self.pool.try_acquire(min(len(regions), self.tile_workers) - 1)
+        readers = [reader] + extra_readers
+        batch_count = min(len(regions), len(readers))
+        batches = [
+            regions[i * len(regions) // batch_count:(i + 1) * len(regions) // batch_count]
+            for i in range(batch_count)
+        ]
+        
+        start_time = time.time()
+        try:
+            if len(batches) > 1:
+                futures = [
+                    self._executor.submit(self._recognize_regions, batch_reader, grey, batch)
+                    for batch_reader, batch in zip(readers, batches)
+                ]
+                batch_results = [future.result() for future in futures]
+            else:
+                batch_results = [self._recognize_regions(reader, grey, batches[0])]
+        finally:
+            busy_time = time.time() - start_time
+            for extra_reader in extra_readers:
+                self.pool.release(extra_reader, busy_time)
+        record_metric('ocr_recognize_latency', time.time() - start_time, {'tiled': True, 'batches': len(batches)})
+        
+        results = [item for batch in batch_results for item in batch]
+        return _merge_duplicates(_format_results(results))
+    
+    def _recognize_regions(self, reader, grey, regions):
+        """원본 회색조 이미지에서 주어진 영역들만 인식합니다."""
+        return reader.recognize(
+            grey,
+            horizontal_list=[box for kind, box in regions if kind == 'horizontal'],
+            free_list=[box for kind, box in regions if kind == 'free'],
+            reformat=False
+        )
+    
     def read_text(self, image_path, min_confidence=0.3):
         """이미지에서 텍스트를 인식하는 메서드"""
         if not self.initialized:
@@ -72,68 +572,157 @@ class OCRReader:
                 return {"success": False, "error": "OCR 모델을 초기화할 수 없습니다."}
         
         try:
-            logger.info(f"이미지 텍스트 인식 중: {image_path}")
-            results = self.reader.readtext(image_path)
-            
-            # 인식된 텍스트 추출 및 정리
-            extracted_texts = []
-            for bbox, text, prob in results:
-                # 신뢰도가 min_confidence 이상인 텍스트만 선택
-                if prob > min_confidence and len(text.strip()) > 0:
-                    extracted_texts.append({
-                        'text': text,
-                        'bbox': bbox,
-                        'confidence': prob
-                    })
-            
-            if not extracted_texts:
-                return {"success": False, "error": "인식된 텍스트가 없습니다."}
-            
-            # 추출된 텍스트를 하나로 합치기
-            full_text = "\n".join([item['text'] for item in extracted_texts])
-            
-            return {
-                "success": True,
-                "extracted_texts": extracted_texts,
-                "full_text": full_text
-            }
-        
+            return build_ocr_result(self.recognize(image_path), min_confidence)
         except Exception as e:
             logger.error(f"텍스트 인식 중 오류 발생: {e}")
             return {"success": False, "error": str(e)}
 
-# 기존 함수를 대체하는 래퍼 함수들 (호환성 유지)
-def get_ocr_reader():
-    """OCR 리더 인스턴스를 가져오는 함수 (기존 코드와의 호환성 유지)"""
-    instance = OCRReader.get_instance()
-    if not instance.initialized:
-        instance.initialize()
-    return instance.reader
-
-def init_ocr(app):
-    """애플리케이션 초기화 시 OCR 리더를 초기화하는 함수"""
-    ocr = OCRReader.get_instance(app)
-    return ocr.initialize(app)
+def _describe_source(image_path):
+    """로그에 남길 이미지 경로 또는 바이트 크기"""
+    if isinstance(image_path, (bytes, bytearray)):
+        return f"<{len(image_path)} bytes>"
+    return image_path
 
-def process_image_text(image_path, min_confidence=0.3):
-    """이미지에서 텍스트를 인식하는 함수 (기존 코드와의 호환성 유지)"""
-    ocr = OCRReader.get_instance()
-    return ocr.read_text(image_path, min_confidence)
+def _load_image(image_path):
+    """이미지 파일 또는 바이트를 BGR 배열로 읽습니다. (한글 경로 지원) 실패하면 None"""
+    try:
+        if isinstance(image_path, (bytes, bytearray)):
+            return cv2.imdecode(np.frombuffer(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except Exception as e:
+        logger.warning(f"OCR 이미지 로드 실패: {e}")
+        return None
+
+def _region_top(kind, box):
+    """검출 영역의 위쪽 y 좌표"""
+    return box[2] if kind == 'horizontal' else min(y for _, y in box)
+
+def _format_results(results):
+    """EasyOCR 결과 튜플을 저장 가능한 사전 목록으로 변환합니다."""
+    return [
+        {
+            'text': text,
+            'bbox': [[_to_builtin(value) for value in point] for point in bbox],
+            'confidence': float(prob)
+        }
+        for bbox, text, prob in results
+    ]
+
+def _merge_duplicates(items, iou_threshold=0.5):
+    """겹치는 영역에서 중복 인식된 텍스트를 신뢰도가 높은 것만 남기고 제거한 뒤 읽기 순서로 정렬합니다."""
+    if len(items) < 2:
+        return items
+    
+    points = np.array([np.asarray(item['bbox'], dtype=np.float32) for item in items])
+    boxes = np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)  # x1, y1, x2, y2
+    areas = np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+    
+    x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    intersection = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    iou = intersection / np.maximum(areas[:, None] + areas[None, :] - intersection, 1e-6)
+    
+    keep = np.ones(len(items), dtype=bool)
+    for i in np.argsort([-item['confidence'] for item in items], kind='stable'):
+        if keep[i]:
+            duplicates = iou[i] > iou_threshold
+            duplicates[i] = False
+            keep &= ~duplicates
+    
+    kept = [i for i in range(len(items)) if keep[i]]
+    kept.sort(key=lambda i: (boxes[i, 1], boxes[i, 0]))
+    return [items[i] for i in kept]
+
+def _to_builtin(value):
+    """numpy 숫자를 MongoDB/JSON에 저장할 수 있는 파이썬 숫자로 변환합니다."""
+    return value.item() if hasattr(value, 'item') else value
+
+def build_ocr_result(raw_results, min_confidence=0.3):
+    """OCR 원본 결과에 신뢰도 필터를 적용해 응답 형식으로 만듭니다."""
+    # 신뢰도가 min_confidence 이상인 텍스트만 선택
+    extracted_texts = [
+        item for item in raw_results
+        if item['confidence'] > min_confidence and len(item['text'].strip()) > 0
+    ]
+    
+    if not extracted_texts:
+        return {"success": False, "error": "인식된 텍스트가 없습니다."}
+    
+    # 추출된 텍스트를 하나로 합치기
+    full_text = "\n".join([item['text'] for item in extracted_texts])
+    
+    return {
+        "success": True,
+        "extracted_texts": extracted_texts,
+        "full_text": full_text
+    }
 
 # 기존 함수를 대체하는 래퍼 함수들 (호환성 유지)
-def get_ocr_reader():
-    """OCR 리더 인스턴스를 가져오는 함수 (기존 코드와의 호환성 유지)"""
-    instance = OCRReader.get_instance()
-    if not instance.initialized:
-        instance.initialize()
-    return instance.reader
-
-def init_ocr(app):
-    """애플리케이션 초기화 시 OCR 리더를 초기화하는 함수"""
+def get_ocr_pool_stats():
+    """OCR 리더 풀 통계를 반환합니다. (모델을 로드하지 않은 프로세스는 빈 사전)"""
+    pool = OCRReader.get_instance().pool
+    return pool.get_stats() if pool is not None else {}
+
+def init_ocr(app, use_inference_server=True):
+    """애플리케이션 초기화 시 OCR 리더를 초기화하는 함수
+    
+    INFERENCE_SERVER_ADDRESS가 설정되어 있으면 EasyOCR을 로드하지 않고 추론 서버를 사용합니다.
+    """
+    OCRReader.get_instance(app).configure(app.config)
+    
+    if use_inference_server and init_inference_client(app) is not None:
+        logger.info("추론 서버를 사용하므로 EasyOCR 모델을 로드하지 않습니다.")
+        return True
+    
     ocr = OCRReader.get_instance(app)
     return ocr.initialize(app)
 
-def process_image_text(image_path, min_confidence=0.3):
-    """이미지에서 텍스트를 인식하는 함수 (기존 코드와의 호환성 유지)"""
+def process_image_text(image_path, min_confidence=0.3, use_store=True):
+    """이미지에서 텍스트를 인식하는 함수 (기존 코드와의 호환성 유지)
+    
+    image_path에는 파일 경로 또는 인코딩된 이미지 바이트(추론 서버 요청)를 전달할 수 있습니다.
+    같은 내용의 이미지는 OCR 결과 저장소에서 원본 결과를 가져와 신뢰도 필터만 다시 적용합니다.
+    """
     ocr = OCRReader.get_instance()
-    return ocr.read_text(image_path, min_confidence)
\ No newline at end of file
+    
+    content_hash = None
+    if use_store and ocr_store.enabled:
+        try:
+            if isinstance(image_path, (bytes, bytearray)):
+                content_hash = bytes_content_hash(image_path)
+            else:
+                content_hash = file_content_hash(image_path)
+        except OSError as e:
+            logger.error(f"이미지 해시 계산 실패: {e}")
+        if content_hash is not None:
+            raw_results = ocr_store.get(content_hash, ocr.pipeline)
+            if raw_results is not None:
+                logger.info(f"저장된 OCR 결과 사용: {_describe_source(image_path)}")
+                result = build_ocr_result(raw_results, min_confidence)
+                result.update({"content_hash": content_hash, "cached": True})
+                return result
+    
+    # 모델을 로드하지 않은 프로세스는 추론 서버에 요청 (결과 저장은 추론 서버에서 처리)
+    client = get_inference_client()
+    if client is not None and not ocr.initialized:
+        try:
+            return client.ocr(image_path, min_confidence)
+        except Exception as e:
+            logger.error(f"추론 서버 OCR 요청 실패: {e}")
+            return {"success": False, "error": str(e)}
+    
+    try:
+        raw_results = ocr.recognize(image_path)
+    except Exception as e:
+        logger.error(f"텍스트 인식 중 오류 발생: {e}")
+        return {"success": False, "error": str(e)}
+    
+    if content_hash is not None:
+        ocr_store.put(content_hash, ocr.pipeline, raw_results)
+    
+    result = build_ocr_result(raw_results, min_confidence)
+    if content_hash is not None:
+        result.update({"content_hash": content_hash, "cached": False})
+    return result
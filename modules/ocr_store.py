@@ -0,0 +1,201 @@
+# modules/ocr_store.py
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from modules.database import get_db
+from modules.monitoring import record_metric
+
+logger = logging.getLogger(__name__)
+
+OCR_RESULTS_COLLECTION = 'ocr_results'
+
+def bytes_content_hash(data):
+    """이미지 바이트의 SHA-256 해시를 반환합니다. (file_content_hash와 같은 값)"""
+    return hashlib.sha256(data).hexdigest()
+
+def file_content_hash(image_path, chunk_size=1 << 20):
+    """이미지 파일 내용의 SHA-256 해시를 반환합니다."""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class OCRResultStore:
+    """이미지 내용 해시를 키로 OCR 원본 결과(박스, 텍스트, 신뢰도)를 MongoDB에 저장하는 저장소
+
+    신뢰도 필터링 전의 결과를 저장하므로 min_confidence가 달라도 재사용할 수 있고,
+    Celery 재시도나 같은 메뉴판 사진의 재업로드 시 EasyOCR을 다시 실행하지 않습니다.
+    오래된 항목은 TTL 인덱스로, 최대 개수를 넘는 항목은 마지막 사용 시각 순으로 제거합니다.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """싱글톤 인스턴스 반환"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, ttl_seconds=7 * 24 * 3600, max_entries=10000, prune_interval=100, enabled=True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval  # 저장 N회마다 개수 제한 확인
+        self.enabled = enabled
+        self._puts_since_prune = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+    def configure(self, ttl_seconds=None, max_entries=None, prune_interval=None, enabled=None):
+        """저장소 설정을 변경합니다."""
+        if ttl_seconds is not None:
+            self.ttl_seconds = ttl_seconds
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if prune_interval is not None:
+            self.prune_interval = prune_interval
+        if enabled is not None:
+            self.enabled = enabled
+
+    def _inc(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def ensure_indexes(self, db):
+        """TTL 인덱스와 마지막 사용 시각 인덱스를 생성합니다. TTL이 바뀌었으면 인덱스 옵션을 갱신합니다."""
+        collection = db[OCR_RESULTS_COLLECTION]
+        try:
+            collection.create_index([('created_at', ASCENDING)], expireAfterSeconds=self.ttl_seconds)
+        except OperationFailure:
+            db.command('collMod', OCR_RESULTS_COLLECTION, index={
+                'keyPattern': {'created_at': 1},
+                'expireAfterSeconds': self.ttl_seconds
+            })
+        collection.create_index([('last_access', ASCENDING)])
+
+    def get(self, content_hash, pipeline, db=None):
+        """저장된 OCR 원본 결과 목록을 반환합니다. 없거나 OCR 설정(pipeline)이 다르면 None."""
+        if not self.enabled:
+            return None
+
+        try:
+            db = db if db is not None else get_db()
+            doc = db[OCR_RESULTS_COLLECTION].find_one_and_update(
+                {'_id': content_hash, 'pipeline': pipeline},
+                {'$set': {'last_access': datetime.now()}, '$inc': {'hits': 1}},
+                projection={'results': 1}
+            )
+        except Exception as e:
+            self._inc('errors')
+            logger.error(f"OCR 결과 조회 중 오류 발생: {e}")
+            return None
+
+        if doc is None:
+            self._inc('misses')
+            record_metric('ocr_store_hit', 0)
+            return None
+
+        self._inc('hits')
+        record_metric('ocr_store_hit', 1)
+        return doc['results']
+
+    def put(self, content_hash, pipeline, results, db=None):
+        """OCR 원본 결과를 저장합니다."""
+        if not self.enabled:
+            return False
+
+        try:
+            db = db if db is not None else get_db()
+            now = datetime.now()
+            db[OCR_RESULTS_COLLECTION].replace_one(
+                {'_id': content_hash},
+                {
+                    'pipeline': pipeline,
+                    'results': results,
+                    'created_at': now,
+                    'last_access': now,
+                    'hits': 0
+                },
+                upsert=True
+            )
+            self._inc('writes')
+
+            with self._stats_lock:
+                self._puts_since_prune += 1
+                should_prune = self._puts_since_prune >= self.prune_interval
+                if should_prune:
+                    self._puts_since_prune = 0
+            if should_prune:
+                self.prune(db)
+            return True
+        except Exception as e:
+            self._inc('errors')
+            logger.error(f"OCR 결과 저장 중 오류 발생: {e}")
+            return False
+
+    def prune(self, db=None):
+        """최대 개수를 넘는 항목을 마지막 사용 시각이 오래된 순으로 삭제합니다."""
+        try:
+            db = db if db is not None else get_db()
+            collection = db[OCR_RESULTS_COLLECTION]
+            excess = collection.estimated_document_count() - self.max_entries
+            if excess <= 0:
+                return 0
+
+            stale_ids = [
+                doc['_id'] for doc in
+                collection.find({}, {'_id': 1}).sort('last_access', ASCENDING).limit(excess)
+            ]
+            deleted = collection.delete_many({'_id': {'$in': stale_ids}}).deleted_count
+            self._inc('evictions', deleted)
+            logger.info(f"OCR 결과 저장소 정리: {deleted}개 항목 삭제")
+            return deleted
+        except Exception as e:
+            self._inc('errors')
+            logger.error(f"OCR 결과 저장소 정리 중 오류 발생: {e}")
+            return 0
+
+    def get_stats(self):
+        """저장소 통계를 반환합니다."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+# OCR 결과 저장소 인스턴스 생성
+ocr_store = OCRResultStore.get_instance()
+
+def init_ocr_store(app):
+    """앱 설정으로 OCR 결과 저장소를 초기화하고 인덱스를 생성합니다."""
+    ocr_store.configure(
+        ttl_seconds=app.config.get('OCR_RESULT_TTL', 7 * 24 * 3600),
+        max_entries=app.config.get('OCR_RESULT_MAX_ENTRIES', 10000),
+        prune_interval=app.config.get('OCR_RESULT_PRUNE_INTERVAL', 100),
+        enabled=app.config.get('OCR_RESULT_STORE_ENABLED', True)
+    )
+    if ocr_store.enabled:
+        try:
+            with app.app_context():
+                ocr_store.ensure_indexes(get_db())
+        except Exception as e:
+            logger.error(f"OCR 결과 저장소 인덱스 생성 중 오류 발생: {e}")
+    logger.info(f"OCR 결과 저장소 초기화: 최대 {ocr_store.max_entries}개 항목, TTL {ocr_store.ttl_seconds}초")
+    return ocr_store
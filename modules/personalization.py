@@ -0,0 +1,126 @@
+# modules/personalization.py
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 선호도 설정 화면의 알레르기 ID와 음식 메타데이터의 알레르기 이름 (비트 순서 고정)
+ALLERGEN_PREFERENCES = {
+    'gluten': '글루텐',
+    'dairy': '유제품',
+    'soy': '대두',
+    'nuts': '견과류',
+    'shellfish': '갑각류',
+    'fish': '생선',
+    'eggs': '계란',
+    'sesame': '참깨'
+}
+ALLERGEN_BITS = {allergen_id: 1 << bit for bit, allergen_id in enumerate(ALLERGEN_PREFERENCES)}
+# 메타데이터에는 한글 이름이 저장되므로 한글/영문 모두 같은 비트로 변환
+ALLERGEN_NAME_BITS = dict(ALLERGEN_BITS)
+ALLERGEN_NAME_BITS.update({name: ALLERGEN_BITS[allergen_id] for allergen_id, name in ALLERGEN_PREFERENCES.items()})
+
+# 선호도 설정 화면의 음식 카테고리 ID (비트 순서 고정)
+FOOD_CATEGORIES = ('rice', 'noodle', 'soup', 'meat', 'seafood', 'vegetable', 'side_dish', 'street_food')
+CATEGORY_BITS = {category: 1 << bit for bit, category in enumerate(FOOD_CATEGORIES)}
+
+# 메타데이터의 className -> 카테고리
+CLASS_NAME_CATEGORIES = {
+    'Rice Dishes': ('rice',),
+    'Noodle Dishes': ('noodle',),
+    'Soup Dishes': ('soup',),
+    'Korean Stews': ('soup',),
+    'Kimchi Varieties': ('vegetable', 'side_dish'),
+    'Braised Dishes': ('side_dish',),
+    'Korean Pancakes': ('side_dish',),
+    'Dumplings': ('street_food',)
+}
+# 주재료 키워드 -> 카테고리
+MEAT_KEYWORDS = ('고기', '돼지', '소갈비', '닭', '삼겹살', '영계', '곱창', '족', '갈비')
+SEAFOOD_KEYWORDS = ('장어', '갈치', '생선', '새우', '오징어', '조개', '굴', '게', '문어', '낙지')
+STREET_FOOD_NAMES = ('떡볶이', '순대', '김밥', '어묵', '호떡', '튀김', '만두')
+
+NON_VEGETARIAN_STATUS = '비채식'
+
+def encode_allergens(allergens):
+    """알레르기 이름/ID 목록을 비트마스크로 변환합니다."""
+    mask = 0
+    for allergen in allergens or []:
+        mask |= ALLERGEN_NAME_BITS.get(allergen, 0)
+    return mask
+
+def encode_categories(categories):
+    """카테고리 ID 목록을 비트마스크로 변환합니다."""
+    mask = 0
+    for category in categories or []:
+        mask |= CATEGORY_BITS.get(category, 0)
+    return mask
+
+def food_categories(food):
+    """음식 메타데이터에서 선호도 카테고리 목록을 추론합니다. (preferenceCategories 필드가 있으면 우선)"""
+    if food.get('preferenceCategories'):
+        return list(food['preferenceCategories'])
+
+    categories = set(CLASS_NAME_CATEGORIES.get(food.get('className'), ()))
+    ingredients = food.get('ingredients') or {}
+    main_ingredients = ingredients.get('main', []) if isinstance(ingredients, dict) else ingredients
+    for ingredient in main_ingredients or []:
+        if any(keyword in ingredient for keyword in MEAT_KEYWORDS):
+            categories.add('meat')
+        if any(keyword in ingredient for keyword in SEAFOOD_KEYWORDS):
+            categories.add('seafood')
+    if food.get('nameKo') in STREET_FOOD_NAMES:
+        categories.add('street_food')
+    return sorted(categories)
+
+def encode_food_profile(food):
+    """음식의 (알레르기 비트마스크, 카테고리 비트마스크, 비채식 여부)를 반환합니다."""
+    return (
+        encode_allergens(food.get('allergens')),
+        encode_categories(food_categories(food)),
+        food.get('vegetarianStatus') == NON_VEGETARIAN_STATUS
+    )
+
+class UserProfile:
+    """사용자 선호도를 비트마스크로 변환한 추천 필터"""
+
+    def __init__(self, allergens=None, vegetarian=False, preferred_categories=None):
+        self.allergen_mask = encode_allergens(allergens)
+        self.vegetarian = bool(vegetarian)
+        self.category_mask = encode_categories(preferred_categories)
+
+    @classmethod
+    def from_preferences(cls, preferences):
+        """users.preferences 문서(또는 세션 값)로 프로필을 만듭니다."""
+        preferences = preferences or {}
+        return cls(
+            allergens=preferences.get('allergens'),
+            vegetarian=preferences.get('vegetarian', False),
+            preferred_categories=preferences.get('preferred_categories')
+        )
+
+    @property
+    def is_empty(self):
+        return not (self.allergen_mask or self.vegetarian or self.category_mask)
+
+    def allowed(self, allergen_bits, non_vegetarian):
+        """후보 음식 배열에 대해 알레르기/채식 조건을 만족하는지 불리언 배열로 반환합니다."""
+        keep = (allergen_bits & self.allergen_mask) == 0
+        if self.vegetarian:
+            keep &= ~non_vegetarian
+        return keep
+
+    def boost(self, category_bits, boost=0.2):
+        """선호 카테고리에 속한 후보의 점수 배율을 반환합니다."""
+        if not self.category_mask:
+            return np.ones(len(category_bits), dtype=np.float32)
+        preferred = (category_bits & self.category_mask) != 0
+        return np.where(preferred, 1.0 + boost, 1.0).astype(np.float32)
+
+    def to_dict(self):
+        """API 응답용 프로필 요약"""
+        return {
+            'allergens': [a for a, bit in ALLERGEN_BITS.items() if self.allergen_mask & bit],
+            'vegetarian': self.vegetarian,
+            'preferred_categories': [c for c, bit in CATEGORY_BITS.items() if self.category_mask & bit]
+        }
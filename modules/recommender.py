@@ -1,25 +1,54 @@
 # modules/recommender.py - 성능 최적화 버전
-import numpy as np
+import os
+import time
+import threading
 import logging
-from functools import lru_cache
 from flask import current_app, g
-from modules.database import get_db
+from pymongo import UpdateOne
+from modules.database import get_db, get_mongo_client
+from modules.food_index import FoodIndex, bump_catalog_version
+from modules.monitoring import record_metric
+from modules.personalization import UserProfile
+from modules.similarity_index import create_similarity_index
+from modules.similarity_snapshot import load_snapshot, save_snapshot
+from modules.similarity import (
+    CRITERIA, TASTE_ATTRIBUTES, FEATURE_PROJECTION, PairwiseSimilarityCache, SimilarityMatrices, extract_ingredients,
+    extract_cooking_methods, pair_similarity
+)
 
 logger = logging.getLogger(__name__)
 
-# 모듈 레벨 변수로 추천 시스템 인스턴스와 MongoDB 클라이언트 저장
+# 모듈 레벨 변수로 추천 시스템 인스턴스 저장
 _recommender_instance = None
-_mongo_client = None
 
 class FoodRecommender:
-    """유사 음식 추천 시스템 클래스 - 성능 최적화 버전"""
+    """유사 음식 추천 시스템 클래스 - 사전 계산된 유사도 행렬 사용
+
+    음식 수가 dense_max_foods 이하이면 기준별 N x N 유사도 행렬을 사용하고,
+    그보다 많으면 행렬 없이 유사도 인덱스(index_backend)로 상위 k개 이웃만 계산해 둡니다.
+    """
     
-    def __init__(self, db):
+    def __init__(self, db, top_k=10, write_batch_size=500, preference_boost=0.2,
+                 index_backend='exact', index_options=None, dense_max_foods=2000,
+                 pair_cache_size=100000, snapshot_dir=None, refresh_interval=30):
         self.db = db
-        self.taste_attributes = ['sweet', 'sour', 'salty', 'bitter', 'umami', 'spicy']
+        self.snapshot_dir = snapshot_dir  # 유사도 행렬 스냅샷 디렉터리 (None이면 사용 안 함)
+        self.refresh_interval = refresh_interval  # 카탈로그 버전 확인 간격(초)
+        self.catalog_version = None  # 현재 행렬이 반영하는 카탈로그 버전
+        self._last_version_check = 0.0
+        self._refresh_lock = threading.RLock()
+        self.index_backend = index_backend  # 'exact'(전수 비교) 또는 'lsh'(근사)
+        self.index_options = index_options or {}
+        self.dense_max_foods = dense_max_foods  # 이 수를 넘으면 N x N 행렬 대신 인덱스 사용
+        self.pair_cache = PairwiseSimilarityCache(pair_cache_size)  # 인덱스 모드의 쌍 유사도 캐시
+        self.top_k = top_k
+        self.preference_boost = preference_boost  # 선호 카테고리 점수 가중치
+        self.write_batch_size = write_batch_size  # similarFoods bulk_write 청크 크기
+        self.taste_attributes = list(TASTE_ATTRIBUTES)
+        self.matrices = None  # SimilarityMatrices
         self.taste_vectors = {}  # 사전 계산된 맛 벡터
         self.ingredient_sets = {}  # 사전 계산된 재료 세트
-        self.cooking_info = {}  # 사전 계산된 조리법 정보
+        self.cooking_info = {}  # 사전 계산된 조리법 세트
         self.initialized = False
         logger.info("음식 추천 시스템 초기화")
     
@@ -27,55 +56,302 @@ class FoodRecommender:
         """추천 시스템 초기화 및 사전 계산"""
         if self.initialized:
             return True
-            
+        return self.refresh()
+    
+    def refresh(self, use_snapshot=True):
+        """음식 데이터를 다시 읽어 유사도 행렬을 새로 계산합니다.
+
+        카탈로그 버전이 같은 스냅샷이 있으면 계산 없이 메모리 맵으로 불러옵니다.
+        """
+        with self._refresh_lock:
+            return self._refresh(use_snapshot)
+    
+    def _refresh(self, use_snapshot):
         try:
-            # 전체 음식 데이터 로드
-            all_foods = list(self.db.foods.find())
-            logger.info(f"총 {len(all_foods)}개 음식 데이터 로드 완료")
-            
-            # 맛 벡터 사전 계산
-            for food in all_foods:
-                food_id = food.get('dishId')
-                if not food_id:
-                    continue
-                    
-                # 맛 벡터 계산
-                taste_data = food.get('taste', {})
-                taste_vector = np.array([taste_data.get(attr, 0) for attr in self.taste_attributes], dtype=np.float32)
-                self.taste_vectors[food_id] = taste_vector
-                
-                # 재료 세트 계산
-                ingredients = food.get('ingredients', [])
-                if ingredients:
-                    self.ingredient_sets[food_id] = set(ingredients)
+            # 음식 데이터보다 먼저 읽어야 그 사이 변경이 있어도 다음 부팅 때 다시 계산됨
+            catalog_version = FoodIndex.get_catalog_version(self.db)
+            matrices = None
+            if self.snapshot_dir and use_snapshot:
+                matrices = load_snapshot(self.snapshot_dir, catalog_version, self.top_k,
+                                         index_factory=self._new_index)
+                if matrices is not None and matrices.dense != (len(matrices) <= self.dense_max_foods):
+                    # 다른 설정으로 저장된 스냅샷은 현재 모드로 다시 계산
+                    matrices = None
+            
+            if matrices is None:
+                # 전체 음식 데이터 로드 (유사도 계산에 필요한 필드만)
+                all_foods = list(self.db.foods.find({}, FEATURE_PROJECTION))
+                logger.info(f"총 {len(all_foods)}개 음식 데이터 로드 완료")
                 
-                # 조리법 정보 저장
-                cooking = food.get('cooking', {})
-                if cooking:
-                    self.cooking_info[food_id] = cooking
-            
-            # 맛 벡터 정규화 (길이가 0이 아닌 경우만)
-            for food_id, vector in self.taste_vectors.items():
-                norm = np.linalg.norm(vector)
-                if norm > 0:
-                    self.taste_vectors[food_id] = vector / norm
-            
+                # 맛/재료/조리법 유사도 및 상위 k개 이웃 계산 (큰 카탈로그는 N x N 행렬 없이 인덱스 사용)
+                search_index = self._new_index() if len(all_foods) > self.dense_max_foods else None
+                matrices = SimilarityMatrices(all_foods, top_k=self.top_k, search_index=search_index)
+                if self.snapshot_dir:
+                    save_snapshot(matrices, self.snapshot_dir, catalog_version)
+            
+            self.matrices = matrices
+            self._sync_feature_dicts()
+            # 카탈로그가 바뀌었으므로 쌍 유사도 캐시를 비움
+            self.pair_cache.invalidate()
+            
+            self.catalog_version = catalog_version
+            self._last_version_check = time.monotonic()
             self.initialized = True
-            logger.info("추천 시스템 데이터 사전 계산 완료")
+            logger.info(f"추천 시스템 데이터 사전 계산 완료 (카탈로그 버전 {catalog_version})")
             return True
         except Exception as e:
             logger.error(f"추천 시스템 초기화 중 오류: {e}")
             return False
     
+    def _new_index(self):
+        """설정된 백엔드로 유사도 인덱스를 만듭니다."""
+        return create_similarity_index(self.index_backend, **self.index_options)
+    
+    def ensure_current(self):
+        """refresh_interval마다 카탈로그 버전을 확인하고, 다른 프로세스의 변경이 있으면 행렬을 다시 불러옵니다."""
+        if not self.initialized:
+            return self.initialize()
+        if time.monotonic() - self._last_version_check < self.refresh_interval:
+            return True
+        
+        # 다른 스레드가 갱신 중이면 기존 행렬로 응답
+        if not self._refresh_lock.acquire(blocking=False):
+            return True
+        try:
+            self._last_version_check = time.monotonic()
+            version = FoodIndex.get_catalog_version(self.db)
+            if version == self.catalog_version:
+                return True
+            logger.info(f"음식 카탈로그 변경 감지 (버전 {self.catalog_version} -> {version}), 추천 시스템 갱신")
+            return self._refresh(use_snapshot=True)
+        except Exception as e:
+            logger.error(f"카탈로그 버전 확인 중 오류: {e}")
+            return False
+        finally:
+            self._refresh_lock.release()
+    
+    def _adopt_catalog_version(self, catalog_version):
+        """이 프로세스의 변경만 반영된 버전이면 현재 버전으로 기록합니다.
+
+        바로 이전 버전에서 한 번만 올라간 경우에만 기록하고, 그 사이 다른 변경이 있었으면
+        다음 요청에서 바로 다시 확인하도록 합니다.
+        """
+        if catalog_version is not None and self.catalog_version is not None \
+                and catalog_version == self.catalog_version + 1:
+            self.catalog_version = catalog_version
+            return True
+        self._last_version_check = 0.0
+        return False
+    
+    def _save_current_snapshot(self):
+        """증분 갱신 결과를 스냅샷으로 저장해 다른 프로세스가 다시 계산하지 않고 불러오게 합니다."""
+        if self.snapshot_dir and self.catalog_version is not None:
+            save_snapshot(self.matrices, self.snapshot_dir, self.catalog_version)
+    
+    def _publish_similar_foods(self, updated_count, in_sync=True):
+        """similarFoods 저장 후 다른 프로세스가 변경을 보도록 버전을 올리고 현재 행렬을 그 버전으로 저장합니다.
+
+        foods 문서가 바뀌었으면 카탈로그 버전을 올려 각 프로세스의 음식 인덱스가 새 similarFoods를 읽게 하고,
+        올린 버전의 스냅샷을 저장해 추천 시스템은 다시 계산하지 않고 불러오게 합니다.
+        """
+        if updated_count > 0:
+            # similarFoods 저장으로 올라간 버전은 이 행렬에 이미 반영되어 있음
+            in_sync = self._adopt_catalog_version(bump_catalog_version(self.db)) and in_sync
+        if in_sync:
+            self._save_current_snapshot()
+    
+    def _sync_feature_dicts(self):
+        """유사도 행렬의 특징 값으로 음식별 사전을 갱신합니다."""
+        self.taste_vectors = {
+            dish_id: self.matrices.taste_vectors[i] for i, dish_id in enumerate(self.matrices.dish_ids)
+        }
+        self.ingredient_sets = dict(zip(self.matrices.dish_ids, self.matrices.ingredient_sets))
+        self.cooking_info = dict(zip(self.matrices.dish_ids, self.matrices.cooking_sets))
+    
+    def add_or_update_food(self, food, catalog_version=None):
+        """음식 하나의 추가/수정을 유사도 행렬에 반영하고 바뀐 similarFoods만 DB에 저장합니다.
+
+        catalog_version은 호출자가 이 변경으로 올린 카탈로그 버전입니다.
+        """
+        with self._refresh_lock:
+            return self._add_or_update_food(food, catalog_version)
+    
+    def _add_or_update_food(self, food, catalog_version):
+        try:
+            if self.matrices is None and not self.initialize():
+                return {"success": False, "error": "추천 시스템이 초기화되지 않았습니다."}
+            
+            in_sync = self._adopt_catalog_version(catalog_version)
+            affected = self.matrices.upsert_food(food)
+            self._sync_feature_dicts()
+            self.pair_cache.invalidate([food.get('dishId')])
+            updated_count = self._write_similar_foods(affected)
+            self._publish_similar_foods(updated_count, in_sync)
+            logger.info(f"음식 {food.get('dishId')} 반영: 이웃 목록 {len(affected)}개 변경, {updated_count}개 문서 업데이트")
+            return {"success": True, "affected_count": len(affected), "updated_count": updated_count}
+        except Exception as e:
+            logger.error(f"음식 추가/수정 반영 중 오류: {e}")
+            # 행렬 상태를 알 수 없으므로 다음 요청에서 다시 불러오게 함
+            self.catalog_version = None
+            return {"success": False, "error": str(e)}
+    
+    def remove_food(self, dish_id, catalog_version=None):
+        """음식 하나의 삭제를 유사도 행렬에 반영하고 바뀐 similarFoods만 DB에 저장합니다.
+
+        catalog_version은 호출자가 이 변경으로 올린 카탈로그 버전입니다.
+        """
+        with self._refresh_lock:
+            return self._remove_food(dish_id, catalog_version)
+    
+    def _remove_food(self, dish_id, catalog_version):
+        try:
+            if self.matrices is None and not self.initialize():
+                return {"success": False, "error": "추천 시스템이 초기화되지 않았습니다."}
+            
+            in_sync = self._adopt_catalog_version(catalog_version)
+            affected = self.matrices.remove_food(dish_id)
+            self._sync_feature_dicts()
+            self.pair_cache.invalidate([dish_id])
+            updated_count = self._write_similar_foods(affected)
+            self._publish_similar_foods(updated_count, in_sync)
+            logger.info(f"음식 {dish_id} 삭제 반영: 이웃 목록 {len(affected)}개 변경, {updated_count}개 문서 업데이트")
+            return {"success": True, "affected_count": len(affected), "updated_count": updated_count}
+        except Exception as e:
+            logger.error(f"음식 삭제 반영 중 오류: {e}")
+            # 행렬 상태를 알 수 없으므로 다음 요청에서 다시 불러오게 함
+            self.catalog_version = None
+            return {"success": False, "error": str(e)}
+    
+    def find_similar(self, food_id, top_n=3):
+        """종합 유사도 상위 이웃으로 추천을 반환합니다. (큰 카탈로그는 유사도 인덱스로 계산한 이웃)"""
+        self.ensure_current()
+        return self._matrix_recommendations(food_id, 'combined', top_n)
+    
+    def _similar_foods_document(self, food_id):
+        """행렬의 상위 k개 이웃으로 similarFoods 필드 값을 만듭니다."""
+        return {
+            'taste': [item for item in self._matrix_recommendations(food_id, 'taste', 5, minimal=True)
+                      if item['similarity'] > 0],
+            'ingredient': [item for item in self._matrix_recommendations(food_id, 'ingredient', 5, minimal=True)
+                           if item['similarity'] > 0],
+            'cooking': self._matrix_recommendations(food_id, 'cooking', 5, minimal=True)
+        }
+    
+    def _write_similar_foods(self, dish_ids):
+        """지정한 음식들의 similarFoods 필드를 청크 단위 bulk_write로 저장하고 변경된 문서 수를 반환합니다.
+
+        청크마다 기존 similarFoods를 한 번에 읽어 값이 같은 문서는 쓰기 대상에서 제외합니다.
+        """
+        dish_ids = [food_id for food_id in dish_ids if food_id in self.matrices.foods]
+        total_modified = 0
+        total_skipped = 0
+        
+        for start in range(0, len(dish_ids), self.write_batch_size):
+            chunk = dish_ids[start:start + self.write_batch_size]
+            started = time.monotonic()
+            
+            # 기존 값 조회 (청크당 1회)
+            stored = {
+                str(doc.get('dishId')): doc.get('similarFoods')
+                for doc in self.db.foods.find(
+                    {"dishId": {"$in": [self.matrices.foods[food_id]['dishId'] for food_id in chunk]}},
+                    {'_id': 0, 'dishId': 1, 'similarFoods': 1}
+                )
+            }
+            
+            requests = []
+            for food_id in chunk:
+                similar_foods = self._similar_foods_document(food_id)
+                if stored.get(food_id) == similar_foods:
+                    total_skipped += 1
+                    continue
+                requests.append(UpdateOne(
+                    {"dishId": self.matrices.foods[food_id]['dishId']},
+                    {"$set": {"similarFoods": similar_foods}}
+                ))
+            
+            if requests:
+                result = self.db.foods.bulk_write(requests, ordered=False)
+                total_modified += result.modified_count
+            
+            latency = time.monotonic() - started
+            record_metric('similar_foods_write_latency', latency, {'operations': len(requests)})
+            logger.debug(f"similarFoods 청크 저장: {len(requests)}/{len(chunk)}개 쓰기, {latency * 1000:.1f}ms")
+        
+        if total_skipped:
+            logger.info(f"similarFoods 변경 없음: {total_skipped}개 문서 건너뜀")
+        return total_modified
+    
+    def _matrix_recommendations(self, food_id, criteria, top_n=3, minimal=False, category=None):
+        """유사도 행렬에서 상위 N개 추천을 조회합니다. (DB 접근 없음)"""
+        if not self.initialized:
+            self.initialize()
+        if self.matrices is None:
+            return []
+        
+        results = []
+        for dish_id, similarity in self.matrices.most_similar(food_id, criteria, top_n):
+            food = self.matrices.foods.get(dish_id)
+            if food is None:
+                # 조회 직후 삭제된 음식
+                continue
+            if minimal:
+                results.append({'dishId': food['dishId'], 'similarity': similarity})
+            else:
+                item = {
+                    'dishId': food['dishId'],
+                    'nameKo': food['nameKo'],
+                    'nameEn': food['nameEn'],
+                    'similarity': similarity
+                }
+                if category:
+                    item['category'] = category
+                results.append(item)
+        return results
+    
+    def _hydrate_similar_items(self, similar_items):
+        """(카테고리, similarFoods 항목) 목록에 음식 이름을 채웁니다.
+
+        메모리의 카탈로그에서 먼저 찾고, 없는 dishId만 한 번의 $in 쿼리로 조회합니다.
+        """
+        catalog = self.matrices.foods if self.matrices is not None else {}
+        missing = {
+            similar['dishId'] for _, similar in similar_items
+            if str(similar['dishId']) not in catalog
+        }
+        fetched = {}
+        if missing:
+            for food in self.db.foods.find(
+                {"dishId": {"$in": list(missing)}},
+                {'_id': 0, 'dishId': 1, 'nameKo': 1, 'nameEn': 1}
+            ):
+                fetched[str(food['dishId'])] = food
+        
+        results = []
+        for category, similar in similar_items:
+            dish_id = str(similar['dishId'])
+            similar_food = catalog.get(dish_id) or fetched.get(dish_id)
+            if similar_food:
+                results.append({
+                    'dishId': similar_food['dishId'],
+                    'nameKo': similar_food.get('nameKo', ''),
+                    'nameEn': similar_food.get('nameEn', ''),
+                    'category': category,
+                    'similarity': similar['similarity']
+                })
+        return results
+    
     def get_food_recommendations(self, food_id, top_n=3):
         """특정 음식과 유사한 음식을 추천합니다."""
         try:
-            # 시스템 초기화 확인
-            if not self.initialized:
-                self.initialize()
-            
-            # 대상 음식 정보 가져오기
-            target_food = self.db.foods.find_one({"dishId": food_id})
+            # 시스템 초기화 및 카탈로그 버전 확인
+            self.ensure_current()
+            
+            # 대상 음식 정보 가져오기 (dishId는 문자열로 저장됨)
+            food_id = str(food_id)
+            target_food = self.db.foods.find_one(
+                {"dishId": food_id}, {'_id': 0, 'dishId': 1, 'similarFoods': 1}
+            )
             if not target_food:
                 logger.warning(f"음식 ID {food_id}에 대한 정보를 찾을 수 없습니다.")
                 return []
@@ -83,80 +359,60 @@ class FoodRecommender:
             # 이미 계산된 유사 음식 정보가 있는지 확인
             if 'similarFoods' in target_food and target_food['similarFoods']:
                 logger.info(f"미리 계산된 유사 음식 정보 사용: {food_id}")
-                similar_foods = []
-                
-                # 카테고리별 추천 통합
+                # 카테고리별 추천 통합 (음식 이름은 한 번에 조회)
                 categories = ['taste', 'ingredient', 'cooking']
-                for category in categories:
-                    if category in target_food['similarFoods']:
-                        for similar in target_food['similarFoods'][category][:top_n]:
-                            similar_food = self.db.foods.find_one({"dishId": similar['dishId']})
-                            if similar_food:
-                                similar_foods.append({
-                                    'dishId': similar_food['dishId'],
-                                    'nameKo': similar_food['nameKo'],
-                                    'nameEn': similar_food['nameEn'],
-                                    'category': category,
-                                    'similarity': similar['similarity']
-                                })
-                
-                return similar_foods
+                similar_items = [
+                    (category, similar)
+                    for category in categories
+                    for similar in target_food['similarFoods'].get(category, [])[:top_n]
+                ]
+                return self._hydrate_similar_items(similar_items)
             
-            # 실시간 계산 (fallback) - 최적화된 계산 사용
-            all_foods = list(self.db.foods.find())
-            similar_foods = []
+            # 실시간 계산 (fallback) - 종합 유사도 이웃 목록 조회
+            return self.find_similar(food_id, top_n)
             
-            # 타겟 음식의 특성 가져오기
-            target_taste_vector = self.taste_vectors.get(food_id)
-            target_ingredients = self.ingredient_sets.get(food_id, set())
+        except Exception as e:
+            logger.error(f"음식 추천 중 오류 발생: {e}")
+            return []
+    
+    def get_personalized_recommendations(self, food_id, preferences, top_n=3):
+        """사용자 선호도(알레르기/채식/선호 카테고리)를 반영한 추천을 반환합니다. (DB 접근 없음)"""
+        try:
+            self.ensure_current()
+            if self.matrices is None:
+                return []
             
-            for food in all_foods:
-                compare_id = food.get('dishId')
-                if not compare_id or compare_id == food_id:
+            profile = UserProfile.from_preferences(preferences)
+            results = []
+            for dish_id, score, similarity in self.matrices.personalized(
+                    food_id, profile, top_n, boost=self.preference_boost):
+                food = self.matrices.foods.get(dish_id)
+                if food is None:
                     continue
-                
-                # 유사도 계산 - 벡터화된 연산 사용
-                taste_similarity = 0.0
-                ingredient_similarity = 0.0
-                
-                # 맛 유사도 (코사인 유사도)
-                if target_taste_vector is not None and compare_id in self.taste_vectors:
-                    # 정규화된 벡터 간의 내적은 코사인 유사도와 동일
-                    taste_similarity = float(np.dot(target_taste_vector, self.taste_vectors[compare_id]))
-                
-                # 재료 유사도 (자카드 유사도)
-                if target_ingredients and compare_id in self.ingredient_sets:
-                    compare_ingredients = self.ingredient_sets[compare_id]
-                    intersection = len(target_ingredients.intersection(compare_ingredients))
-                    union = len(target_ingredients.union(compare_ingredients))
-                    if union > 0:
-                        ingredient_similarity = intersection / union
-                
-                # 종합 유사도 (가중치 적용)
-                similarity = (taste_similarity * 0.7) + (ingredient_similarity * 0.3)
-                
-                similar_foods.append({
+                results.append({
                     'dishId': food['dishId'],
                     'nameKo': food['nameKo'],
                     'nameEn': food['nameEn'],
-                    'similarity': similarity
+                    'category': 'personalized',
+                    'similarity': similarity,
+                    'score': score
                 })
-            
-            # 유사도 기준 정렬 및 상위 N개 선택
-            similar_foods.sort(key=lambda x: x['similarity'], reverse=True)
-            result = similar_foods[:top_n]
-            
-            return result
+            return results
             
         except Exception as e:
-            logger.error(f"음식 추천 중 오류 발생: {e}")
+            logger.error(f"개인화 추천 중 오류 발생: {e}")
             return []
     
     def get_recommendations_by_criteria(self, food_id, criteria, top_n=3):
         """특정 기준에 따른 음식 추천을 반환합니다."""
         try:
-            # 대상 음식 정보 가져오기
-            target_food = self.db.foods.find_one({"dishId": food_id})
+            self.ensure_current()
+            
+            # 대상 음식 정보 가져오기 (dishId는 문자열로 저장됨)
+            food_id = str(food_id)
+            target_food = self.db.foods.find_one(
+                {"dishId": food_id}, {'_id': 0, 'dishId': 1, 'similarFoods': 1}
+            )
             if not target_food:
                 logger.warning(f"음식 ID {food_id}에 대한 정보를 찾을 수 없습니다.")
                 return []
@@ -169,18 +425,8 @@ class FoodRecommender:
                 logger.info(f"미리 계산된 {criteria} 기준 유사 음식 정보 사용: {food_id}")
                 similar_items = target_food['similarFoods'][criteria][:top_n]
                 
-                # 기본 정보 추가
-                result = []
-                for item in similar_items:
-                    similar_food = self.db.foods.find_one({"dishId": item['dishId']})
-                    if similar_food:
-                        result.append({
-                            'dishId': similar_food['dishId'],
-                            'nameKo': similar_food['nameKo'],
-                            'nameEn': similar_food['nameEn'],
-                            'category': criteria,
-                            'similarity': item['similarity']
-                        })
+                # 기본 정보 추가 (음식 이름은 한 번에 조회)
+                result = self._hydrate_similar_items([(criteria, item) for item in similar_items])
                 
                 return result
             
@@ -199,15 +445,9 @@ class FoodRecommender:
             logger.error(f"{criteria} 기준 추천 중 오류 발생: {e}")
             return []
     
-    @lru_cache(maxsize=128)  # 파이썬 내장 메모이제이션 사용
     def _calculate_taste_similarity_cached(self, food1_id, food2_id):
-        """두 음식의 맛 유사도를 계산하는 캐시된 메서드 (ID 기반)"""
-        if food1_id in self.taste_vectors and food2_id in self.taste_vectors:
-            # 사전 계산된 정규화 벡터 사용
-            vec1 = self.taste_vectors[food1_id]
-            vec2 = self.taste_vectors[food2_id]
-            return float(np.dot(vec1, vec2))
-        return 0.0
+        """두 음식의 맛 유사도를 사전 계산된 행렬에서 조회합니다. (ID 기반)"""
+        return self._matrix_pair_similarity('taste', food1_id, food2_id)
     
     def _calculate_taste_similarity(self, taste1, taste2):
         """두 음식의 맛 유사도를 계산합니다. (딕셔너리 기반)"""
@@ -215,97 +455,55 @@ class FoodRecommender:
             if not taste1 or not taste2:
                 return 0.0
             
-            # 맛 벡터 생성
-            vec1 = np.array([taste1.get(attr, 0) for attr in self.taste_attributes], dtype=np.float32)
-            vec2 = np.array([taste2.get(attr, 0) for attr in self.taste_attributes], dtype=np.float32)
-            
-            # 벡터 정규화
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            # 정규화된 벡터
-            vec1_normalized = vec1 / norm1
-            vec2_normalized = vec2 / norm2
-            
-            # 코사인 유사도 계산 (벡터화된 연산)
-            similarity = np.dot(vec1_normalized, vec2_normalized)
-            return float(similarity)
+            # 유사도 행렬과 같은 정의 (코사인 + 맛 프로필 자카드 평균)
+            return pair_similarity({'taste': taste1}, {'taste': taste2}, 'taste')
             
         except Exception as e:
             logger.error(f"맛 유사도 계산 중 오류: {e}")
             return 0.0
     
-    @lru_cache(maxsize=128)
     def _calculate_ingredient_similarity_cached(self, food1_id, food2_id):
-        """두 음식의 재료 유사도를 계산하는 캐시된 메서드 (ID 기반)"""
-        if food1_id in self.ingredient_sets and food2_id in self.ingredient_sets:
-            set1 = self.ingredient_sets[food1_id]
-            set2 = self.ingredient_sets[food2_id]
-            
-            intersection = len(set1.intersection(set2))
-            union = len(set1.union(set2))
-            
-            if union == 0:
-                return 0.0
-            
-            return intersection / union
-        return 0.0
+        """두 음식의 재료 유사도를 사전 계산된 행렬에서 조회합니다. (ID 기반)"""
+        return self._matrix_pair_similarity('ingredient', food1_id, food2_id)
+    
+    def _matrix_pair_similarity(self, criteria, food1_id, food2_id):
+        """두 음식의 유사도를 조회합니다.
+
+        dense 모드는 행렬 값을 바로 읽고, 인덱스 모드는 특징으로 계산하므로 쌍 유사도 캐시를 거칩니다.
+        """
+        matrices = self.matrices
+        if matrices is None:
+            return 0.0
+        if matrices.dense:
+            return matrices.similarity(food1_id, food2_id, criteria)
+        return self.pair_cache.get_or_compute(
+            criteria, food1_id, food2_id,
+            lambda: matrices.similarity(food1_id, food2_id, criteria)
+        )
+    
+    def get_cache_stats(self):
+        """쌍 유사도 캐시 통계를 반환합니다."""
+        return self.pair_cache.get_stats()
     
     def _calculate_ingredient_similarity(self, ingredients1, ingredients2):
-        """두 음식의 재료 유사도를 계산합니다."""
+        """두 음식의 재료 유사도를 계산합니다. (주재료/부재료/양념 통합 자카드)"""
         try:
-            if not ingredients1 or not ingredients2:
-                return 0.0
-            
-            # 자카드 유사도 계산
-            set1 = set(ingredients1)
-            set2 = set(ingredients2)
-            
-            intersection = len(set1.intersection(set2))
-            union = len(set1.union(set2))
-            
-            if union == 0:
-                return 0.0
-            
-            return intersection / union
+            set1 = extract_ingredients({'ingredients': ingredients1})
+            set2 = extract_ingredients({'ingredients': ingredients2})
+            union = len(set1 | set2)
+            return len(set1 & set2) / union if union > 0 else 0.0
             
         except Exception as e:
             logger.error(f"재료 유사도 계산 중 오류: {e}")
             return 0.0
     
     def _calculate_cooking_similarity(self, cooking1, cooking2):
-        """두 음식의 조리법 유사도를 계산합니다."""
+        """두 음식의 조리법 유사도를 계산합니다. (주/보조 조리법 자카드)"""
         try:
-            if not cooking1 or not cooking2:
-                return 0.0
-                
-            # 조리법 카테고리 비교
-            if cooking1.get('category') == cooking2.get('category'):
-                return 1.0
-            
-            # 조리 시간 유사도 계산
-            time1 = cooking1.get('time', 0)
-            time2 = cooking2.get('time', 0)
-            
-            if time1 == 0 or time2 == 0:
-                time_similarity = 0.0
-            else:
-                time_diff = abs(time1 - time2)
-                max_time = max(time1, time2)
-                time_similarity = 1.0 - (time_diff / max_time)
-            
-            # 조리 난이도 유사도 계산
-            difficulty1 = cooking1.get('difficulty', 0)
-            difficulty2 = cooking2.get('difficulty', 0)
-            
-            difficulty_similarity = 1.0 - (abs(difficulty1 - difficulty2) / 5.0)
-            
-            # 종합 유사도 계산
-            similarity = (time_similarity * 0.4) + (difficulty_similarity * 0.6)
-            return similarity
+            set1 = extract_cooking_methods({'cookingMethod': cooking1})
+            set2 = extract_cooking_methods({'cookingMethod': cooking2})
+            union = len(set1 | set2)
+            return len(set1 & set2) / union if union > 0 else 0.0
             
         except Exception as e:
             logger.error(f"조리법 유사도 계산 중 오류: {e}")
@@ -313,48 +511,22 @@ class FoodRecommender:
     
     # batch 계산 방식 추가 (여러 음식 한번에 비교)
     def calculate_batch_similarities(self, target_food_id, food_ids, criteria='taste'):
-        """여러 음식에 대한 유사도를 한번에 계산합니다."""
+        """여러 음식에 대한 유사도를 한번에 계산합니다. (유사도 행렬의 한 행 조회)"""
         try:
-            # 시스템 초기화 확인
-            if not self.initialized:
-                self.initialize()
-            
-            results = {}
-            
-            if criteria == 'taste':
-                # 타겟 음식의 맛 벡터 가져오기
-                if target_food_id not in self.taste_vectors:
-                    return {}
-                
-                target_vector = self.taste_vectors[target_food_id]
-                
-                # 벡터화된 방식으로 한 번에 계산
-                similarities = {}
-                for food_id in food_ids:
-                    if food_id in self.taste_vectors:
-                        similarities[food_id] = float(np.dot(target_vector, self.taste_vectors[food_id]))
-                
-                return similarities
-                
-            elif criteria == 'ingredient':
-                # 타겟 음식의 재료 세트 가져오기
-                if target_food_id not in self.ingredient_sets:
-                    return {}
-                
-                target_ingredients = self.ingredient_sets[target_food_id]
-                
-                # 각 음식에 대해 자카드 유사도 계산
-                similarities = {}
-                for food_id in food_ids:
-                    if food_id in self.ingredient_sets:
-                        # 캐시된 메서드 활용
-                        similarities[food_id] = self._calculate_ingredient_similarity_cached(
-                            target_food_id, food_id
-                        )
-                
-                return similarities
-                
-            return {}
+            # 시스템 초기화 및 카탈로그 버전 확인
+            self.ensure_current()
+            if self.matrices is None or criteria not in CRITERIA:
+                return {}
+            
+            row = self.matrices.similarities(target_food_id, criteria)
+            if row is None:
+                return {}
+            
+            index = self.matrices.index
+            return {
+                food_id: float(row[index[str(food_id)]])
+                for food_id in food_ids if str(food_id) in index
+            }
         except Exception as e:
             logger.error(f"배치 유사도 계산 중 오류: {e}")
             return {}
@@ -362,47 +534,7 @@ class FoodRecommender:
     def _get_taste_recommendations(self, target_food, top_n=3, minimal=False):
         """맛 기준 추천 계산"""
         try:
-            target_taste = target_food.get('taste', {})
-            food_id = target_food['dishId']
-            
-            # 시스템 초기화 확인
-            if not self.initialized:
-                self.initialize()
-            
-            # 맛 벡터가 없으면 DB에서 전체 음식 가져오기
-            all_foods = list(self.db.foods.find())
-            similar_foods = []
-            
-            for food in all_foods:
-                compare_id = food.get('dishId')
-                if not compare_id or compare_id == food_id:
-                    continue
-                
-                # 캐시된 유사도 계산 사용
-                similarity = 0
-                if food_id in self.taste_vectors and compare_id in self.taste_vectors:
-                    similarity = self._calculate_taste_similarity_cached(food_id, compare_id)
-                else:
-                    # 캐시 미스 시 직접 계산
-                    similarity = self._calculate_taste_similarity(target_taste, food.get('taste', {}))
-                
-                if minimal:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'similarity': similarity
-                    })
-                else:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'nameKo': food['nameKo'],
-                        'nameEn': food['nameEn'],
-                        'category': 'taste',
-                        'similarity': similarity
-                    })
-            
-            similar_foods.sort(key=lambda x: x['similarity'], reverse=True)
-            return similar_foods[:top_n]
-            
+            return self._matrix_recommendations(target_food['dishId'], 'taste', top_n, minimal, 'taste')
         except Exception as e:
             logger.error(f"맛 기준 추천 중 오류: {e}")
             return []
@@ -410,47 +542,7 @@ class FoodRecommender:
     def _get_ingredient_recommendations(self, target_food, top_n=3, minimal=False):
         """재료 기준 추천 계산"""
         try:
-            target_ingredients = target_food.get('ingredients', [])
-            food_id = target_food['dishId']
-            
-            # 시스템 초기화 확인
-            if not self.initialized:
-                self.initialize()
-            
-            all_foods = list(self.db.foods.find())
-            similar_foods = []
-            
-            for food in all_foods:
-                compare_id = food.get('dishId')
-                if not compare_id or compare_id == food_id:
-                    continue
-                
-                # 유사도 계산 - 가능하면 캐시 사용
-                similarity = 0
-                if food_id in self.ingredient_sets and compare_id in self.ingredient_sets:
-                    similarity = self._calculate_ingredient_similarity_cached(food_id, compare_id)
-                else:
-                    similarity = self._calculate_ingredient_similarity(
-                        target_ingredients, food.get('ingredients', [])
-                    )
-                
-                if minimal:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'similarity': similarity
-                    })
-                else:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'nameKo': food['nameKo'],
-                        'nameEn': food['nameEn'],
-                        'category': 'ingredient',
-                        'similarity': similarity
-                    })
-            
-            similar_foods.sort(key=lambda x: x['similarity'], reverse=True)
-            return similar_foods[:top_n]
-            
+            return self._matrix_recommendations(target_food['dishId'], 'ingredient', top_n, minimal, 'ingredient')
         except Exception as e:
             logger.error(f"재료 기준 추천 중 오류: {e}")
             return []
@@ -458,110 +550,24 @@ class FoodRecommender:
     def _get_cooking_recommendations(self, target_food, top_n=3, minimal=False):
         """조리법 기준 추천 계산"""
         try:
-            target_cooking = target_food.get('cooking', {})
-            food_id = target_food['dishId']
-            
-            all_foods = list(self.db.foods.find())
-            similar_foods = []
-            
-            for food in all_foods:
-                if food['dishId'] == food_id:
-                    continue  # 자기 자신 제외
-                
-                similarity = self._calculate_cooking_similarity(
-                    target_cooking, food.get('cooking', {})
-                )
-                
-                if minimal:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'similarity': similarity
-                    })
-                else:
-                    similar_foods.append({
-                        'dishId': food['dishId'],
-                        'nameKo': food['nameKo'],
-                        'nameEn': food['nameEn'],
-                        'category': 'cooking',
-                        'similarity': similarity
-                    })
-            
-            similar_foods.sort(key=lambda x: x['similarity'], reverse=True)
-            return similar_foods[:top_n]
-            
+            return self._matrix_recommendations(target_food['dishId'], 'cooking', top_n, minimal, 'cooking')
         except Exception as e:
             logger.error(f"조리법 기준 추천 중 오류: {e}")
             return []
     
     def update_similar_foods_in_db(self):
         """모든 음식의 similarFoods 필드를 업데이트합니다."""
-        # 시스템 초기화 확인
-        if not self.initialized:
-            self.initialize()
-            
         try:
-            all_foods = list(self.db.foods.find())
-            food_ids = [food.get('dishId') for food in all_foods if food.get('dishId')]
-            total_updated = 0
+            # 최신 음식 데이터로 유사도 행렬 재계산
+            if not self.refresh():
+                return {"success": False, "error": "유사도 행렬 계산 실패"}
             
-            # 음식 ID 목록
-            batch_size = 25  # 한 번에 처리할 음식 수
+            # 변경된 문서만 청크 단위로 저장
+            with self._refresh_lock:
+                total_updated = self._write_similar_foods(self.matrices.dish_ids)
+                self._publish_similar_foods(total_updated)
             
-            for i in range(0, len(all_foods), batch_size):
-                batch_foods = all_foods[i:i+batch_size]
-                
-                for target_food in batch_foods:
-                    food_id = target_food.get('dishId')
-                    if not food_id:
-                        continue
-                    
-                    # 맛 기준 유사도 배치 계산
-                    taste_similarities = self.calculate_batch_similarities(
-                        food_id, food_ids, 'taste'
-                    )
-                    
-                    # 재료 기준 유사도 배치 계산
-                    ingredient_similarities = self.calculate_batch_similarities(
-                        food_id, food_ids, 'ingredient'
-                    )
-                    
-                    # 유사도 결과 정렬 및 형식화
-                    taste_results = []
-                    for fid, sim in taste_similarities.items():
-                        if fid != food_id and sim > 0:
-                            taste_results.append({'dishId': fid, 'similarity': sim})
-                    taste_results.sort(key=lambda x: x['similarity'], reverse=True)
-                    
-                    ingredient_results = []
-                    for fid, sim in ingredient_similarities.items():
-                        if fid != food_id and sim > 0:
-                            ingredient_results.append({'dishId': fid, 'similarity': sim})
-                    ingredient_results.sort(key=lambda x: x['similarity'], reverse=True)
-                    
-                    # 조리법 유사도는 기존 방식 사용
-                    cooking_results = self._get_cooking_recommendations(target_food, top_n=5, minimal=True)
-                    
-                    # similarFoods 필드 업데이트
-                    similar_foods = {
-                        'taste': taste_results[:5],
-                        'ingredient': ingredient_results[:5],
-                        'cooking': cooking_results
-                    }
-                    
-                    # DB 업데이트
-                    update_result = self.db.foods.update_one(
-                        {"dishId": food_id},
-                        {"$set": {"similarFoods": similar_foods}}
-                    )
-                    
-                    if update_result.modified_count > 0:
-                        total_updated += 1
-            
-            # 메모이제이션 캐시 정리
-            self._calculate_taste_similarity_cached.cache_clear()
-            self._calculate_ingredient_similarity_cached.cache_clear()
-            
-            logger.info(f"총 {total_updated}/{len(all_foods)}개 음식의 유사 음식 정보가 업데이트되었습니다.")
+            logger.info(f"총 {total_updated}/{len(self.matrices)}개 음식의 유사 음식 정보가 업데이트되었습니다.")
             return {"success": True, "updated_count": total_updated}
             
         except Exception as e:
@@ -569,27 +575,10 @@ class FoodRecommender:
             return {"success": False, "error": str(e)}
 
 def get_fresh_db_connection():
-    """새로운 MongoDB 연결을 생성합니다."""
-    global _mongo_client
-    
-    # 기존 연결이 있다면 먼저 닫기
-    if _mongo_client is not None:
-        try:
-            _mongo_client.close()
-        except Exception as e:
-            logger.warning(f"MongoDB 연결 닫기 중 오류 발생: {e}")
-    
-    # 새 연결 생성
+    """추천 시스템용 데이터베이스를 가져옵니다. (프로세스 공유 MongoClient 사용)"""
     try:
-        from flask import current_app
-        from pymongo import MongoClient
-        
-        mongo_uri = current_app.config['MONGO_URI']
-        db_name = current_app.config['MONGO_DB']
-        
-        _mongo_client = MongoClient(mongo_uri)
-        db = _mongo_client[db_name]
-        logger.info(f"추천 시스템용 MongoDB 연결 생성 성공: {mongo_uri}")
+        db = get_mongo_client()[current_app.config['MONGO_DB']]
+        logger.info("추천 시스템용 MongoDB 연결 준비 완료")
         return db
     except Exception as e:
         logger.error(f"MongoDB 연결 생성 중 오류 발생: {e}")
@@ -625,7 +614,21 @@ def init_recommender(app):
         with app.app_context():
             db = get_fresh_db_connection()
             if db is not None:
-                _recommender_instance = FoodRecommender(db)
+                _recommender_instance = FoodRecommender(
+                    db,
+                    top_k=app.config.get('RECOMMENDER_TOP_K', 10),
+                    write_batch_size=app.config.get('SIMILAR_FOODS_WRITE_BATCH_SIZE', 500),
+                    preference_boost=app.config.get('RECOMMENDER_PREFERENCE_BOOST', 0.2),
+                    index_backend=app.config.get('RECOMMENDER_INDEX_BACKEND', 'exact'),
+                    index_options=app.config.get('RECOMMENDER_INDEX_OPTIONS'),
+                    dense_max_foods=app.config.get('RECOMMENDER_DENSE_MAX_FOODS', 2000),
+                    pair_cache_size=app.config.get('SIMILARITY_CACHE_MAX_ENTRIES', 100000),
+                    snapshot_dir=app.config.get(
+                        'RECOMMENDER_SNAPSHOT_DIR',
+                        os.path.join(app.instance_path, 'recommender_snapshot')
+                    ),
+                    refresh_interval=app.config.get('RECOMMENDER_REFRESH_INTERVAL', 30)
+                )
                 # 초기화 실행
                 _recommender_instance.initialize()
                 logger.info("음식 추천 시스템 초기화 완료")
@@ -0,0 +1,223 @@
+# modules/result_cache.py
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.monitoring import record_metric
+
+logger = logging.getLogger(__name__)
+
+def hamming_distance(hash1, hash2):
+    """두 64비트 해시의 해밍 거리를 계산합니다."""
+    return bin(hash1 ^ hash2).count('1')
+
+class RecognitionResultCache:
+    """업로드 이미지의 내용 해시를 키로 하는 음식 인식 결과 LRU 캐시
+
+    같은 파일은 SHA-256 내용 해시로, 재인코딩/리사이즈된 사진은 선택적으로
+    지각 해시(dHash)의 해밍 거리로 찾습니다. 근사 일치의 경우 박스 좌표를 새 이미지 크기에 맞게 조정합니다.
+    근사 검색은 해시를 max_distance + 1개 구간으로 나눈 색인을 사용하므로
+    (해밍 거리가 max_distance 이하이면 적어도 한 구간은 정확히 일치) 전체 항목을 훑지 않습니다.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """싱글톤 인스턴스 반환"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, max_entries=256, use_perceptual_hash=False, max_distance=4):
+        self.max_entries = max_entries
+        self.use_perceptual_hash = use_perceptual_hash
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # (content_hash, conf_threshold) -> entry
+        self._bands = {}  # (conf_threshold, 구간 번호, 구간 값) -> {항목 키}
+        self._entries_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'near_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    def configure(self, max_entries=None, use_perceptual_hash=None, max_distance=None):
+        """캐시 설정을 변경합니다."""
+        with self._entries_lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if use_perceptual_hash is not None:
+                self.use_perceptual_hash = use_perceptual_hash
+            if max_distance is not None and max_distance != self.max_distance:
+                # 구간 수가 바뀌므로 색인을 다시 만듦
+                self.max_distance = max_distance
+                self._bands = {}
+                for key, entry in self._entries.items():
+                    self._index(key, entry)
+            self._evict()
+
+    def _band_keys(self, perceptual_hash, conf_threshold):
+        """64비트 해시를 max_distance + 1개 구간으로 나눈 색인 키 목록을 반환합니다."""
+        n_bands = min(self.max_distance + 1, 64)
+        bounds = [i * 64 // n_bands for i in range(n_bands + 1)]
+        return [
+            (conf_threshold, i, (perceptual_hash >> start) & ((1 << (end - start)) - 1))
+            for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+        ]
+
+    def _index(self, key, entry):
+        """항목을 지각 해시 색인에 추가합니다. (락을 잡은 상태에서 호출)"""
+        if entry['perceptual_hash'] is None:
+            return
+        for band_key in self._band_keys(entry['perceptual_hash'], key[1]):
+            self._bands.setdefault(band_key, set()).add(key)
+
+    def _unindex(self, key, entry):
+        """항목을 지각 해시 색인에서 제거합니다. (락을 잡은 상태에서 호출)"""
+        if entry['perceptual_hash'] is None:
+            return
+        for band_key in self._band_keys(entry['perceptual_hash'], key[1]):
+            keys = self._bands.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band_key]
+
+    def _evict(self):
+        """최대 크기를 넘는 가장 오래된 항목을 제거합니다. (락을 잡은 상태에서 호출)"""
+        while len(self._entries) > self.max_entries:
+            key, entry = self._entries.popitem(last=False)
+            self._unindex(key, entry)
+            self.stats['evictions'] += 1
+
+    def _find_near_duplicate(self, image, conf_threshold):
+        """지각 해시가 가까운 항목을 찾습니다. (락을 잡은 상태에서 호출)"""
+        target = image.perceptual_hash
+        candidates = set()
+        for band_key in self._band_keys(target, conf_threshold):
+            candidates.update(self._bands.get(band_key, ()))
+
+        best_key, best_distance = None, self.max_distance + 1
+        for key in candidates:
+            distance = hamming_distance(target, self._entries[key]['perceptual_hash'])
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def get(self, image, conf_threshold=0.25):
+        """이미지에 대한 캐시된 인식 결과를 반환합니다. 없으면 None.
+
+        반환값: {'boxes', 'scores', 'class_ids', 'exact'}
+        """
+        with self._entries_lock:
+            key = (image.content_hash, conf_threshold)
+            entry = self._entries.get(key)
+            exact = entry is not None
+
+            if entry is None and self.use_perceptual_hash and self._bands:
+                near_key = self._find_near_duplicate(image, conf_threshold)
+                if near_key is not None:
+                    key, entry = near_key, self._entries[near_key]
+
+            if entry is None:
+                self.stats['misses'] += 1
+                record_metric('result_cache_hit', 0)
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits' if exact else 'near_hits'] += 1
+
+        record_metric('result_cache_hit', 1, {'exact': exact})
+
+        boxes = entry['boxes']
+        if not exact and entry['shape'] != (image.height, image.width) and len(boxes) > 0:
+            # 리사이즈된 이미지인 경우 박스 좌표를 새 크기로 변환
+            scale_y = image.height / entry['shape'][0]
+            scale_x = image.width / entry['shape'][1]
+            boxes = boxes * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+
+        # 호출자가 결과를 수정해도 캐시 항목이 바뀌지 않도록 복사본 반환
+        return {
+            'boxes': boxes.copy() if boxes is entry['boxes'] else boxes,
+            'scores': entry['scores'].copy(),
+            'class_ids': entry['class_ids'].copy(),
+            'exact': exact
+        }
+
+    def put(self, image, boxes, scores, class_ids, conf_threshold=0.25):
+        """인식 결과를 캐시에 저장합니다."""
+        entry = {
+            'boxes': np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+            'scores': np.asarray(scores, dtype=np.float32).reshape(-1),
+            'class_ids': np.asarray(class_ids, dtype=int).reshape(-1),
+            'shape': (image.height, image.width),
+            'perceptual_hash': image.perceptual_hash if self.use_perceptual_hash else None,
+            'overlay': None  # (카탈로그 버전, 오버레이 이미지 경로)
+        }
+        with self._entries_lock:
+            key = (image.content_hash, conf_threshold)
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._unindex(key, previous)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._index(key, entry)
+            self._evict()
+
+    def get_overlay(self, image, conf_threshold=0.25, catalog_version=None):
+        """같은 이미지, 신뢰도 임계값, 음식 카탈로그 버전으로 이미 생성된 오버레이 이미지 경로를 반환합니다.
+
+        오버레이에는 음식 정보(이름, 알레르기 등)가 그려지므로 카탈로그가 바뀌면 다시 생성해야 합니다.
+        """
+        with self._entries_lock:
+            entry = self._entries.get((image.content_hash, conf_threshold))
+            overlay = entry['overlay'] if entry else None
+        if overlay is None or overlay[0] != catalog_version:
+            return None
+        if os.path.exists(overlay[1]):
+            return overlay[1]
+        return None
+
+    def set_overlay(self, image, overlay_image_path, conf_threshold=0.25, catalog_version=None):
+        """이미지의 오버레이 이미지 경로를 생성에 사용한 카탈로그 버전과 함께 저장합니다."""
+        with self._entries_lock:
+            entry = self._entries.get((image.content_hash, conf_threshold))
+            if entry is not None:
+                entry['overlay'] = (catalog_version, overlay_image_path)
+
+    def get_stats(self):
+        """캐시 통계를 반환합니다."""
+        with self._entries_lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['near_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['near_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """캐시를 비웁니다."""
+        with self._entries_lock:
+            self._entries.clear()
+            self._bands.clear()
+
+# 결과 캐시 인스턴스 생성
+result_cache = RecognitionResultCache.get_instance()
+
+def init_result_cache(app):
+    """앱 설정으로 결과 캐시를 초기화합니다."""
+    result_cache.configure(
+        max_entries=app.config.get('RESULT_CACHE_SIZE', 256),
+        use_perceptual_hash=app.config.get('RESULT_CACHE_PERCEPTUAL_HASH', False),
+        max_distance=app.config.get('RESULT_CACHE_MAX_DISTANCE', 4)
+    )
+    logger.info(f"인식 결과 캐시 초기화: 최대 {result_cache.max_entries}개 항목")
+    return result_cache
@@ -0,0 +1,877 @@
+# modules/similarity.py
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.monitoring import record_metric
+from modules.personalization import encode_food_profile
+from modules.similarity_index import create_similarity_index
+
+logger = logging.getLogger(__name__)
+
+# 음식 메타데이터의 맛 속성 (0~5 점수)
+TASTE_ATTRIBUTES = ('spiciness', 'sweetness', 'saltiness', 'sourness', 'umami')
+INGREDIENT_CATEGORIES = ('main', 'sub', 'sauce')
+
+# 종합 유사도 가중치
+COMBINED_WEIGHTS = {'taste': 0.7, 'ingredient': 0.3}
+# 맛/재료/조리법/지역을 모두 반영한 전체 유사도 가중치 (utils.recommendation)
+OVERALL_WEIGHTS = {'taste': 0.4, 'ingredient': 0.3, 'cooking': 0.2, 'region': 0.1}
+
+CRITERIA = ('taste', 'ingredient', 'cooking', 'region', 'combined')
+
+# 인덱스 모드에서 전수 비교로 이웃을 계산할 때 한 번에 처리하는 행 수 (메모리 O(블록 x 음식 수))
+NEIGHBOR_BLOCK_ROWS = 256
+
+# 집합형 특징 (이진 행렬로 저장)
+SET_FEATURES = ('ingredient', 'cooking', 'taste_profile', 'region_popular')
+
+# 특징 계산에 필요한 foods 컬렉션 필드
+FEATURE_PROJECTION = {
+    '_id': 0, 'dishId': 1, 'nameKo': 1, 'nameEn': 1,
+    'taste': 1, 'ingredients': 1, 'cookingMethod': 1, 'region': 1,
+    'allergens': 1, 'vegetarianStatus': 1, 'className': 1, 'preferenceCategories': 1
+}
+
+def extract_taste_vector(food):
+    """음식의 맛 점수 벡터를 반환합니다."""
+    taste = food.get('taste') or {}
+    return [float(taste.get(attr, 0) or 0) for attr in TASTE_ATTRIBUTES]
+
+def extract_ingredients(food):
+    """음식의 주재료/부재료/양념을 하나의 집합으로 반환합니다."""
+    ingredients = food.get('ingredients') or {}
+    if isinstance(ingredients, dict):
+        result = set()
+        for category in INGREDIENT_CATEGORIES:
+            result.update(ingredients.get(category) or [])
+        return result
+    return set(ingredients)
+
+def extract_cooking_methods(food):
+    """음식의 주/보조 조리법을 하나의 집합으로 반환합니다."""
+    cooking = food.get('cookingMethod') or {}
+    methods = set(cooking.get('secondary') or [])
+    if cooking.get('primary'):
+        methods.add(cooking['primary'])
+    return methods
+
+def extract_taste_profile(food):
+    """음식의 맛 프로필 태그 집합을 반환합니다."""
+    taste = food.get('taste') or {}
+    return set(taste.get('profile') or [])
+
+def extract_region(food):
+    """음식의 지역 정보를 (지역 정보 유무, 발상지, 전통음식 여부, 인기 지역 집합)으로 반환합니다."""
+    region = food.get('region') or {}
+    return bool(region), region.get('origin'), region.get('traditional'), set(region.get('popular') or [])
+
+def normalize_rows(matrix):
+    """각 행을 L2 정규화합니다. (영벡터는 그대로 유지)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+def build_incidence_matrix(item_sets):
+    """항목 집합 목록으로 (음식 수 x 어휘 수) 이진 행렬과 어휘 사전을 만듭니다."""
+    vocabulary = {}
+    for items in item_sets:
+        for item in items:
+            vocabulary.setdefault(item, len(vocabulary))
+
+    matrix = np.zeros((len(item_sets), len(vocabulary)), dtype=np.float32)
+    for row, items in enumerate(item_sets):
+        if items:
+            matrix[row, [vocabulary[item] for item in items]] = 1.0
+    return matrix, vocabulary
+
+def cosine_matrix(vectors_a, vectors_b=None):
+    """정규화된 벡터 간 코사인 유사도 행렬을 계산합니다."""
+    vectors_b = vectors_a if vectors_b is None else vectors_b
+    return (vectors_a @ vectors_b.T).astype(np.float32)
+
+def jaccard_matrix(incidence_a, incidence_b=None):
+    """이진 행렬 행 간의 자카드 유사도 행렬을 계산합니다."""
+    incidence_b = incidence_a if incidence_b is None else incidence_b
+    intersection = incidence_a @ incidence_b.T
+    sizes_a = incidence_a.sum(axis=1)
+    sizes_b = incidence_b.sum(axis=1)
+    union = sizes_a[:, None] + sizes_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0).astype(np.float32)
+
+def top_k_indices(matrix, k):
+    """각 행에서 유사도가 높은 k개의 열 인덱스를 내림차순으로 반환합니다. (자기 자신 제외)"""
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+
+    scores = matrix.copy()
+    np.fill_diagonal(scores, -np.inf)
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+def top_k_row(row, self_index, k):
+    """한 행에서 유사도가 높은 k개의 열 인덱스를 내림차순으로 반환합니다. (self_index 제외)"""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    scores = row.copy()
+    scores[self_index] = -np.inf
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def select_top_k(candidates, scores, k, width):
+    """후보와 점수에서 상위 k개를 골라 width 길이의 (인덱스, 점수) 배열로 반환합니다. (빈 자리는 -1, -inf)"""
+    indices = np.full(width, -1, dtype=np.int64)
+    top_scores = np.full(width, -np.inf, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k > 0:
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        indices[:k] = candidates[top]
+        top_scores[:k] = scores[top]
+    return indices, top_scores
+
+class FoodFeatures:
+    """음식별 특징(맛 벡터, 재료/조리법/맛 프로필/지역 집합, 개인화 비트마스크)을 담는 행 단위 버퍼
+
+    행 용량을 두어 음식 추가 시 재할당을 줄이며, 두 추천 시스템이 같은 특징과 유사도 계산을 공유합니다.
+    """
+
+    def __init__(self, capacity=0):
+        self.taste = np.zeros((capacity, len(TASTE_ATTRIBUTES)), dtype=np.float32)
+        self.incidence = {name: np.zeros((capacity, 0), dtype=np.float32) for name in SET_FEATURES}
+        self.vocabularies = {name: {} for name in SET_FEATURES}
+        # (지역 정보 유무, 발상지 코드, 전통음식 여부 코드)
+        self.region = np.zeros((capacity, 3), dtype=np.int64)
+        self.region_codes = {'origin': {}, 'traditional': {}}
+        # 개인화 필터용 (알레르기 비트, 카테고리 비트, 비채식 여부)
+        self.profiles = np.zeros((capacity, 3), dtype=np.int64)
+        self.sets = {'ingredient': [], 'cooking': []}
+
+    @classmethod
+    def from_foods(cls, foods):
+        """음식 문서 목록으로 특징 버퍼를 만듭니다."""
+        features = cls(len(foods))
+        for row, food in enumerate(foods):
+            features.set_row(row, food)
+        return features
+
+    def get_state(self, n):
+        """앞의 n개 행의 특징을 (메타데이터, 배열 사전)으로 반환합니다. (스냅샷 저장용)"""
+        arrays = {
+            'taste': self.taste[:n],
+            'region': self.region[:n],
+            'profiles': self.profiles[:n]
+        }
+        for name in SET_FEATURES:
+            arrays[f'incidence_{name}'] = self.incidence[name][:n, :len(self.vocabularies[name])]
+        meta = {
+            'vocabularies': {name: list(vocabulary) for name, vocabulary in self.vocabularies.items()},
+            'region_codes': {name: list(codes) for name, codes in self.region_codes.items()}
+        }
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """get_state()로 저장한 특징을 복원합니다. 배열은 복사하지 않고 그대로 사용합니다."""
+        features = cls(0)
+        features.taste = arrays['taste']
+        features.region = arrays['region']
+        features.profiles = arrays['profiles']
+        for name in SET_FEATURES:
+            features.incidence[name] = arrays[f'incidence_{name}']
+            features.vocabularies[name] = {item: i for i, item in enumerate(meta['vocabularies'][name])}
+        features.region_codes = {
+            name: {value: i for i, value in enumerate(values)} for name, values in meta['region_codes'].items()
+        }
+        # 재료/조리법 집합은 이진 행렬에서 다시 만듦
+        for name in features.sets:
+            items = meta['vocabularies'][name]
+            features.sets[name] = [{items[j] for j in np.flatnonzero(row)} for row in features.incidence[name]]
+        return features
+
+    @property
+    def capacity(self):
+        return self.taste.shape[0]
+
+    def ensure_capacity(self, n):
+        """행 용량이 n 이상이 되도록 (두 배씩) 늘립니다. 늘렸으면 새 용량, 아니면 None을 반환합니다."""
+        if n <= self.capacity:
+            return None
+        capacity = max(n, self.capacity * 2, 8)
+        self.taste = _grow(self.taste, (capacity, self.taste.shape[1]))
+        self.incidence = {name: _grow(m, (capacity, m.shape[1])) for name, m in self.incidence.items()}
+        self.region = _grow(self.region, (capacity, 3))
+        self.profiles = _grow(self.profiles, (capacity, 3))
+        return capacity
+
+    def _set_items(self, name, row, items):
+        """이진 행렬의 한 행을 설정합니다. 새 어휘가 있으면 열을 늘립니다."""
+        vocabulary = self.vocabularies[name]
+        for item in items:
+            vocabulary.setdefault(item, len(vocabulary))
+        matrix = self.incidence[name]
+        if len(vocabulary) > matrix.shape[1]:
+            matrix = _grow(matrix, (matrix.shape[0], max(len(vocabulary), matrix.shape[1] * 2)))
+            self.incidence[name] = matrix
+        matrix[row] = 0.0
+        if items:
+            matrix[row, [vocabulary[item] for item in items]] = 1.0
+
+    @staticmethod
+    def _code(codes, value):
+        return codes.setdefault(value, len(codes))
+
+    def set_row(self, row, food):
+        """row번째 행에 음식의 특징을 기록합니다."""
+        for sets in self.sets.values():
+            sets.extend(set() for _ in range(row + 1 - len(sets)))
+        self.taste[row] = normalize_rows(np.array([extract_taste_vector(food)], dtype=np.float32))[0]
+        self.sets['ingredient'][row] = extract_ingredients(food)
+        self.sets['cooking'][row] = extract_cooking_methods(food)
+        has_region, origin, traditional, popular = extract_region(food)
+        self._set_items('ingredient', row, self.sets['ingredient'][row])
+        self._set_items('cooking', row, self.sets['cooking'][row])
+        self._set_items('taste_profile', row, extract_taste_profile(food))
+        self._set_items('region_popular', row, popular)
+        self.region[row] = (
+            has_region,
+            self._code(self.region_codes['origin'], origin),
+            self._code(self.region_codes['traditional'], traditional)
+        )
+        self.profiles[row] = encode_food_profile(food)
+
+    def move_row(self, source, target):
+        """source 행의 특징을 target 행으로 복사합니다. (삭제 시 마지막 행 이동)"""
+        self.taste[target] = self.taste[source]
+        for matrix in self.incidence.values():
+            matrix[target] = matrix[source]
+        self.region[target] = self.region[source]
+        self.profiles[target] = self.profiles[source]
+        for sets in self.sets.values():
+            sets[target] = sets[source]
+
+    def truncate(self, n):
+        """집합 목록을 n개 행으로 줄입니다."""
+        for sets in self.sets.values():
+            del sets[n:]
+
+    def similarity_rows(self, rows, n, columns=None):
+        """rows 행과 앞의 n개 행(columns를 주면 해당 행들) 사이의 기준별 유사도 블록을 계산합니다.
+
+        맛은 코사인 유사도이며 두 음식 모두 맛 프로필 태그가 있으면 태그 자카드와 평균합니다.
+        지역은 발상지 일치 0.5, 인기 지역 자카드 0.3, 전통음식 여부 일치 0.2의 합입니다.
+        """
+        cols = slice(0, n) if columns is None else columns
+        profile = self.incidence['taste_profile']
+        has_profile_a = profile[rows].sum(axis=1) > 0
+        has_profile_b = profile[cols].sum(axis=1) > 0
+        cosine = cosine_matrix(self.taste[rows], self.taste[cols])
+        both_profiles = has_profile_a[:, None] & has_profile_b[None, :]
+        taste = np.where(both_profiles, (cosine + jaccard_matrix(profile[rows], profile[cols])) / 2, cosine)
+
+        region_a, region_b = self.region[rows], self.region[cols]
+        both_regions = (region_a[:, 0][:, None] & region_b[:, 0][None, :]).astype(bool)
+        region = (
+            0.5 * (region_a[:, 1][:, None] == region_b[:, 1][None, :])
+            + 0.3 * jaccard_matrix(self.incidence['region_popular'][rows], self.incidence['region_popular'][cols])
+            + 0.2 * (region_a[:, 2][:, None] == region_b[:, 2][None, :])
+        )
+        region = np.where(both_regions, np.minimum(region, 1.0), 0.0)
+
+        blocks = {
+            'taste': taste.astype(np.float32),
+            'ingredient': jaccard_matrix(self.incidence['ingredient'][rows], self.incidence['ingredient'][cols]),
+            'cooking': jaccard_matrix(self.incidence['cooking'][rows], self.incidence['cooking'][cols]),
+            'region': region.astype(np.float32)
+        }
+        blocks['combined'] = weighted_sum(blocks, COMBINED_WEIGHTS)
+        return blocks
+
+    def embeddings(self, n, rows=None):
+        """맛/재료를 종합 유사도 가중치로 결합한 임베딩을 반환합니다. (내적 = 0.7 x 맛 코사인 + 0.3 x 재료 코사인)
+
+        rows를 주면 해당 행들만, 없으면 앞의 n개 행을 계산합니다.
+        """
+        rows = slice(0, n) if rows is None else rows
+        return np.hstack([
+            np.sqrt(COMBINED_WEIGHTS['taste']) * self.taste[rows],
+            np.sqrt(COMBINED_WEIGHTS['ingredient']) * normalize_rows(self.incidence['ingredient'][rows])
+        ]).astype(np.float32)
+
+def _grow(array, shape):
+    """배열을 shape 크기로 늘리고 기존 값을 복사합니다."""
+    grown = np.zeros(shape, dtype=array.dtype)
+    grown[tuple(slice(0, d) for d in array.shape)] = array
+    return grown
+
+def weighted_sum(matrices, weights):
+    """기준별 유사도에 가중치를 적용해 합산합니다."""
+    return sum(weight * matrices[criteria] for criteria, weight in weights.items()).astype(np.float32)
+
+def pair_similarity(food1, food2, criteria):
+    """두 음식 문서의 유사도를 계산합니다. (행렬 계산과 같은 정의)"""
+    features = FoodFeatures.from_foods([food1, food2])
+    if criteria == 'overall':
+        blocks = features.similarity_rows(np.array([0]), 2)
+        return float(weighted_sum(blocks, OVERALL_WEIGHTS)[0, 1])
+    return float(features.similarity_rows(np.array([0]), 2)[criteria][0, 1])
+
+
+class PairwiseSimilarityCache:
+    """음식 쌍 유사도의 LRU 캐시 (추천 시스템 인스턴스가 소유)
+
+    인덱스 모드에서는 쌍 유사도마다 특징으로 계산하므로 자주 조회되는 쌍을 저장합니다.
+    (a, b)와 (b, a)를 같은 키로 저장하고, 음식별 키 목록을 두어 변경된 음식의 항목만 바로 제거합니다.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_dish = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def make_key(criteria, dish_id1, dish_id2):
+        """순서와 무관한 (기준, 음식1, 음식2) 키를 만듭니다."""
+        dish_id1, dish_id2 = str(dish_id1), str(dish_id2)
+        if dish_id2 < dish_id1:
+            dish_id1, dish_id2 = dish_id2, dish_id1
+        return (criteria, dish_id1, dish_id2)
+
+    def _discard(self, key):
+        """항목과 음식별 키 목록에서 키를 제거합니다. (락을 잡은 상태에서 호출)"""
+        self._entries.pop(key, None)
+        for dish_id in key[1:]:
+            keys = self._keys_by_dish.get(dish_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_dish[dish_id]
+
+    def get_or_compute(self, criteria, dish_id1, dish_id2, compute):
+        """캐시된 유사도를 반환하고, 없으면 compute()로 계산해 저장합니다."""
+        key = self.make_key(criteria, dish_id1, dish_id2)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+        if value is not None:
+            record_metric('similarity_cache_hit', 1, {'criteria': criteria})
+            return value
+
+        value = compute()
+        with self._lock:
+            self.stats['misses'] += 1
+            if self.max_entries > 0:
+                self._entries[key] = value
+                for dish_id in key[1:]:
+                    self._keys_by_dish.setdefault(dish_id, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    self._discard(next(iter(self._entries)))
+                    self.stats['evictions'] += 1
+        record_metric('similarity_cache_hit', 0, {'criteria': criteria})
+        return value
+
+    def invalidate(self, dish_ids=None):
+        """지정한 음식이 포함된 항목을 제거합니다. dish_ids가 없으면 전체를 비웁니다."""
+        with self._lock:
+            if dish_ids is None:
+                self._entries.clear()
+                self._keys_by_dish.clear()
+            else:
+                for dish_id in dish_ids:
+                    for key in list(self._keys_by_dish.get(str(dish_id), ())):
+                        self._discard(key)
+            self.stats['invalidations'] += 1
+
+    def get_stats(self):
+        """캐시 통계를 반환합니다."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        record_metric('similarity_cache_hit_rate', stats['hit_rate'])
+        return stats
+
+class SimilarityMatrices:
+    """음식 카탈로그 전체의 기준별 유사도와 상위 k개 이웃
+
+    search_index가 없으면(dense) 기준별 N x N 유사도 행렬을 한 번 계산해 두고 추천은 배열 조회만으로 처리합니다.
+    search_index(SimilarityIndex)를 주면 N x N 행렬을 만들지 않고, 인덱스가 고른 후보를 정확한 유사도로
+    다시 점수 매긴 상위 k개 이웃과 점수만 저장합니다. 나머지 조회는 필요한 행만 특징에서 계산합니다.
+    음식 하나가 추가/수정/삭제되면 해당 행과 열, 영향을 받는 이웃 목록만 갱신합니다.
+    갱신은 배열을 제자리에서 바꾸므로 조회와 갱신은 같은 잠금 안에서 실행하고, 조회 결과는 복사본으로 반환합니다.
+    """
+
+    def __init__(self, foods, top_k=10, search_index=None):
+        self._lock = threading.RLock()
+        self.top_k = top_k
+        self.dish_ids = []
+        self.index = {}
+        self.foods = {}  # dishId -> 기본 정보 (dishId, nameKo, nameEn)
+        feature_foods = []
+        for food in foods:
+            dish_id = food.get('dishId')
+            if dish_id is None or str(dish_id) in self.foods:
+                continue
+            self._register(food)
+            feature_foods.append(food)
+        n = len(self.dish_ids)
+
+        self.features = FoodFeatures.from_foods(feature_foods)
+        self.search_index = search_index
+        self._size = n
+        self._k = min(top_k, n - 1) if n > 0 else 0
+        self._neighbors = {criteria: np.full((n, top_k), -1, dtype=np.int64) for criteria in CRITERIA}
+
+        if search_index is None:
+            # 기준별 유사도 행렬과 행별 상위 k개 이웃
+            self._similarity = self.features.similarity_rows(np.arange(n), n)
+            self._neighbor_scores = None
+            for criteria, matrix in self._similarity.items():
+                self._neighbors[criteria][:, :self._k] = top_k_indices(matrix, self._k)
+        else:
+            self._similarity = None
+            self._neighbor_scores = {
+                criteria: np.full((n, top_k), -np.inf, dtype=np.float32) for criteria in CRITERIA
+            }
+            search_index.build(self.features.embeddings(n))
+            self._compute_neighbors(np.arange(n))
+        self._sync_views()
+        mode = '유사도 행렬' if self.dense else f'{type(search_index).__name__} 이웃'
+        logger.info(f"{mode} 계산 완료: {n}개 음식, 상위 {top_k}개 이웃")
+
+    @property
+    def dense(self):
+        """N x N 유사도 행렬을 보관하는지 여부"""
+        return self._similarity is not None
+
+    def get_state(self):
+        """유사도 행렬(또는 이웃 점수)과 이웃 목록, 특징을 (메타데이터, 배열 사전)으로 반환합니다. (스냅샷 저장용)
+
+        배열은 내부 버퍼의 뷰이므로 다 쓸 때까지 lock을 잡고 있어야 합니다.
+        """
+        with self._lock:
+            n = self._size
+            meta, arrays = self.features.get_state(n)
+            meta.update({
+                'top_k': self.top_k,
+                'k': self._k,
+                'size': n,
+                'dense': self.dense,
+                'dish_ids': list(self.dish_ids),
+                'foods': [self.foods[dish_id] for dish_id in self.dish_ids]
+            })
+            for criteria in CRITERIA:
+                if self.dense:
+                    arrays[f'similarity_{criteria}'] = self._similarity[criteria][:n, :n]
+                else:
+                    arrays[f'neighbor_scores_{criteria}'] = self._neighbor_scores[criteria][:n]
+                arrays[f'neighbors_{criteria}'] = self._neighbors[criteria][:n]
+            return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays, index_factory=None):
+        """get_state()로 저장한 상태를 다시 계산 없이 복원합니다. (배열은 메모리 맵 그대로 사용 가능)
+
+        인덱스 모드 상태는 index_factory()로 만든 인덱스를 저장된 특징의 임베딩으로 다시 구축합니다.
+        """
+        matrices = cls.__new__(cls)
+        matrices._lock = threading.RLock()
+        matrices.top_k = meta['top_k']
+        matrices.dish_ids = list(meta['dish_ids'])
+        matrices.index = {dish_id: i for i, dish_id in enumerate(matrices.dish_ids)}
+        matrices.foods = dict(zip(matrices.dish_ids, meta['foods']))
+        matrices.features = FoodFeatures.from_state(meta, arrays)
+        matrices._neighbors = {criteria: arrays[f'neighbors_{criteria}'] for criteria in CRITERIA}
+        matrices._size = meta['size']
+        matrices._k = meta['k']
+        if meta['dense']:
+            matrices.search_index = None
+            matrices._similarity = {criteria: arrays[f'similarity_{criteria}'] for criteria in CRITERIA}
+            matrices._neighbor_scores = None
+        else:
+            matrices.search_index = (index_factory or create_similarity_index)()
+            matrices.search_index.build(matrices.features.embeddings(matrices._size))
+            matrices._similarity = None
+            matrices._neighbor_scores = {criteria: arrays[f'neighbor_scores_{criteria}'] for criteria in CRITERIA}
+        matrices._sync_views()
+        return matrices
+
+    @property
+    def lock(self):
+        """조회/갱신과 스냅샷 저장이 함께 사용하는 잠금"""
+        return self._lock
+
+    def _register(self, food):
+        """음식 ID와 기본 정보를 등록하고 행 인덱스를 반환합니다."""
+        dish_id = str(food.get('dishId'))
+        if dish_id not in self.index:
+            self.index[dish_id] = len(self.dish_ids)
+            self.dish_ids.append(dish_id)
+        self.foods[dish_id] = {
+            'dishId': food.get('dishId'),
+            'nameKo': food.get('nameKo', ''),
+            'nameEn': food.get('nameEn', '')
+        }
+        return self.index[dish_id]
+
+    def _sync_views(self):
+        """현재 음식 수에 맞는 행렬 뷰를 갱신합니다. (matrices는 dense 모드에서만 채워짐)"""
+        n = self._size
+        features = self.features
+        self.taste_vectors = features.taste[:n]
+        self.ingredient_matrix = features.incidence['ingredient'][:n]
+        self.cooking_matrix = features.incidence['cooking'][:n]
+        self.ingredient_vocabulary = features.vocabularies['ingredient']
+        self.cooking_vocabulary = features.vocabularies['cooking']
+        self.ingredient_sets = features.sets['ingredient']
+        self.cooking_sets = features.sets['cooking']
+        self.profiles = features.profiles[:n]
+        self.matrices = {
+            criteria: matrix[:n, :n] for criteria, matrix in self._similarity.items()
+        } if self.dense else {}
+        self.neighbors = {criteria: neighbors[:n, :self._k] for criteria, neighbors in self._neighbors.items()}
+
+    def _ensure_capacity(self, n):
+        """행렬 용량이 n개 음식 이상이 되도록 (두 배씩) 늘립니다."""
+        capacity = self.features.ensure_capacity(n)
+        if capacity is None:
+            return
+        for criteria in CRITERIA:
+            if self.dense:
+                self._similarity[criteria] = _grow(self._similarity[criteria], (capacity, capacity))
+            else:
+                self._neighbor_scores[criteria] = _grow(self._neighbor_scores[criteria], (capacity, self.top_k))
+            self._neighbors[criteria] = _grow(self._neighbors[criteria], (capacity, self.top_k))
+
+    def _similarity_row(self, i, criteria, columns=None):
+        """i번째 음식과 앞의 n개 음식(columns를 주면 해당 음식들) 사이의 유사도 행을 반환합니다.
+
+        dense 모드는 행렬의 뷰, 인덱스 모드는 특징으로 계산한 새 배열입니다.
+        """
+        if self.dense:
+            row = self.matrices[criteria][i]
+            return row if columns is None else row[columns]
+        return self.features.similarity_rows(np.array([i]), self._size, columns)[criteria][0]
+
+    def _compute_neighbors(self, rows):
+        """인덱스 모드에서 rows 행의 기준별 상위 k개 이웃과 점수를 계산합니다.
+
+        전수 비교 인덱스는 행 블록 단위로 모든 음식과 비교하고, 근사 인덱스는 각 행의 후보만 정확한 유사도로 비교합니다.
+        """
+        n, k = self._size, self._k
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+
+        if self.search_index.exhaustive:
+            for start in range(0, len(rows), NEIGHBOR_BLOCK_ROWS):
+                block_rows = rows[start:start + NEIGHBOR_BLOCK_ROWS]
+                for criteria, block in self.features.similarity_rows(block_rows, n).items():
+                    block[np.arange(len(block_rows)), block_rows] = -np.inf
+                    neighbors = np.full((len(block_rows), self.top_k), -1, dtype=np.int64)
+                    scores = np.full((len(block_rows), self.top_k), -np.inf, dtype=np.float32)
+                    if k > 0:
+                        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                        top_scores = np.take_along_axis(block, top, axis=1)
+                        order = np.argsort(-top_scores, axis=1, kind='stable')
+                        neighbors[:, :k] = np.take_along_axis(top, order, axis=1)
+                        scores[:, :k] = np.take_along_axis(top_scores, order, axis=1)
+                    self._neighbors[criteria][block_rows] = neighbors
+                    self._neighbor_scores[criteria][block_rows] = scores
+            return
+
+        for i in rows:
+            candidates = self.search_index.candidates(i)
+            candidates = candidates[candidates != i]
+            for criteria, block in self.features.similarity_rows(np.array([i]), n, candidates).items():
+                self._neighbors[criteria][i], self._neighbor_scores[criteria][i] = \
+                    select_top_k(candidates, block[0], k, self.top_k)
+
+    def _recompute_all_neighbors(self):
+        """모든 행의 이웃 목록을 다시 계산합니다. (음식 수가 top_k 이하일 때만 사용)"""
+        n = self._size
+        self._k = min(self.top_k, n - 1) if n > 0 else 0
+        if self.dense:
+            for criteria in CRITERIA:
+                self._neighbors[criteria][:n, :self._k] = top_k_indices(self._similarity[criteria][:n, :n], self._k)
+        else:
+            self._compute_neighbors(np.arange(n))
+        self._sync_views()
+        return set(self.dish_ids)
+
+    def _sync_index_vector(self, t):
+        """인덱스의 t번째 임베딩을 특징 버퍼와 맞춥니다."""
+        vector = self.features.embeddings(self._size, rows=[t])[0]
+        if vector.shape[0] != self.search_index.vectors.shape[-1]:
+            # 새 재료로 임베딩 차원이 바뀐 경우 전체 재구성
+            self.search_index.build(self.features.embeddings(self._size))
+        else:
+            self.search_index.set_vector(t, vector)
+
+    def upsert_food(self, food):
+        """음식을 추가하거나 특징을 갱신하고, 이웃 목록이 바뀐 음식 ID 집합을 반환합니다."""
+        with self._lock:
+            return self._upsert_food(food)
+
+    def _upsert_food(self, food):
+        dish_id = str(food.get('dishId'))
+        is_new = dish_id not in self.index
+        if is_new:
+            self._ensure_capacity(self._size + 1)
+        t = self._register(food)
+        if is_new:
+            self._size += 1
+        n = self._size
+
+        # 특징 행 갱신 후 해당 음식의 행/열만 다시 계산 (대칭 행렬)
+        self.features.set_row(t, food)
+        if self.dense:
+            for criteria, block in self.features.similarity_rows(np.array([t]), n).items():
+                row = block[0]
+                self._similarity[criteria][t, :n] = row
+                self._similarity[criteria][:n, t] = row
+        else:
+            self._sync_index_vector(t)
+        self._sync_views()
+
+        if min(self.top_k, n - 1) != self._k:
+            return self._recompute_all_neighbors()
+        if self.dense:
+            return self._patch_neighbors(t)
+        return self._patch_indexed_neighbors(t)
+
+    def _patch_neighbors(self, t):
+        """t번째 음식의 유사도가 바뀐 뒤 영향을 받는 이웃 목록만 갱신합니다."""
+        n, k = self._size, self._k
+        affected = {t}
+        if k <= 0:
+            return {self.dish_ids[t]}
+
+        rows = np.arange(n)
+        for criteria in CRITERIA:
+            matrix = self.matrices[criteria]
+            neighbors = self.neighbors[criteria]
+            neighbors[t] = top_k_row(matrix[t], t, k)
+
+            # t를 이웃으로 가지고 있던 행은 순위가 바뀌었을 수 있으므로 다시 계산
+            contains_t = (neighbors == t).any(axis=1)
+            contains_t[t] = False
+            for i in np.nonzero(contains_t)[0]:
+                neighbors[i] = top_k_row(matrix[i], i, k)
+                affected.add(i)
+
+            # t의 새 유사도가 k번째 이웃보다 높은 행에는 t를 삽입
+            kth_scores = matrix[rows, neighbors[:, -1]]
+            enters = (matrix[:, t] > kth_scores) & ~contains_t
+            enters[t] = False
+            for i in np.nonzero(enters)[0]:
+                candidates = np.append(neighbors[i, :-1], t)
+                neighbors[i] = candidates[np.argsort(-matrix[i, candidates], kind='stable')]
+                affected.add(i)
+
+        return {self.dish_ids[i] for i in affected}
+
+    def _patch_indexed_neighbors(self, t):
+        """인덱스 모드에서 t번째 음식이 바뀐 뒤 영향을 받는 이웃 목록만 갱신합니다.
+
+        t의 후보만 정확한 유사도로 비교하며, 인덱스 후보는 대칭이므로 t가 새로 들어갈 수 있는 행도 t의 후보뿐입니다.
+        """
+        n, k = self._size, self._k
+        if k <= 0:
+            return {self.dish_ids[t]}
+
+        candidates = self.search_index.candidates(t)
+        candidates = candidates[candidates != t]
+        blocks = self.features.similarity_rows(np.array([t]), n, candidates)
+        for criteria, block in blocks.items():
+            self._neighbors[criteria][t], self._neighbor_scores[criteria][t] = \
+                select_top_k(candidates, block[0], k, self.top_k)
+
+        # t를 이웃으로 가지고 있던 행은 순위가 바뀌었거나 t가 후보에서 빠졌을 수 있으므로 다시 계산
+        contains_t = np.zeros(n, dtype=bool)
+        for criteria in CRITERIA:
+            contains_t |= (self.neighbors[criteria] == t).any(axis=1)
+        contains_t[t] = False
+        stale = np.nonzero(contains_t)[0]
+        self._compute_neighbors(stale)
+        affected = {t, *stale}
+
+        # t의 새 유사도가 k번째 이웃보다 높은 후보 행에는 t를 삽입
+        for criteria, block in blocks.items():
+            scores = block[0]
+            neighbors = self.neighbors[criteria]
+            neighbor_scores = self._neighbor_scores[criteria]
+            enters = (scores > neighbor_scores[candidates, k - 1]) & ~contains_t[candidates]
+            for i, score in zip(candidates[enters], scores[enters]):
+                merged = np.append(neighbors[i, :-1], t)
+                merged_scores = np.append(neighbor_scores[i, :k - 1], score)
+                order = np.argsort(-merged_scores, kind='stable')
+                neighbors[i] = merged[order]
+                neighbor_scores[i, :k] = merged_scores[order]
+                affected.add(i)
+
+        return {self.dish_ids[i] for i in affected}
+
+    def remove_food(self, dish_id):
+        """음식을 제거하고, 이웃 목록이 바뀐 음식 ID 집합을 반환합니다."""
+        with self._lock:
+            return self._remove_food(dish_id)
+
+    def _remove_food(self, dish_id):
+        dish_id = str(dish_id)
+        t = self.index.get(dish_id)
+        if t is None:
+            return set()
+        last = self._size - 1
+
+        # 삭제되는 음식을 이웃으로 가진 행 표시
+        stale = {}
+        for criteria in CRITERIA:
+            neighbors = self.neighbors[criteria]
+            contains_t = (neighbors == t).any(axis=1)
+            neighbors[neighbors == t] = -1
+            stale[criteria] = set(np.nonzero(contains_t)[0]) - {t}
+
+        # 마지막 행을 삭제된 자리로 이동
+        if t != last:
+            self.features.move_row(last, t)
+            for criteria in CRITERIA:
+                if self.dense:
+                    matrix = self._similarity[criteria]
+                    matrix[t, :last + 1] = matrix[last, :last + 1]
+                    matrix[:last + 1, t] = matrix[:last + 1, last]
+                    matrix[t, t] = matrix[last, last]
+                else:
+                    self._neighbor_scores[criteria][t] = self._neighbor_scores[criteria][last]
+                neighbors = self._neighbors[criteria]
+                neighbors[t] = neighbors[last]
+                view = neighbors[:last + 1, :self._k]
+                view[view == last] = t
+                stale[criteria] = {t if i == last else i for i in stale[criteria]}
+            moved_id = self.dish_ids[last]
+            self.dish_ids[t] = moved_id
+            self.index[moved_id] = t
+            if not self.dense:
+                self.search_index.set_vector(t, np.array(self.search_index.vectors[last]))
+        if not self.dense:
+            self.search_index.truncate(last)
+
+        self.dish_ids.pop()
+        self.features.truncate(last)
+        del self.index[dish_id]
+        self.foods.pop(dish_id, None)
+        self._size -= 1
+        self._sync_views()
+
+        if min(self.top_k, self._size - 1) != self._k:
+            return self._recompute_all_neighbors()
+
+        if not self.dense:
+            rows = sorted(set().union(*stale.values()))
+            self._compute_neighbors(rows)
+            return {self.dish_ids[i] for i in rows}
+
+        affected = set()
+        for criteria in CRITERIA:
+            matrix = self.matrices[criteria]
+            neighbors = self.neighbors[criteria]
+            for i in stale[criteria]:
+                neighbors[i] = top_k_row(matrix[i], i, self._k)
+                affected.add(i)
+        return {self.dish_ids[i] for i in affected}
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, dish_id):
+        return str(dish_id) in self.index
+
+    def similarity(self, dish_id1, dish_id2, criteria='combined'):
+        """두 음식의 유사도를 반환합니다. 없는 음식이면 0.0"""
+        with self._lock:
+            i = self.index.get(str(dish_id1))
+            j = self.index.get(str(dish_id2))
+            if i is None or j is None:
+                return 0.0
+            return float(self._similarity_row(i, criteria, np.array([j]))[0])
+
+    def weighted_similarities(self, dish_id, weights=OVERALL_WEIGHTS):
+        """기준별 유사도 행에 가중치를 적용한 한 음식의 전체 유사도 행을 반환합니다. 없는 음식이면 None"""
+        with self._lock:
+            i = self.index.get(str(dish_id))
+            if i is None:
+                return None
+            if self.dense:
+                rows = {criteria: self.matrices[criteria][i] for criteria in weights}
+            else:
+                rows = {criteria: block[0] for criteria, block in
+                        self.features.similarity_rows(np.array([i]), self._size).items()}
+            return weighted_sum({criteria: rows[criteria] for criteria in weights}, weights)
+
+    def similarities(self, dish_id, criteria='combined'):
+        """한 음식과 모든 음식 간의 유사도 행의 복사본을 반환합니다. 없는 음식이면 None"""
+        with self._lock:
+            i = self.index.get(str(dish_id))
+            if i is None:
+                return None
+            return np.array(self._similarity_row(i, criteria))
+
+    def most_similar(self, dish_id, criteria='combined', top_n=3):
+        """유사도가 높은 순으로 (dishId, 유사도) 목록을 반환합니다. (자기 자신 제외)"""
+        with self._lock:
+            i = self.index.get(str(dish_id))
+            if i is None:
+                return []
+
+            if top_n <= self.neighbors[criteria].shape[1]:
+                indices = self.neighbors[criteria][i, :top_n]
+                if self.dense:
+                    scores = self.matrices[criteria][i, indices]
+                else:
+                    # 근사 인덱스는 후보가 k개보다 적을 수 있음 (-1)
+                    valid = indices >= 0
+                    indices, scores = indices[valid], self._neighbor_scores[criteria][i, :top_n][valid]
+            else:
+                # 저장된 이웃 수보다 많이 요청한 경우 해당 행만 정렬
+                row = self._similarity_row(i, criteria)
+                indices = [j for j in np.argsort(-row, kind='stable') if j != i][:top_n]
+                scores = row[indices]
+            return [(self.dish_ids[j], float(score)) for j, score in zip(indices, scores)]
+
+    def personalized(self, dish_id, profile, top_n=3, boost=0.2, criteria='combined'):
+        """사용자 프로필(UserProfile)로 걸러낸 추천을 (dishId, 점수, 유사도) 목록으로 반환합니다.
+
+        모든 기준의 상위 k개 이웃을 후보로 모아 비트마스크로 거르므로 O(k x 기준 수)입니다.
+        후보가 부족할 때만 해당 행 전체에서 다시 고릅니다.
+        """
+        with self._lock:
+            i = self.index.get(str(dish_id))
+            if i is None:
+                return []
+
+            candidates = np.unique(np.concatenate([self.neighbors[c][i] for c in CRITERIA]))
+            candidates = candidates[candidates >= 0]
+            results = self._rank_candidates(i, criteria, candidates, profile, boost)
+            if len(results) < top_n and len(candidates) < self._size - 1:
+                results = self._rank_candidates(i, criteria, np.arange(self._size), profile, boost)
+            return results[:top_n]
+
+    def _rank_candidates(self, i, criteria, candidates, profile, boost):
+        """후보를 알레르기/채식 조건으로 거르고 선호 카테고리 가중치를 적용해 정렬합니다."""
+        candidates = candidates[candidates != i]
+        profiles = self.profiles[candidates]
+        candidates = candidates[profile.allowed(profiles[:, 0], profiles[:, 2].astype(bool))]
+        similarities = self._similarity_row(i, criteria, candidates)
+        scores = similarities * profile.boost(self.profiles[candidates, 1], boost)
+        order = np.argsort(-scores, kind='stable')
+        return [(self.dish_ids[j], float(scores[o]), float(similarities[o])) for o, j in zip(order, candidates[order])]
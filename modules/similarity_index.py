@@ -0,0 +1,140 @@
+# modules/similarity_index.py
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SimilarityIndex:
+    """유사 음식 후보 검색 인덱스의 공통 인터페이스
+
+    임베딩(맛/재료 결합 벡터)으로 후보를 고르고, 호출자가 준 scorer(후보 인덱스 배열 -> 정확한 유사도)로
+    다시 점수를 매겨 상위 k개를 반환합니다.
+    """
+
+    # True이면 모든 항목이 후보 (정확한 결과, 행 블록 단위로 계산 가능)
+    exhaustive = False
+
+    def __init__(self):
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def build(self, vectors):
+        """전체 임베딩으로 인덱스를 새로 만듭니다."""
+        self.vectors = np.array(vectors, dtype=np.float32)
+
+    def set_vector(self, i, vector):
+        """i번째 항목의 임베딩을 추가하거나 교체합니다."""
+        if i >= len(self.vectors):
+            self.vectors = np.vstack([self.vectors, np.asarray(vector, dtype=np.float32)[None, :]])
+        else:
+            self.vectors[i] = vector
+
+    def truncate(self, n):
+        """앞의 n개 항목만 남깁니다."""
+        self.vectors = self.vectors[:n]
+
+    def candidates(self, i):
+        """i번째 항목의 후보 인덱스 배열을 반환합니다."""
+        raise NotImplementedError
+
+    def query(self, i, k, scorer=None):
+        """i번째 항목과 가장 유사한 k개의 (인덱스, 유사도) 목록을 반환합니다. (자기 자신 제외)"""
+        candidates = self.candidates(i)
+        candidates = candidates[candidates != i]
+        if len(candidates) == 0 or k <= 0:
+            return []
+        scores = scorer(candidates) if scorer is not None else self.vectors[candidates] @ self.vectors[i]
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(candidates[j]), float(scores[j])) for j in top]
+
+class ExactSimilarityIndex(SimilarityIndex):
+    """모든 항목을 후보로 하는 정확한 (전수 비교) 인덱스"""
+
+    exhaustive = True
+
+    def candidates(self, i):
+        return np.arange(len(self.vectors))
+
+class LSHSimilarityIndex(SimilarityIndex):
+    """무작위 초평면 LSH 근사 인덱스
+
+    테이블마다 num_bits개의 초평면으로 임베딩의 부호 비트를 만들어 버킷에 넣고,
+    질의 시 모든 테이블에서 같은 버킷(및 1비트 차이 버킷)에 있는 항목만 후보로 사용합니다.
+    버킷 조회는 대칭이므로 j가 i의 후보이면 i도 j의 후보입니다.
+    """
+
+    def __init__(self, num_tables=16, num_bits=10, multiprobe=True, seed=0):
+        super().__init__()
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self.multiprobe = multiprobe
+        self.seed = seed
+        self.planes = None
+        self.codes = np.zeros((0, num_tables), dtype=np.int64)
+        self.buckets = [{} for _ in range(num_tables)]
+        self._bit_values = 1 << np.arange(num_bits, dtype=np.int64)
+
+    def _hash(self, vectors):
+        """임베딩 배열의 테이블별 버킷 코드를 계산합니다."""
+        # 맛 점수는 모두 양수라 한쪽에 몰려 있으므로 구축 시 평균을 빼서 초평면이 고르게 나누도록 함
+        bits = np.einsum('nd,tbd->ntb', vectors - self.center, self.planes) > 0
+        return (bits * self._bit_values).sum(axis=2)
+
+    def build(self, vectors):
+        super().build(vectors)
+        rng = np.random.default_rng(self.seed)
+        dim = self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+        self.planes = rng.standard_normal((self.num_tables, self.num_bits, dim)).astype(np.float32)
+        self.center = self.vectors.mean(axis=0) if len(self.vectors) else np.zeros(dim, dtype=np.float32)
+        self.codes = self._hash(self.vectors) if len(self.vectors) else np.zeros((0, self.num_tables), dtype=np.int64)
+        self.buckets = [{} for _ in range(self.num_tables)]
+        for i, codes in enumerate(self.codes):
+            for table, code in enumerate(codes):
+                self.buckets[table].setdefault(int(code), set()).add(i)
+
+    def _unlink(self, i):
+        for table, code in enumerate(self.codes[i]):
+            bucket = self.buckets[table].get(int(code))
+            if bucket is not None:
+                bucket.discard(i)
+
+    def set_vector(self, i, vector):
+        if i < len(self.vectors):
+            self._unlink(i)
+        super().set_vector(i, vector)
+        codes = self._hash(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        if i >= len(self.codes):
+            self.codes = np.vstack([self.codes, codes[None, :]])
+        else:
+            self.codes[i] = codes
+        for table, code in enumerate(codes):
+            self.buckets[table].setdefault(int(code), set()).add(i)
+
+    def truncate(self, n):
+        for i in range(n, len(self.vectors)):
+            self._unlink(i)
+        super().truncate(n)
+        self.codes = self.codes[:n]
+
+    def candidates(self, i):
+        found = set()
+        for table, code in enumerate(self.codes[i]):
+            code = int(code)
+            found.update(self.buckets[table].get(code, ()))
+            if self.multiprobe:
+                for bit in range(self.num_bits):
+                    found.update(self.buckets[table].get(code ^ (1 << bit), ()))
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+def create_similarity_index(backend='exact', **options):
+    """설정 이름으로 유사도 인덱스를 만듭니다. ('exact' 또는 'lsh')"""
+    if backend == 'lsh':
+        return LSHSimilarityIndex(**options)
+    if backend != 'exact':
+        logger.warning(f"알 수 없는 유사도 인덱스 백엔드 '{backend}', exact 사용")
+    return ExactSimilarityIndex()
@@ -0,0 +1,107 @@
+# modules/similarity_snapshot.py
+import os
+import json
+import uuid
+import shutil
+import logging
+import numpy as np
+
+from modules.similarity import SimilarityMatrices
+
+logger = logging.getLogger(__name__)
+
+# 저장 형식이 바뀌면 올려서 이전 스냅샷을 무시하게 함
+SNAPSHOT_SCHEMA_VERSION = 2
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+KEEP_SNAPSHOTS = 2
+
+def _snapshot_name(catalog_version, top_k):
+    return f"v{catalog_version}-k{top_k}-s{SNAPSHOT_SCHEMA_VERSION}"
+
+def save_snapshot(matrices, directory, catalog_version):
+    """유사도 행렬 상태를 카탈로그 버전별 디렉터리에 .npy 파일과 manifest로 저장합니다.
+
+    임시 디렉터리에 쓴 뒤 이름을 바꾸고 CURRENT 파일을 교체하므로
+    다른 프로세스는 완성된 스냅샷만 보게 됩니다.
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        name = _snapshot_name(catalog_version, matrices.top_k)
+        final_path = os.path.join(directory, name)
+
+        if not os.path.exists(final_path):
+            temp_path = os.path.join(directory, f".tmp-{os.getpid()}-{uuid.uuid4().hex}")
+            os.makedirs(temp_path)
+            # 쓰는 동안 증분 갱신이 배열을 바꾸지 않도록 잠금
+            with matrices.lock:
+                meta, arrays = matrices.get_state()
+                for key, array in arrays.items():
+                    np.save(os.path.join(temp_path, f"{key}.npy"), np.ascontiguousarray(array))
+            meta.update({
+                'schema': SNAPSHOT_SCHEMA_VERSION,
+                'catalog_version': catalog_version,
+                'arrays': sorted(arrays)
+            })
+            with open(os.path.join(temp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, default=str)
+
+            try:
+                os.rename(temp_path, final_path)
+            except OSError:
+                # 다른 프로세스가 같은 버전을 먼저 저장한 경우
+                shutil.rmtree(temp_path, ignore_errors=True)
+
+        current_temp = os.path.join(directory, f".{CURRENT_FILE}-{os.getpid()}-{uuid.uuid4().hex}")
+        with open(current_temp, 'w', encoding='utf-8') as f:
+            f.write(name)
+        os.replace(current_temp, os.path.join(directory, CURRENT_FILE))
+
+        _remove_old_snapshots(directory, name)
+        logger.info(f"추천 시스템 스냅샷 저장 완료: {final_path}")
+        return final_path
+    except Exception as e:
+        logger.error(f"추천 시스템 스냅샷 저장 중 오류: {e}")
+        return None
+
+def _remove_old_snapshots(directory, current_name):
+    """현재 스냅샷과 직전 스냅샷만 남기고 삭제합니다. (이미 매핑한 프로세스는 삭제 후에도 계속 읽을 수 있음)"""
+    snapshots = [
+        entry for entry in os.scandir(directory)
+        if entry.is_dir() and entry.name.startswith('v') and entry.name != current_name
+    ]
+    snapshots.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in snapshots[KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+def load_snapshot(directory, catalog_version, top_k, mmap_mode='c', index_factory=None):
+    """카탈로그 버전이 일치하는 스냅샷을 메모리 맵으로 불러옵니다. 없거나 버전이 다르면 None.
+
+    mmap_mode='c'(copy-on-write)이므로 여러 프로세스가 같은 페이지를 공유하고,
+    증분 갱신으로 값을 바꾸는 프로세스만 해당 페이지를 복사합니다.
+    인덱스 모드 스냅샷은 index_factory()로 만든 유사도 인덱스를 다시 구축합니다.
+    """
+    try:
+        path = os.path.join(directory, _snapshot_name(catalog_version, top_k))
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('schema') != SNAPSHOT_SCHEMA_VERSION or meta.get('catalog_version') != catalog_version:
+            return None
+
+        arrays = {}
+        for key in meta['arrays']:
+            array_path = os.path.join(path, f"{key}.npy")
+            # 크기가 0인 배열은 메모리 맵을 만들 수 없으므로 그냥 읽음
+            array = np.load(array_path, mmap_mode=mmap_mode)
+            arrays[key] = array if array.size else np.array(array)
+
+        matrices = SimilarityMatrices.from_state(meta, arrays, index_factory)
+        logger.info(f"추천 시스템 스냅샷 로드 완료: {path} ({len(matrices)}개 음식)")
+        return matrices
+    except Exception as e:
+        logger.error(f"추천 시스템 스냅샷 로드 중 오류: {e}")
+        return None
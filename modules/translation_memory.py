@@ -0,0 +1,196 @@
+# modules/translation_memory.py
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+from modules.monitoring import record_metric
+
+logger = logging.getLogger(__name__)
+
+# SQLite IN 절 변수 개수 제한보다 작게 나눠 조회
+SQLITE_QUERY_CHUNK = 500
+
+def normalize_source(text):
+    """번역 메모리 키로 쓰기 위해 공백을 정리합니다."""
+    return ' '.join(text.split())
+
+class TranslationMemory:
+    """원문 -> 번역문 영구 저장소 (SQLite) 와 그 앞의 프로세스 내 LRU 캐시
+
+    메뉴 이름처럼 반복되는 줄은 한 번 번역한 결과를 모든 프로세스가 재사용합니다.
+    SQLite는 WAL 모드로 열어 여러 워커 프로세스가 동시에 읽고 쓸 수 있게 합니다.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """싱글톤 인스턴스 반환"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, db_path=None, lru_size=4096):
+        self.db_path = db_path  # None이면 LRU만 사용
+        self.lru_size = lru_size
+        self._entries = OrderedDict()  # (source_lang, target_lang, text) -> translation
+        self._entries_lock = threading.Lock()
+        self._local = threading.local()  # 스레드별 SQLite 연결
+        self.stats = {
+            'lru_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'errors': 0
+        }
+
+    def configure(self, db_path=None, lru_size=None):
+        """저장소 설정을 변경합니다."""
+        with self._entries_lock:
+            if db_path is not None and db_path != self.db_path:
+                self.db_path = db_path
+                self._local = threading.local()
+            if lru_size is not None:
+                self.lru_size = lru_size
+                self._evict()
+
+    def _connection(self):
+        """현재 스레드의 SQLite 연결을 반환합니다. (fork 후에는 새로 연결)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            ' source_lang TEXT NOT NULL,'
+            ' target_lang TEXT NOT NULL,'
+            ' source TEXT NOT NULL,'
+            ' translation TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' PRIMARY KEY (source_lang, target_lang, source))'
+        )
+        conn.commit()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _evict(self):
+        """LRU 최대 크기를 넘는 가장 오래된 항목을 제거합니다. (락을 잡은 상태에서 호출)"""
+        while len(self._entries) > self.lru_size:
+            self._entries.popitem(last=False)
+
+    def _remember(self, source_lang, target_lang, translations):
+        """번역 결과를 LRU에 넣습니다."""
+        with self._entries_lock:
+            for text, translation in translations.items():
+                key = (source_lang, target_lang, text)
+                self._entries[key] = translation
+                self._entries.move_to_end(key)
+            self._evict()
+
+    def get_many(self, texts, source_lang='ko', target_lang='en'):
+        """LRU, SQLite 순서로 조회해 {원문: 번역문} 사전을 반환합니다. (없는 원문은 제외)"""
+        found = {}
+        remaining = []
+        with self._entries_lock:
+            for text in dict.fromkeys(texts):
+                key = (source_lang, target_lang, text)
+                translation = self._entries.get(key)
+                if translation is None:
+                    remaining.append(text)
+                else:
+                    self._entries.move_to_end(key)
+                    found[text] = translation
+        lru_hits = len(found)
+
+        db_found = {}
+        if remaining and self.db_path:
+            try:
+                conn = self._connection()
+                for start in range(0, len(remaining), SQLITE_QUERY_CHUNK):
+                    chunk = remaining[start:start + SQLITE_QUERY_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT source, translation FROM translations '
+                        f'WHERE source_lang = ? AND target_lang = ? AND source IN ({placeholders})',
+                        [source_lang, target_lang] + chunk
+                    ).fetchall()
+                    db_found.update(rows)
+            except Exception as e:
+                with self._entries_lock:
+                    self.stats['errors'] += 1
+                logger.error(f"번역 메모리 조회 중 오류 발생: {e}")
+        if db_found:
+            self._remember(source_lang, target_lang, db_found)
+            found.update(db_found)
+
+        misses = len(remaining) - len(db_found)
+        with self._entries_lock:
+            self.stats['lru_hits'] += lru_hits
+            self.stats['db_hits'] += len(db_found)
+            self.stats['misses'] += misses
+        if found or misses:
+            record_metric('translation_memory_hit_rate', len(found) / (len(found) + misses))
+        return found
+
+    def put_many(self, translations, source_lang='ko', target_lang='en'):
+        """{원문: 번역문} 사전을 LRU와 SQLite에 저장합니다."""
+        if not translations:
+            return 0
+
+        self._remember(source_lang, target_lang, translations)
+        if self.db_path:
+            try:
+                conn = self._connection()
+                now = time.time()
+                conn.executemany(
+                    'INSERT OR REPLACE INTO translations '
+                    '(source_lang, target_lang, source, translation, updated_at) VALUES (?, ?, ?, ?, ?)',
+                    [(source_lang, target_lang, text, translation, now) for text, translation in translations.items()]
+                )
+                conn.commit()
+            except Exception as e:
+                with self._entries_lock:
+                    self.stats['errors'] += 1
+                logger.error(f"번역 메모리 저장 중 오류 발생: {e}")
+                return 0
+
+        with self._entries_lock:
+            self.stats['writes'] += len(translations)
+        return len(translations)
+
+    def get_stats(self):
+        """번역 메모리 통계를 반환합니다."""
+        with self._entries_lock:
+            stats = dict(self.stats)
+            stats['lru_size'] = len(self._entries)
+        lookups = stats['lru_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['lru_hits'] + stats['db_hits']) / lookups if lookups else 0.0
+        return stats
+
+# 번역 메모리 인스턴스 생성
+translation_memory = TranslationMemory.get_instance()
+
+def init_translation_memory(app):
+    """앱 설정으로 번역 메모리를 초기화합니다."""
+    translation_memory.configure(
+        db_path=app.config.get(
+            'TRANSLATION_MEMORY_PATH',
+            os.path.join(app.instance_path, 'translation_memory.sqlite3')
+        ),
+        lru_size=app.config.get('TRANSLATION_MEMORY_LRU_SIZE', 4096)
+    )
+    logger.info(f"번역 메모리 초기화: {translation_memory.db_path} (LRU {translation_memory.lru_size}개)")
+    return translation_memory
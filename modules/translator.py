@@ -1,13 +1,29 @@
 # modules/translator.py - deep-translator 구현
+import re
 import logging
 from deep_translator import GoogleTranslator, MicrosoftTranslator
 from flask import current_app
 
+from modules.monitoring import record_metric
+from modules.translation_memory import translation_memory, init_translation_memory, normalize_source
+
 logger = logging.getLogger(__name__)
 
 # 모듈 레벨 변수로 번역기 저장
 _translator = None
 
+# 원격 번역 요청 한 번에 묶을 최대 글자 수 (Google 번역 5000자 제한 이내)
+_batch_chars = 4500
+
+# 줄 끝의 가격 (예: "8,000원", "₩12,000", "15000")
+# 천 단위 구분자나 "원"이 없는 숫자는 공백/₩ 뒤에 있을 때만 가격으로 봄 ("세트A1", "비빔밥2"는 이름의 일부)
+PRICE_PATTERN = re.compile(
+    r'\s*(?P<currency>₩\s*)?'
+    r'(?P<amount>(?<!\d)(?:\d{1,3}(?:,\d{3})+|\d+(?=\s*원))|(?<![^\s₩])\d+)'
+    r'\s*(?P<won>원)?\s*$'
+)
+HANGUL_PATTERN = re.compile(r'[가-힣ㄱ-ㅎㅏ-ㅣ]')
+
 def get_translator():
     """번역기를 가져옵니다."""
     global _translator
@@ -33,6 +49,12 @@ def init_translator(app):
     """번역기 객체를 초기화합니다."""
     global _translator
     
+    global _batch_chars
+    
+    # 번역 메모리는 번역기 연결과 무관하게 설정
+    init_translation_memory(app)
+    _batch_chars = app.config.get('TRANSLATION_BATCH_CHARS', _batch_chars)
+    
     try:
         logger.info("번역기 초기화 중...")
         _translator = GoogleTranslator(source='ko', target='en')
@@ -84,38 +106,129 @@ def translate_text(text, source='ko', target='en'):
             logger.error(f"대체 번역 방법도 실패: {alt_error}")
             return f"[번역 오류: {str(e)}]"
 
+def split_price(line):
+    """메뉴 줄을 (이름 부분, 가격 표기)로 나눕니다. 가격이 없으면 가격 표기는 None"""
+    match = PRICE_PATTERN.search(line)
+    if not match:
+        return line.strip(), None
+    
+    amount = match.group('amount')
+    if match.group('currency') or match.group('won') or ',' in amount or len(amount) >= 4:
+        price = f"₩{int(amount.replace(',', '')):,}"
+    else:
+        price = amount
+    return line[:match.start()].strip(), price
+
+def _translate_remote(texts, source='ko', target='en'):
+    """번역 메모리에 없는 원문들을 줄바꿈으로 묶어 청크 단위로 원격 번역합니다."""
+    translator = get_translator() if (source, target) == ('ko', 'en') else None
+    if translator is None:
+        translator = GoogleTranslator(source=source, target=target)
+    
+    # 글자 수 제한 안에서 줄 단위로 청크 구성
+    chunks, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(text) + 1 > _batch_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text) + 1
+    if current:
+        chunks.append(current)
+    
+    translations = {}
+    for chunk in chunks:
+        record_metric('translation_remote_call', 1, {'lines': len(chunk)})
+        result = translator.translate("\n".join(chunk)) or ""
+        lines = result.split("\n")
+        if len(lines) != len(chunk):
+            # 줄 수가 맞지 않으면 이 청크만 줄별로 번역
+            logger.warning(f"묶음 번역 줄 수 불일치 ({len(chunk)} -> {len(lines)}), 줄별 번역으로 재시도")
+            record_metric('translation_remote_call', len(chunk), {'lines': 1})
+            lines = [translator.translate(text) or "" for text in chunk]
+        translations.update(zip(chunk, (line.strip() for line in lines)))
+    return translations
+
+def translate_lines(lines, source='ko', target='en'):
+    """메뉴 줄 목록을 번역합니다.
+    
+    가격은 분리해 그대로 표기하고, 이름 부분은 번역 메모리에서 먼저 찾은 뒤
+    없는 것만 원격 번역기로 묶어 보내고 결과를 메모리에 저장합니다.
+    반환값: (번역된 줄 목록, 일부 줄의 원격 번역 실패 오류 메시지 또는 None)
+    """
+    parts = [split_price(line) for line in lines]
+    names = {normalize_source(name) for name, _ in parts if HANGUL_PATTERN.search(name)}
+    
+    translations = translation_memory.get_many(names, source, target)
+    misses = sorted(names - translations.keys())
+    error = None
+    if misses:
+        logger.info(f"번역 메모리 미스 {len(misses)}개 원격 번역 중 (적중 {len(translations)}개)")
+        try:
+            fetched = _translate_remote(misses, source, target)
+            translation_memory.put_many({text: value for text, value in fetched.items() if value}, source, target)
+            translations.update(fetched)
+        except Exception as e:
+            if not translations:
+                # 번역 메모리에서 찾은 줄도 없으면 전체 실패
+                raise
+            logger.error(f"원격 번역 중 오류 발생, 번역 메모리 결과만 사용: {e}")
+            error = f"[번역 오류: {str(e)}]"
+    
+    translated_lines = []
+    for name, price in parts:
+        # 한글이 없는 부분(영문, 숫자)이나 번역에 실패한 부분은 원문 유지
+        translated = translations.get(normalize_source(name)) or name
+        translated_lines.append(f"{translated} {price}".strip() if price else translated)
+    return translated_lines, error
+
 def process_menu_text(ocr_result):
-    """OCR 결과를 번역 처리합니다."""
+    """OCR 결과를 줄 단위로 번역 처리합니다."""
     try:
         if not ocr_result["success"]:
             return ocr_result
             
         full_text = ocr_result["full_text"]
+        extracted_texts = ocr_result.get("extracted_texts") or [{"text": line} for line in full_text.split("\n")]
         
-        # 전체 텍스트 번역
+        # OCR 줄 단위 번역 (번역 메모리 우선)
         logger.info("인식된 텍스트 번역 중...")
         
         try:
-            translated_text = translate_text(full_text)
+            translated_lines, error = translate_lines([item["text"] for item in extracted_texts])
         except Exception as e:
-            logger.warning(f"기본 번역 실패, 대체 번역 시도: {e}")
-            # 간단한 대체 번역 결과 생성 (예시)
-            translated_text = "Translation service is temporarily unavailable. Original text:\n" + full_text
+            logger.warning(f"줄 단위 번역 실패: {e}")
+            translated_lines, error = None, f"[번역 오류: {str(e)}]"
         
         # 번역이 실패한 경우 처리
-        if translated_text.startswith('[번역 오류') or translated_text.startswith('[번역 불가'):
+        if translated_lines is None:
             return {
                 "success": True,  # 오류지만 원본 텍스트는 보여주기 위해 success=True
-                "error": translated_text,
+                "error": error,
                 "original_text": full_text,
                 "translated_text": "Translation service unavailable"
             }
         
-        return {
+        translated_items = [
+            {
+                "original": item["text"],
+                "translated": translated,
+                "bbox": item.get("bbox"),
+                "confidence": item.get("confidence")
+            }
+            for item, translated in zip(extracted_texts, translated_lines)
+        ]
+        
+        result = {
             "success": True,
             "original_text": full_text,
-            "translated_text": translated_text
+            "translated_text": "\n".join(translated_lines),
+            "translated_items": translated_items
         }
+        if error:
+            # 일부 줄만 번역된 경우
+            result["error"] = error
+        return result
     except Exception as e:
         logger.error(f"메뉴 텍스트 처리 중 오류 발생: {e}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
@@ -1,12 +1,20 @@
 # modules/vision.py
 import logging
 import os
+import hashlib
+import threading
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import cv2
-from ultralytics import YOLO
 from flask import current_app, g
 from datetime import datetime
 
+from modules.monitoring import record_metric
+from modules.inference_server import init_inference_client, get_inference_client
+from modules.result_cache import result_cache
+
 logger = logging.getLogger(__name__)
 
 # 클래스별 최적 모델 매핑
@@ -72,9 +80,41 @@ models = {
     'model_l': None
 }
 
-def init_vision_models(app):
-    """YOLO 모델을 초기화합니다."""
-    global models
+# 앙상블 실행 설정 ('full': 항상 두 모델 실행, 'adaptive': 저비용 모델 우선 실행 후 조기 종료)
+ensemble_settings = {
+    'mode': 'full',
+    'ambiguous_threshold': 0.1,  # 이 값 이상 conf_threshold 미만의 박스는 애매한 검출로 간주
+    'shadow_rate': 0.05,         # 조기 종료 요청 중 전체 앙상블로 재검증할 비율
+    'box_fusion': 'nms'          # 결합 방식 ('nms': 클래스별 NMS, 'wbf': Weighted Boxes Fusion)
+}
+
+# 적응형 모드에서 먼저 실행할 저비용 모델과 두 번째 모델
+ADAPTIVE_PRIMARY_MODEL = 'model_m'
+ADAPTIVE_SECONDARY_MODEL = 'model_l'
+
+_adaptive_stats = {
+    'requests': 0,
+    'skipped': 0,
+    'shadow_checks': 0,
+    'shadow_skipped': 0,
+    'shadow_agreement_sum': 0.0
+}
+_adaptive_stats_lock = threading.Lock()
+_shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='yolo-shadow')
+# 재검증은 한 번에 하나만 대기/실행 (밀린 재검증이 쌓여 실제 요청의 모델 시간을 쓰지 않도록)
+_shadow_slot = threading.Semaphore(1)
+
+def init_vision_models(app, use_inference_server=True):
+    """YOLO 모델을 초기화합니다.
+    
+    INFERENCE_SERVER_ADDRESS가 설정되어 있으면 모델을 로드하지 않고 추론 서버 클라이언트를 사용합니다.
+    추론 서버 프로세스 자신은 use_inference_server=False로 호출합니다.
+    """
+    global models, _ensemble_engine
+    if use_inference_server and init_inference_client(app) is not None:
+        logger.info("추론 서버를 사용하므로 YOLO 모델을 로드하지 않습니다.")
+        return True
+    
     try:
         logger.info("YOLOv8 모델 로딩 중...")
         model_m_path = app.config['MODEL_M_PATH']
@@ -94,14 +134,110 @@ def init_vision_models(app):
         models['model_m'] = YOLO(model_m_path)
         models['model_l'] = YOLO(model_l_path)
         
+        # 두 모델이 동시에 실행되므로 필요 시 모델당 intra-op 스레드 수 제한
+        intra_op_threads = app.config.get('YOLO_INTRA_OP_THREADS')
+        if intra_op_threads:
+            import torch
+            torch.set_num_threads(int(intra_op_threads))
+        
+        # 앙상블 실행 모드 설정
+        ensemble_settings['mode'] = app.config.get('ENSEMBLE_MODE', 'full')
+        ensemble_settings['ambiguous_threshold'] = app.config.get('ENSEMBLE_AMBIGUOUS_THRESHOLD', 0.1)
+        ensemble_settings['shadow_rate'] = app.config.get('ENSEMBLE_SHADOW_RATE', 0.05)
+        ensemble_settings['box_fusion'] = app.config.get('ENSEMBLE_BOX_FUSION', 'nms')
+        
+        # 앙상블 엔진 생성
+        _ensemble_engine = EnsembleEngine(
+            models['model_m'], models['model_l'],
+            imgsz=app.config.get('YOLO_IMGSZ', 640)
+        )
+        
         logger.info("YOLOv8 모델 로딩 완료")
         return True
     except Exception as e:
         logger.error(f"YOLO 모델 로딩 중 오류 발생: {e}")
         models['model_m'] = None
         models['model_l'] = None
+        _ensemble_engine = None
         return False
 
+class DecodedImage:
+    """요청당 한 번만 디코딩된 이미지와 메타데이터를 보관하는 클래스"""
+    
+    def __init__(self, path, data, array):
+        self.path = path        # 원본 파일 경로
+        self.data = data        # 원본 파일 바이트 (해시, base64 인코딩 등에 재사용)
+        self.array = array      # BGR ndarray (cv2.imread와 동일한 형식)
+        self.height, self.width = array.shape[:2]
+        self.channels = array.shape[2] if array.ndim == 3 else 1
+        self._content_hash = None
+        self._perceptual_hash = None
+    
+    @property
+    def shape(self):
+        """디코딩된 배열의 shape를 반환합니다."""
+        return self.array.shape
+    
+    @property
+    def content_hash(self):
+        """원본 파일 바이트의 SHA-256 해시 (최초 접근 시 한 번만 계산)"""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest()
+        return self._content_hash
+    
+    @property
+    def perceptual_hash(self):
+        """재인코딩/리사이즈에 강한 64비트 차이 해시(dHash)"""
+        if self._perceptual_hash is None:
+            gray = cv2.cvtColor(self.array, cv2.COLOR_BGR2GRAY) if self.channels == 3 else self.array
+            small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+            bits = (small[:, 1:] > small[:, :-1]).flatten()
+            self._perceptual_hash = int.from_bytes(np.packbits(bits).tobytes(), 'big')
+        return self._perceptual_hash
+    
+    def __repr__(self):
+        return f"DecodedImage(path={self.path!r}, shape={self.shape})"
+
+def load_image(image):
+    """이미지 파일을 한 번만 읽고 디코딩하여 DecodedImage로 반환합니다.
+    
+    이미 DecodedImage인 경우 그대로 반환하므로 경로와 디코딩된 이미지를 모두 받을 수 있습니다.
+    검증에 실패하면 None을 반환합니다.
+    """
+    if isinstance(image, DecodedImage):
+        return image
+    
+    try:
+        if not image or not os.path.exists(image):
+            logger.error(f"이미지 파일이 존재하지 않습니다: {image}")
+            return None
+        
+        with open(image, 'rb') as f:
+            data = f.read()
+        
+        return decode_image_bytes(data, image)
+    except Exception as e:
+        logger.error(f"이미지 디코딩 중 예기치 않은 오류: {e}", exc_info=True)
+        return None
+
+def decode_image_bytes(data, path=None):
+    """인코딩된 이미지 바이트를 디코딩하여 DecodedImage로 반환합니다. 실패 시 None."""
+    try:
+        array = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if array is None or array.size == 0:
+            logger.error(f"이미지 파일을 읽을 수 없습니다: {path}")
+            return None
+        
+        # 이미지 크기가 너무 작은지 확인
+        if array.shape[0] < 10 or array.shape[1] < 10:
+            logger.error(f"이미지 크기가 너무 작습니다: {array.shape}")
+            return None
+        
+        return DecodedImage(path, data, array)
+    except Exception as e:
+        logger.error(f"이미지 디코딩 중 예기치 않은 오류: {e}", exc_info=True)
+        return None
+
 def get_models():
     """YOLO 모델을 가져옵니다."""
     global models
@@ -110,189 +246,539 @@ def get_models():
         return None, None
     return models['model_m'], models['model_l']
 
-def ensemble_predictions_class_based(img_path, conf_threshold=0.25):
-    """클래스별 선택적 앙상블 방식으로 두 모델의 예측을 결합합니다."""
-    try:
-        # 이미지 검증
-        if not verify_image(img_path):
-            logger.error(f"이미지 검증 실패: {img_path}")
-            return [], [], []
+def get_class_names():
+    """YOLO 클래스 이름 사전을 반환합니다. (로컬 모델 또는 추론 서버)"""
+    if models['model_m'] is not None:
+        return models['model_m'].names
+    
+    client = get_inference_client()
+    if client is not None:
+        try:
+            return client.get_class_names()
+        except Exception as e:
+            logger.error(f"추론 서버에서 클래스 이름 조회 실패: {e}")
+            return None
+    
+    logger.error("YOLO 모델이 초기화되지 않았습니다.")
+    return None
+
+def letterbox(array, new_shape=640, stride=32, auto=True, color=(114, 114, 114)):
+    """YOLO 입력 크기에 맞게 비율을 유지하며 리사이즈 및 패딩합니다.
+    
+    ultralytics의 LetterBox와 같은 방식으로 처리하므로 결과 배열을 모델에 전달하면
+    모델 내부에서 추가 리사이즈가 발생하지 않습니다.
+    반환값: (패딩된 배열, 스케일 비율, (왼쪽 패딩, 위쪽 패딩))
+    """
+    height, width = array.shape[:2]
+    ratio = min(new_shape / height, new_shape / width)
+    new_unpad = (int(round(width * ratio)), int(round(height * ratio)))
+    
+    dw, dh = new_shape - new_unpad[0], new_shape - new_unpad[1]
+    if auto:
+        # 최소 패딩 (stride 배수로만 맞춤)
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)
+    dw /= 2
+    dh /= 2
+    
+    if (width, height) != new_unpad:
+        array = cv2.resize(array, new_unpad, interpolation=cv2.INTER_LINEAR)
+    
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    padded = cv2.copyMakeBorder(array, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return padded, ratio, (left, top)
+
+def _restore_boxes(boxes, ratio, pad, image_shape):
+    """letterbox 좌표계의 박스를 원본 이미지 좌표계로 되돌립니다."""
+    if len(boxes) == 0:
+        return boxes
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, image_shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, image_shape[0])
+    return boxes
+
+def _extract_detections(result):
+    """ultralytics Results 객체를 (boxes, scores, class_ids) 배열로 변환합니다."""
+    if not hasattr(result, 'boxes') or len(result.boxes) == 0:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32),
+                np.zeros((0,), dtype=int))
+    return (result.boxes.xyxy.cpu().numpy().astype(np.float32),
+            result.boxes.conf.cpu().numpy().astype(np.float32),
+            result.boxes.cls.cpu().numpy().astype(int))
+
+class EnsembleEngine:
+    """전처리를 한 번만 수행하고 두 YOLO 모델을 동시에 실행하는 앙상블 엔진"""
+    
+    MODEL_NAMES = ('model_m', 'model_l')
+    
+    def __init__(self, model_m, model_l, imgsz=640, stride=32):
+        self.models = {'model_m': model_m, 'model_l': model_l}
+        self.class_names = model_m.names
+        self.imgsz = imgsz
+        self.stride = stride
+        # ultralytics 예측기는 스레드 안전하지 않으므로 모델별 락 사용
+        self._model_locks = {name: threading.Lock() for name in self.MODEL_NAMES}
+        # 두 모델을 별도 스레드에서 동시에 실행 (추론 중에는 GIL이 해제됨)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.MODEL_NAMES),
+                                            thread_name_prefix='yolo-ensemble')
+    
+    def is_idle(self):
+        """현재 추론 중인 모델이 없으면 True"""
+        return not any(lock.locked() for lock in self._model_locks.values())
+    
+    def _infer(self, name, batch, conf_threshold):
+        """단일 모델로 배치 추론을 수행하고 결과 배열 목록을 반환합니다."""
+        model = self.models[name]
+        with self._model_locks[name]:
+            results = model(batch, conf=conf_threshold, imgsz=self.imgsz, verbose=False)
+        return [_extract_detections(result) for result in results]
+    
+    def _run_models(self, names, batch, conf_threshold):
+        """지정한 모델들을 동시에 실행하여 모델별 결과를 반환합니다."""
+        futures = {
+            name: self._executor.submit(self._infer, name, batch, conf_threshold)
+            for name in names
+        }
+        outputs = {}
+        for name, future in futures.items():
+            try:
+                outputs[name] = future.result()
+            except Exception as e:
+                logger.error(f"{name} 추론 실패: {str(e)}")
+                raise
+        return outputs
+    
+    def run(self, image, conf_threshold=0.25, names=MODEL_NAMES):
+        """이미지 한 장에 대해 모델별 (boxes, scores, class_ids)를 원본 좌표로 반환합니다."""
+        padded, ratio, pad = letterbox(image.array, self.imgsz, self.stride)
+        outputs = self._run_models(names, [padded], conf_threshold)
         
-        # 모델 가져오기
+        detections = {}
+        for name, (result,) in outputs.items():
+            boxes, scores, class_ids = result
+            detections[name] = (_restore_boxes(boxes, ratio, pad, image.shape), scores, class_ids)
+        return detections
+    
+    def run_batch(self, images, conf_threshold=0.25, names=MODEL_NAMES):
+        """여러 이미지를 모델당 한 번의 배치 호출로 처리합니다."""
+        if not images:
+            return []
+        
+        # 배치 내 shape를 맞추기 위해 정사각형 letterbox 사용
+        prepared = [letterbox(image.array, self.imgsz, self.stride, auto=False) for image in images]
+        batch = [padded for padded, _, _ in prepared]
+        outputs = self._run_models(names, batch, conf_threshold)
+        
+        batch_detections = []
+        for i, image in enumerate(images):
+            _, ratio, pad = prepared[i]
+            detections = {}
+            for name in names:
+                boxes, scores, class_ids = outputs[name][i]
+                detections[name] = (_restore_boxes(boxes, ratio, pad, image.shape), scores, class_ids)
+            batch_detections.append(detections)
+        return batch_detections
+
+_ensemble_engine = None
+
+def get_ensemble_engine():
+    """앙상블 엔진을 가져옵니다. 모델이 로드된 경우 지연 생성합니다."""
+    global _ensemble_engine
+    if _ensemble_engine is None:
         model_m, model_l = get_models()
         if model_m is None or model_l is None:
-            logger.error("모델이 초기화되지 않았습니다.")
-            return [], [], []
+            return None
+        _ensemble_engine = EnsembleEngine(model_m, model_l)
+    return _ensemble_engine
+
+def box_iou(boxes1, boxes2):
+    """두 박스 집합 간의 IoU 행렬을 계산합니다. (xyxy 형식)"""
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = (bottom_right - top_left).clip(0)
+    inter = wh[..., 0] * wh[..., 1]
+    return inter / np.maximum(area1[:, None] + area2[None, :] - inter, 1e-9)
+
+def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.45, score_threshold=0.0):
+    """클래스별 NMS를 NumPy 배열 연산으로 수행하고 남은 박스의 인덱스를 점수 내림차순으로 반환합니다.
+    
+    클래스 ID에 비례한 좌표 오프셋을 더해 서로 다른 클래스의 박스가 겹치지 않게 만든 뒤
+    한 번의 IoU 행렬 계산으로 모든 클래스의 NMS를 동시에 처리합니다.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    class_ids = np.asarray(class_ids).reshape(-1)
+    
+    candidates = np.nonzero(scores >= score_threshold)[0]
+    if candidates.size == 0:
+        return np.zeros((0,), dtype=int)
+    
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    shifted = boxes[order] + class_ids[order].astype(np.float32)[:, None] * (float(boxes[order].max()) + 1.0)
+    
+    # overlap[i, j]: 점수가 더 높은 박스 i가 박스 j를 억제할 수 있는지 여부
+    overlap = np.triu(box_iou(shifted, shifted) > iou_threshold, k=1)
+    
+    # 다른 박스와 겹치는 박스만 점수 순으로 확인 (겹치지 않는 박스는 항상 유지됨)
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in np.nonzero(overlap.any(axis=1))[0]:
+        if not suppressed[i]:
+            suppressed |= overlap[i]
+    return order[~suppressed]
+
+def weighted_box_fusion(boxes, scores, class_ids, iou_threshold=0.55, score_threshold=0.0):
+    """같은 클래스의 겹치는 박스를 점수 가중 평균으로 융합합니다. (Weighted Boxes Fusion)
+    
+    반환값: (융합된 boxes, scores, class_ids) 배열, 점수 내림차순
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    class_ids = np.asarray(class_ids).reshape(-1).astype(int)
+    
+    candidates = np.nonzero(scores >= score_threshold)[0]
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    
+    cluster_boxes = []      # 클러스터별 (가중 좌표 합, 점수 합, 박스 수)
+    cluster_classes = []
+    fused = np.zeros((0, 4), dtype=np.float32)
+    for idx in order:
+        match = -1
+        if len(cluster_classes) > 0:
+            same_class = np.asarray(cluster_classes) == class_ids[idx]
+            iou = box_iou(boxes[idx], fused)[0]
+            iou[~same_class] = 0.0
+            best = int(np.argmax(iou))
+            if iou[best] > iou_threshold:
+                match = best
         
-        # 성능 측정 시작
-        import time
-        start_time = time.time()
+        if match < 0:
+            cluster_boxes.append([boxes[idx] * scores[idx], scores[idx], 1])
+            cluster_classes.append(class_ids[idx])
+            fused = np.vstack([fused, boxes[idx][None, :]])
+        else:
+            cluster = cluster_boxes[match]
+            cluster[0] = cluster[0] + boxes[idx] * scores[idx]
+            cluster[1] += scores[idx]
+            cluster[2] += 1
+            fused[match] = cluster[0] / cluster[1]
+    
+    if not cluster_boxes:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32),
+                np.zeros((0,), dtype=int))
+    
+    fused_scores = np.array([score_sum / count for _, score_sum, count in cluster_boxes], dtype=np.float32)
+    fused_classes = np.array(cluster_classes, dtype=int)
+    result_order = np.argsort(-fused_scores, kind='stable')
+    return fused[result_order], fused_scores[result_order], fused_classes[result_order]
+
+def merge_class_based(detections, class_names, conf_threshold=0.25, iou_threshold=0.45, fusion=None):
+    """모델별 검출 결과를 CLASS_MODEL_MAPPING 기준으로 선택하고 클래스별 NMS로 결합합니다.
+    
+    fusion='wbf'이면 NMS 대신 Weighted Boxes Fusion을 사용합니다. (기본값: ensemble_settings['box_fusion'])
+    """
+    if fusion is None:
+        fusion = ensemble_settings['box_fusion']
+    ensemble_boxes = []
+    ensemble_scores = []
+    ensemble_class_ids = []
+    
+    # 매핑 테이블에서 각 클래스에 최적인 모델의 결과만 선택
+    for name in EnsembleEngine.MODEL_NAMES:
+        if name not in detections:
+            continue
+        boxes, scores, class_ids = detections[name]
+        for i in range(len(boxes)):
+            class_id = class_ids[i]
+            class_name = class_names[class_id]
+            if class_name in CLASS_MODEL_MAPPING and CLASS_MODEL_MAPPING[class_name] == name:
+                ensemble_boxes.append(boxes[i])
+                ensemble_scores.append(scores[i])
+                ensemble_class_ids.append(class_id)
+    
+    # 결합된 결과에 클래스별 NMS 또는 박스 융합 적용
+    if ensemble_boxes:
+        ensemble_boxes = np.array(ensemble_boxes, dtype=np.float32)
+        ensemble_scores = np.array(ensemble_scores, dtype=np.float32)
+        ensemble_class_ids = np.array(ensemble_class_ids, dtype=int)
         
-        # 각 모델의 예측 수행
         try:
-            results_m = model_m(img_path, conf=conf_threshold)[0]
+            if fusion == 'wbf':
+                return weighted_box_fusion(ensemble_boxes, ensemble_scores, ensemble_class_ids,
+                                           score_threshold=conf_threshold)
+            
+            keep = non_max_suppression(ensemble_boxes, ensemble_scores, ensemble_class_ids,
+                                       iou_threshold, conf_threshold)
+            return ensemble_boxes[keep], ensemble_scores[keep], ensemble_class_ids[keep]
         except Exception as e:
-            logger.error(f"모델 M 추론 실패: {str(e)}")
-            return [], [], []
+            logger.error(f"NMS 적용 중 오류 발생: {e}")
+    
+    # 앙상블 결과가 없으면 원본 결과 중 하나 사용 (YOLOv8m 우선)
+    for name in EnsembleEngine.MODEL_NAMES:
+        if name in detections and len(detections[name][0]) > 0:
+            logger.info(f"앙상블 없음, {name} 결과 사용: {len(detections[name][0])}개 객체 감지됨")
+            return detections[name]
+    
+    return [], [], []
+
+def _detection_agreement(result_a, result_b, iou_threshold=0.5):
+    """두 검출 결과의 일치율(같은 클래스, IoU 기준 매칭 비율)을 계산합니다."""
+    boxes_a, _, classes_a = result_a
+    boxes_b, _, classes_b = result_b
+    if len(boxes_a) == 0 and len(boxes_b) == 0:
+        return 1.0
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return 0.0
+    
+    iou = box_iou(boxes_a, boxes_b)
+    same_class = np.asarray(classes_a)[:, None] == np.asarray(classes_b)[None, :]
+    matches = ((iou >= iou_threshold) & same_class).any(axis=1).sum()
+    return float(matches) / max(len(boxes_a), len(boxes_b))
+
+def _skip_shadow_check():
+    """건너뛴 재검증을 통계에 기록합니다."""
+    with _adaptive_stats_lock:
+        _adaptive_stats['shadow_skipped'] += 1
+    record_metric('ensemble_shadow_check_skipped', 1)
+
+def _schedule_shadow_check(engine, image, early_result, conf_threshold):
+    """모델이 쉬고 있고 진행 중인 재검증이 없을 때만 전체 앙상블 재검증을 예약합니다.
+
+    재검증은 실제 요청과 같은 엔진과 모델 락을 사용하므로, 바쁠 때 실행하면 조기 종료로 아낀 시간을
+    다음 요청이 잃게 됩니다. 조건이 맞지 않으면 해당 샘플은 건너뜁니다.
+    """
+    if not engine.is_idle() or not _shadow_slot.acquire(blocking=False):
+        _skip_shadow_check()
+        return False
+    try:
+        _shadow_executor.submit(_record_shadow_check, engine, image, early_result, conf_threshold)
+    except Exception:
+        _shadow_slot.release()
+        raise
+    return True
+
+def _record_shadow_check(engine, image, early_result, conf_threshold):
+    """조기 종료된 요청을 전체 앙상블로 재실행하여 정확도 차이를 기록합니다."""
+    try:
+        # 예약 이후 요청이 들어와 모델이 사용 중이면 실행하지 않음
+        if not engine.is_idle():
+            _skip_shadow_check()
+            return
+        full_detections = engine.run(image, conf_threshold)
+        full_result = merge_class_based(full_detections, engine.class_names, conf_threshold)
+        agreement = _detection_agreement(early_result, full_result)
         
-        try:
-            results_l = model_l(img_path, conf=conf_threshold)[0]
-        except Exception as e:
-            logger.error(f"모델 L 추론 실패: {str(e)}")
-            return [], [], []
+        with _adaptive_stats_lock:
+            _adaptive_stats['shadow_checks'] += 1
+            _adaptive_stats['shadow_agreement_sum'] += agreement
         
-        # 결과를 결합하기 위한 빈 리스트
-        ensemble_boxes = []
-        ensemble_scores = []
-        ensemble_class_ids = []
+        record_metric('ensemble_early_exit_agreement', agreement, {
+            'early_detections': len(early_result[0]),
+            'full_detections': len(full_result[0])
+        })
+    except Exception as e:
+        logger.warning(f"조기 종료 검증 중 오류 발생: {e}")
+    finally:
+        _shadow_slot.release()
+
+def _adaptive_decision(engine, image, primary_detections, conf_threshold):
+    """첫 번째 모델 결과로 두 번째 모델을 건너뛸지 결정합니다. (first_result, skip_secondary) 반환
+    
+    첫 번째 모델의 신뢰도 높은 검출이 모두 해당 모델이 담당하는 클래스이고
+    애매한 저신뢰도 박스가 없으면 두 번째 모델을 건너뜁니다.
+    """
+    primary = ADAPTIVE_PRIMARY_MODEL
+    boxes, scores, class_ids = primary_detections
+    confident = scores >= conf_threshold
+    first_result = (boxes[confident], scores[confident], class_ids[confident])
+    
+    owned = all(
+        CLASS_MODEL_MAPPING.get(engine.class_names[class_id]) == primary
+        for class_id in first_result[2]
+    )
+    has_ambiguous = bool((~confident).any())
+    skip_secondary = bool(confident.any()) and owned and not has_ambiguous
+    
+    with _adaptive_stats_lock:
+        _adaptive_stats['requests'] += 1
+        if skip_secondary:
+            _adaptive_stats['skipped'] += 1
+    record_metric('ensemble_second_model_skipped', 1 if skip_secondary else 0, {
+        'primary_detections': len(first_result[0]),
+        'ambiguous': has_ambiguous
+    })
+    
+    # 샘플링된 요청은 모델이 쉬고 있을 때 백그라운드에서 전체 앙상블과 비교
+    if skip_secondary and random.random() < ensemble_settings['shadow_rate']:
+        _schedule_shadow_check(engine, image, first_result, conf_threshold)
+    return first_result, skip_secondary
+
+def _run_adaptive(engine, image, conf_threshold):
+    """저비용 모델을 먼저 실행하고, 필요한 경우에만 두 번째 모델을 실행합니다."""
+    primary, secondary = ADAPTIVE_PRIMARY_MODEL, ADAPTIVE_SECONDARY_MODEL
+    ambiguous_threshold = min(ensemble_settings['ambiguous_threshold'], conf_threshold)
+    
+    # 애매한 박스까지 확인하기 위해 낮은 임계값으로 첫 번째 모델 실행
+    primary_detections = engine.run(image, ambiguous_threshold, names=(primary,))[primary]
+    first_result, skip_secondary = _adaptive_decision(engine, image, primary_detections, conf_threshold)
+    if skip_secondary:
+        return {primary: first_result}
+    
+    detections = engine.run(image, conf_threshold, names=(secondary,))
+    detections[primary] = first_result
+    return detections
+
+def _run_adaptive_batch(engine, images, conf_threshold):
+    """적응형 앙상블의 배치 버전: 첫 번째 모델을 배치로 실행한 뒤 필요한 이미지만 두 번째 모델 배치로 보냅니다."""
+    primary, secondary = ADAPTIVE_PRIMARY_MODEL, ADAPTIVE_SECONDARY_MODEL
+    ambiguous_threshold = min(ensemble_settings['ambiguous_threshold'], conf_threshold)
+    
+    batch_detections = []
+    pending = []
+    first_pass = engine.run_batch(images, ambiguous_threshold, names=(primary,))
+    for i, (image, detections) in enumerate(zip(images, first_pass)):
+        first_result, skip_secondary = _adaptive_decision(engine, image, detections[primary], conf_threshold)
+        batch_detections.append({primary: first_result})
+        if not skip_secondary:
+            pending.append(i)
+    
+    if pending:
+        second_pass = engine.run_batch([images[i] for i in pending], conf_threshold, names=(secondary,))
+        for i, detections in zip(pending, second_pass):
+            batch_detections[i].update(detections)
+    return batch_detections
+
+def get_adaptive_ensemble_stats():
+    """적응형 앙상블의 건너뛰기 비율과 정확도 차이 통계를 반환합니다."""
+    with _adaptive_stats_lock:
+        stats = dict(_adaptive_stats)
+    stats['skip_rate'] = stats['skipped'] / stats['requests'] if stats['requests'] else 0.0
+    stats['mean_agreement'] = (stats['shadow_agreement_sum'] / stats['shadow_checks']
+                               if stats['shadow_checks'] else None)
+    return stats
+
+def run_ensemble(engine, image, conf_threshold=0.25):
+    """앙상블 엔진으로 이미지 한 장을 추론하고 클래스별로 결합한 (boxes, scores, class_ids)를 반환합니다.
+    
+    결과 캐시와 추론 서버를 거치지 않습니다. (적응형 모드에서는 필요 시에만 두 번째 모델 실행)
+    """
+    if ensemble_settings['mode'] == 'adaptive':
+        detections = _run_adaptive(engine, image, conf_threshold)
+    else:
+        detections = engine.run(image, conf_threshold)
+    return merge_class_based(detections, engine.class_names, conf_threshold)
+
+def run_ensemble_batch(engine, images, conf_threshold=0.25):
+    """run_ensemble()의 배치 버전: 모델당 한 번의 배치 호출로 이미지별 결합 결과 목록을 반환합니다."""
+    if not images:
+        return []
+    if ensemble_settings['mode'] == 'adaptive':
+        batch_detections = _run_adaptive_batch(engine, images, conf_threshold)
+    else:
+        batch_detections = engine.run_batch(images, conf_threshold)
+    return [merge_class_based(detections, engine.class_names, conf_threshold) for detections in batch_detections]
+
+def ensemble_predictions_class_based(img_path, conf_threshold=0.25):
+    """클래스별 선택적 앙상블 방식으로 두 모델의 예측을 결합합니다.
+    
+    img_path에는 파일 경로 또는 load_image()로 디코딩된 DecodedImage를 전달할 수 있습니다.
+    """
+    try:
+        # 이미지 디코딩 (이미 디코딩된 경우 재사용)
+        image = load_image(img_path)
+        if image is None:
+            logger.error(f"이미지 검증 실패: {img_path}")
+            return [], [], []
         
-        # 클래스 이름 가져오기
-        class_names = results_m.names
+        # 같은(또는 거의 같은) 이미지의 이전 결과가 있으면 추론 생략
+        cached = result_cache.get(image, conf_threshold)
+        if cached is not None:
+            logger.info(f"캐시된 인식 결과 사용: {len(cached['boxes'])}개 객체 "
+                        f"({'동일' if cached['exact'] else '유사'} 이미지)")
+            return cached['boxes'], cached['scores'], cached['class_ids']
         
-        # 첫 번째 모델(YOLOv8m)의 결과 처리
-        if hasattr(results_m, 'boxes') and len(results_m.boxes) > 0:
+        # 모델을 로드하지 않은 프로세스는 추론 서버에 요청
+        client = get_inference_client()
+        if client is not None and models['model_m'] is None:
             try:
-                boxes_m = results_m.boxes.xyxy.cpu().numpy()
-                scores_m = results_m.boxes.conf.cpu().numpy()
-                class_ids_m = results_m.boxes.cls.cpu().numpy().astype(int)
-                
-                # 모델 M의 결과에서 각 클래스별로 선택
-                for i in range(len(boxes_m)):
-                    class_id = class_ids_m[i]
-                    class_name = class_names[class_id]
-                    
-                    # 매핑 테이블에서 이 클래스에 최적인 모델 확인
-                    if class_name in CLASS_MODEL_MAPPING and CLASS_MODEL_MAPPING[class_name] == 'model_m':
-                        ensemble_boxes.append(boxes_m[i])
-                        ensemble_scores.append(scores_m[i])
-                        ensemble_class_ids.append(class_id)
+                boxes, scores, class_ids = client.detect(image, conf_threshold)
             except Exception as e:
-                logger.warning(f"YOLOv8m 결과 처리 중 오류 발생: {e}")
+                logger.error(f"추론 서버 요청 실패: {str(e)}")
+                return [], [], []
+            result_cache.put(image, boxes, scores, class_ids, conf_threshold)
+            return boxes, scores, class_ids
         
-        # 두 번째 모델(YOLOv8l)의 결과 처리
-        if hasattr(results_l, 'boxes') and len(results_l.boxes) > 0:
-            try:
-                boxes_l = results_l.boxes.xyxy.cpu().numpy()
-                scores_l = results_l.boxes.conf.cpu().numpy()
-                class_ids_l = results_l.boxes.cls.cpu().numpy().astype(int)
-                
-                # 모델 L의 결과에서 각 클래스별로 선택
-                for i in range(len(boxes_l)):
-                    class_id = class_ids_l[i]
-                    class_name = class_names[class_id]
-                    
-                    # 매핑 테이블에서 이 클래스에 최적인 모델 확인
-                    if class_name in CLASS_MODEL_MAPPING and CLASS_MODEL_MAPPING[class_name] == 'model_l':
-                        ensemble_boxes.append(boxes_l[i])
-                        ensemble_scores.append(scores_l[i])
-                        ensemble_class_ids.append(class_id)
-            except Exception as e:
-                logger.warning(f"YOLOv8l 결과 처리 중 오류 발생: {e}")
+        # 앙상블 엔진 가져오기
+        engine = get_ensemble_engine()
+        if engine is None:
+            logger.error("모델이 초기화되지 않았습니다.")
+            return [], [], []
         
-        # 결합된 결과에 NMS 적용
-        if ensemble_boxes:
-            ensemble_boxes = np.array(ensemble_boxes)
-            ensemble_scores = np.array(ensemble_scores)
-            ensemble_class_ids = np.array(ensemble_class_ids)
-            
-            # NMS 적용 - 입력 형식 확인
-            if len(ensemble_boxes) > 0:
-                try:
-                    indices = cv2.dnn.NMSBoxes(
-                        ensemble_boxes.tolist(), 
-                        ensemble_scores.tolist(), 
-                        conf_threshold, 
-                        0.45
-                    )
-                    
-                    filtered_boxes = []
-                    filtered_scores = []
-                    filtered_class_ids = []
-                    
-                    # OpenCV 버전에 따라 indices 형식이 다를 수 있으므로 안전하게 처리
-                    if isinstance(indices, np.ndarray):
-                        # 최신 OpenCV 버전
-                        for idx in indices:
-                            filtered_boxes.append(ensemble_boxes[idx])
-                            filtered_scores.append(ensemble_scores[idx])
-                            filtered_class_ids.append(int(ensemble_class_ids[idx]))
-                    else:
-                        # 이전 OpenCV 버전
-                        for i in indices:
-                            idx = i if isinstance(i, int) else i[0]
-                            filtered_boxes.append(ensemble_boxes[idx])
-                            filtered_scores.append(ensemble_scores[idx])
-                            filtered_class_ids.append(int(ensemble_class_ids[idx]))
-                    
-                    # 성능 측정 종료
-                    elapsed_time = time.time() - start_time
-                    
-                    # 결과 로깅
-                    logger.info(f"앙상블 결과: {len(filtered_boxes)}개 객체 감지됨 ({elapsed_time:.2f}초)")
-                    
-                    return filtered_boxes, filtered_scores, filtered_class_ids
-                except Exception as e:
-                    logger.error(f"NMS 적용 중 오류 발생: {e}")
+        # 성능 측정 시작
+        start_time = time.time()
         
-        # 앙상블 결과가 없으면 원본 결과 중 하나 사용
-        if hasattr(results_m, 'boxes') and len(results_m.boxes) > 0:
-            try:
-                boxes = results_m.boxes.xyxy.cpu().numpy()
-                scores = results_m.boxes.conf.cpu().numpy()
-                class_ids = results_m.boxes.cls.cpu().numpy().astype(int)
-                
-                # 성능 측정 종료
-                elapsed_time = time.time() - start_time
-                
-                logger.info(f"앙상블 없음, YOLOv8m 결과 사용: {len(boxes)}개 객체 감지됨 ({elapsed_time:.2f}초)")
-                return boxes, scores, class_ids
-            except Exception as e:
-                logger.warning(f"YOLOv8m 결과 대체 처리 중 오류 발생: {e}")
+        try:
+            boxes, scores, class_ids = run_ensemble(engine, image, conf_threshold)
+        except Exception as e:
+            logger.error(f"앙상블 추론 실패: {str(e)}")
+            return [], [], []
         
-        if hasattr(results_l, 'boxes') and len(results_l.boxes) > 0:
-            try:
-                boxes = results_l.boxes.xyxy.cpu().numpy()
-                scores = results_l.boxes.conf.cpu().numpy()
-                class_ids = results_l.boxes.cls.cpu().numpy().astype(int)
-                
-                # 성능 측정 종료
-                elapsed_time = time.time() - start_time
-                
-                logger.info(f"앙상블 없음, YOLOv8l 결과 사용: {len(boxes)}개 객체 감지됨 ({elapsed_time:.2f}초)")
-                return boxes, scores, class_ids
-            except Exception as e:
-                logger.warning(f"YOLOv8l 결과 대체 처리 중 오류 발생: {e}")
+        result_cache.put(image, boxes, scores, class_ids, conf_threshold)
         
-        # 결과가 없는 경우
+        # 성능 측정 종료
         elapsed_time = time.time() - start_time
-        logger.warning(f"앙상블 및 개별 모델 결과 모두 처리 실패 ({elapsed_time:.2f}초)")
-        return [], [], []
+        logger.info(f"앙상블 결과: {len(boxes)}개 객체 감지됨 ({elapsed_time:.2f}초)")
+        return boxes, scores, class_ids
     except Exception as e:
         logger.error(f"앙상블 예측 중 예기치 않은 오류 발생: {e}", exc_info=True)
         return [], [], []
 
-def verify_image(img_path):
-    """이미지 파일을 검증합니다."""
+def ensemble_predictions_batch(images, conf_threshold=0.25):
+    """대기 중인 여러 이미지를 배치로 추론하여 이미지별 앙상블 결과 목록을 반환합니다.
+    
+    단일 이미지 경로와 같이 결과 캐시를 먼저 확인하고, 적응형 모드 설정을 따릅니다.
+    """
+    decoded = [load_image(image) for image in images]
+    results = [([], [], []) for _ in images]
+    
+    # 캐시에 없는 이미지만 추론
+    misses = []
+    for i, image in enumerate(decoded):
+        if image is None:
+            continue
+        cached = result_cache.get(image, conf_threshold)
+        if cached is not None:
+            results[i] = (cached['boxes'], cached['scores'], cached['class_ids'])
+        else:
+            misses.append(i)
+    
+    engine = get_ensemble_engine()
+    if engine is None or not misses:
+        return results
+    
     try:
-        if not os.path.exists(img_path):
-            logger.error(f"이미지 파일이 존재하지 않습니다: {img_path}")
-            return False
-        
-        # OpenCV로 이미지 읽기 테스트
-        img = cv2.imread(img_path)
-        if img is None or img.size == 0:
-            logger.error(f"이미지 파일을 읽을 수 없습니다: {img_path}")
-            return False
-        
-        # 이미지 크기가 너무 작은지 확인
-        if img.shape[0] < 10 or img.shape[1] < 10:
-            logger.error(f"이미지 크기가 너무 작습니다: {img.shape}")
-            return False
-        
-        return True
+        merged = run_ensemble_batch(engine, [decoded[i] for i in misses], conf_threshold)
     except Exception as e:
-        logger.error(f"이미지 검증 중 예기치 않은 오류: {e}", exc_info=True)
-        return False
+        logger.error(f"배치 앙상블 추론 실패: {str(e)}")
+        return results
+    
+    for i, (boxes, scores, class_ids) in zip(misses, merged):
+        result_cache.put(decoded[i], boxes, scores, class_ids, conf_threshold)
+        results[i] = (boxes, scores, class_ids)
+    return results
+
+def verify_image(img_path):
+    """이미지 파일을 검증합니다. (경로 또는 DecodedImage)"""
+    return load_image(img_path) is not None
 
 def get_class_to_metadata_mapping():
     """클래스 이름과 메타데이터 이름 간의 매핑을 반환합니다."""
@@ -7,18 +7,21 @@ from datetime import datetime
 from flask import current_app, url_for
 from bson import json_util
 
+from modules.vision import load_image
+
 def create_text_overlay_image(img_path, boxes, scores, class_ids, class_names, food_info=None):
     """
     인식 결과에 텍스트 오버레이를 추가한 이미지 생성 (영어로만 표시)
+    img_path에는 파일 경로 또는 이미 디코딩된 DecodedImage를 전달할 수 있습니다.
     """
     try:
-        # 이미지 로드
-        img = cv2.imread(img_path)
-        if img is None:
+        # 이미지 로드 (이미 디코딩된 경우 재사용)
+        image = load_image(img_path)
+        if image is None:
             return None
             
         # 이미지 복사
-        result_img = img.copy()
+        result_img = image.array.copy()
         
         # 사용된 모델 정보 표시 - 오른쪽 상단으로 이동
         model_info = "YOLOv8 Ensemble Model"
@@ -135,7 +138,7 @@ def create_text_overlay_image(img_path, boxes, scores, class_ids, class_names, f
         output_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'results')
         os.makedirs(output_dir, exist_ok=True)
         
-        base_filename = os.path.basename(img_path)
+        base_filename = os.path.basename(image.path)
         filename, ext = os.path.splitext(base_filename)
         result_filename = f"{timestamp}_{filename}_result{ext}"
         result_path = os.path.join(output_dir, result_filename)
@@ -154,9 +157,11 @@ def generate_modal_data(img_path, boxes, scores, class_ids, class_names, food_in
     모달 윈도우용 데이터 생성
     """
     try:
-        # 이미지 base64 인코딩
-        with open(img_path, 'rb') as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+        # 이미지 base64 인코딩 (디코딩 시 읽은 원본 바이트 재사용)
+        image = load_image(img_path)
+        if image is None:
+            return None
+        img_base64 = base64.b64encode(image.data).decode('utf-8')
         
         # 인식 결과 데이터 생성
         detection_data = []
@@ -87,6 +87,7 @@ def test_recommendation_performance():
         
         individual_time = time.time() - start_time
         logger.info(f"개별 유사도 계산 시간: {individual_time:.4f}초")
+        logger.info(f"쌍 유사도 캐시 통계: {recommender.get_cache_stats()}")
         
         # 배치 계산 시간 측정
         start_time = time.time()
@@ -101,5 +102,292 @@ def test_recommendation_performance():
         batch_improvement = ((individual_time - batch_time) / individual_time) * 100
         logger.info(f"배치 처리 성능 향상: {batch_improvement:.2f}%")
 
+def _legacy_cv2_nms(boxes, scores, class_ids, conf_threshold=0.25, iou_threshold=0.45):
+    """비교용: 기존 앙상블에서 사용하던 cv2.dnn.NMSBoxes 기반 처리 경로"""
+    import cv2
+    import numpy as np
+    
+    ensemble_boxes = np.array(list(boxes))
+    ensemble_scores = np.array(list(scores))
+    ensemble_class_ids = np.array(list(class_ids))
+    indices = cv2.dnn.NMSBoxes(ensemble_boxes.tolist(), ensemble_scores.tolist(), conf_threshold, iou_threshold)
+    
+    filtered_boxes, filtered_scores, filtered_class_ids = [], [], []
+    for idx in np.array(indices).flatten():
+        filtered_boxes.append(ensemble_boxes[idx])
+        filtered_scores.append(ensemble_scores[idx])
+        filtered_class_ids.append(int(ensemble_class_ids[idx]))
+    return filtered_boxes, filtered_scores, filtered_class_ids
+
+def benchmark_nms(n_boxes=(10, 50, 300), n_classes=25, repeats=200):
+    """기존 cv2.dnn.NMSBoxes 경로와 벡터화된 클래스별 NMS의 처리 시간을 비교합니다."""
+    import numpy as np
+    from modules.vision import non_max_suppression, weighted_box_fusion
+    
+    rng = np.random.default_rng(0)
+    for n in n_boxes:
+        xy = rng.uniform(0, 1000, (n, 2))
+        wh = rng.uniform(20, 300, (n, 2))
+        boxes = np.hstack([xy, xy + wh]).astype(np.float32)
+        scores = rng.uniform(0.25, 1.0, n).astype(np.float32)
+        class_ids = rng.integers(0, n_classes, n)
+        
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            _legacy_cv2_nms(boxes, scores, class_ids)
+        legacy_time = (time.perf_counter() - start_time) / repeats
+        
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            keep = non_max_suppression(boxes, scores, class_ids, 0.45, 0.25)
+            boxes[keep], scores[keep], class_ids[keep]
+        vectorized_time = (time.perf_counter() - start_time) / repeats
+        
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            weighted_box_fusion(boxes, scores, class_ids, score_threshold=0.25)
+        wbf_time = (time.perf_counter() - start_time) / repeats
+        
+        logger.info(f"NMS 벤치마크 (박스 {n}개): cv2 경로 {legacy_time * 1000:.3f}ms, "
+                    f"벡터화 클래스별 NMS {vectorized_time * 1000:.3f}ms, WBF {wbf_time * 1000:.3f}ms")
+
+def _synthetic_foods(n_foods, n_families=100, n_ingredients=600, seed=0):
+    """벤치마크용 가상 음식 메타데이터를 생성합니다. (실제 메뉴처럼 비슷한 음식 계열로 묶임)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    attrs = ('spiciness', 'sweetness', 'saltiness', 'sourness', 'umami')
+    methods = ['볶기', '끓이기', '굽기', '찌기', '튀기기', '무치기', '삶기', '조리기']
+    families = [{
+        'taste': rng.integers(0, 6, size=len(attrs)),
+        'ingredients': rng.choice(n_ingredients, size=10, replace=False),
+        'method': methods[rng.integers(len(methods))]
+    } for _ in range(n_families)]
+
+    foods = []
+    for i in range(n_foods):
+        family = families[rng.integers(n_families)]
+        # 계열의 맛 점수를 조금 바꾸고 재료 일부를 교체
+        taste = np.clip(family['taste'] + rng.integers(-1, 2, size=len(attrs)), 0, 5)
+        kept = rng.choice(family['ingredients'], size=rng.integers(5, 9), replace=False)
+        extra = rng.choice(n_ingredients, size=rng.integers(1, 4), replace=False)
+        ingredients = [f'재료{j}' for j in dict.fromkeys(list(kept) + list(extra))]
+        foods.append({
+            'dishId': str(i),
+            'nameKo': f'음식{i}',
+            'nameEn': f'Food {i}',
+            'taste': {attr: int(value) for attr, value in zip(attrs, taste)},
+            'ingredients': {'main': ingredients[:3], 'sub': ingredients[3:]},
+            'cookingMethod': {'primary': family['method']}
+        })
+    return foods
+
+class _InMemoryCatalog:
+    """벤치마크용 메모리 카탈로그 DB (FoodRecommender가 사용하는 foods.find와 meta.find_one만 지원)"""
+
+    class _Collection:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def find(self, query=None, projection=None):
+            return [dict(doc) for doc in self.docs]
+
+        def find_one(self, query=None, projection=None):
+            return dict(self.docs[0]) if self.docs else None
+
+    def __init__(self, foods):
+        self.foods = self._Collection(foods)
+        self.meta = self._Collection([])
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def benchmark_similarity_index(n_foods=(1000, 5000, 20000), k=10, n_queries=200,
+                               lsh_configs=((8, 10), (16, 10), (16, 12)), foods=None):
+    """FoodRecommender의 dense 모드(N x N 행렬)와 인덱스 모드(exact/LSH)를 같은 카탈로그로 비교합니다.
+
+    모드별 초기 계산 시간, 보관 배열 메모리, find_similar 지연 시간과 exact 대비 recall@k를 출력합니다.
+    foods를 주면 실제 음식 메타데이터를 사용하고, 없으면 음식 계열로 묶인 가상 카탈로그를 만듭니다.
+    """
+    import numpy as np
+
+    for n in n_foods:
+        catalog = foods[:n] if foods else _synthetic_foods(n)
+        n = len(catalog)
+        dish_ids = [str(food['dishId']) for food in catalog]
+        queries = [dish_ids[i] for i in np.random.default_rng(1).choice(n, size=min(n_queries, n), replace=False)]
+
+        configs = [('dense', {'dense_max_foods': n})] if n <= 5000 else []
+        configs.append(('exact 인덱스', {'dense_max_foods': 0, 'index_backend': 'exact'}))
+        configs += [
+            (f'lsh(tables={num_tables}, bits={num_bits})', {
+                'dense_max_foods': 0, 'index_backend': 'lsh',
+                'index_options': {'num_tables': num_tables, 'num_bits': num_bits}
+            })
+            for num_tables, num_bits in lsh_configs
+        ]
+
+        truth = None
+        for name, options in configs:
+            recommender = FoodRecommender(_InMemoryCatalog(catalog), top_k=k, refresh_interval=3600, **options)
+            start_time = time.perf_counter()
+            recommender.initialize()
+            refresh_s = time.perf_counter() - start_time
+            with recommender.matrices.lock:
+                _, arrays = recommender.matrices.get_state()
+                memory_mb = sum(array.nbytes for array in arrays.values()) / 1024 ** 2
+
+            start_time = time.perf_counter()
+            results = {dish_id: {item['dishId'] for item in recommender.find_similar(dish_id, k)} for dish_id in queries}
+            query_ms = (time.perf_counter() - start_time) / len(queries) * 1000
+
+            # dense와 exact 인덱스는 같은 결과이므로 먼저 계산한 쪽을 기준으로 사용
+            if truth is None:
+                truth = results
+            recall = np.mean([len(results[q] & truth[q]) / max(len(truth[q]), 1) for q in queries])
+            logger.info(
+                f"[{n}개 음식] {name}: 초기 계산 {refresh_s:.2f}s, 배열 {memory_mb:.1f}MB, "
+                f"find_similar {query_ms:.3f}ms/질의, recall@{k}={recall:.3f}"
+            )
+
+MENU_WORDS = ('BIBIMBAP', 'BULGOGI', 'KIMCHI', 'JJIGAE', 'JAPCHAE', 'TTEOKBOKKI', 'SAMGYEOPSAL',
+              'GALBI', 'NAENGMYEON', 'KIMBAP', 'SUNDUBU', 'DOENJANG', 'HAEMUL', 'PAJEON', 'MANDU')
+
+def _synthetic_menu_image(height=3000, width=4000, n_lines=16, font_scale=2.5, seed=0):
+    """메뉴판처럼 음식 이름과 가격이 줄지어 있는 합성 이미지와 정답 단어 집합을 반환합니다."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    words = set()
+    line_height = (height - 300) // n_lines
+    for row in range(n_lines):
+        name = ' '.join(rng.choice(MENU_WORDS, size=2, replace=False))
+        price = f"{int(rng.integers(5, 30)) * 1000}"
+        words.update(name.split() + [price])
+        y = 200 + row * line_height
+        cv2.putText(image, name, (200, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (30, 30, 30), 6)
+        cv2.putText(image, price, (width - 900, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (30, 30, 30), 6)
+    return image, words
+
+def _recognized_words(items):
+    """OCR 결과의 단어 집합 (대문자, 쉼표 제거)"""
+    return {word for item in items for word in item['text'].upper().replace(',', '').split()}
+
+def benchmark_ocr_preprocessing(image_paths=None, repeats=3, target_text_height=28):
+    """원본 입력과 적응형 축소 전처리 입력의 EasyOCR 검출 시간과 인식 정확도(단어 재현율)를 비교합니다.
+
+    전처리 이미지는 검출에만 사용하고 인식은 원본 해상도에서 수행합니다.
+    image_paths를 주면 실제 메뉴판 사진을 사용하고, 정답 대신 원본 입력의 인식 결과를 기준으로 비교합니다.
+    """
+    import cv2
+    from modules.ocr import OCRReader, OCRPreprocessor, _load_image
+
+    reader = OCRReader.get_instance(app)
+    if not reader.initialize(app):
+        logger.error("EasyOCR 모델을 로드할 수 없어 전처리 벤치마크를 건너뜁니다.")
+        return
+
+    if image_paths:
+        samples = [(path, _load_image(path), None) for path in image_paths]
+    else:
+        samples = [(f"합성 메뉴판 {i}", *_synthetic_menu_image(seed=i)) for i in range(2)]
+
+    configs = (
+        ('원본', OCRPreprocessor(enabled=False)),
+        ('전처리', OCRPreprocessor(enabled=True, target_text_height=target_text_height)),
+        ('전처리+대비', OCRPreprocessor(enabled=True, target_text_height=target_text_height, contrast=True))
+    )
+
+    for name, image, truth in samples:
+        if image is None:
+            logger.error(f"이미지를 읽을 수 없습니다: {name}")
+            continue
+
+        for config_name, preprocessor in configs:
+            start_time = time.perf_counter()
+            prepared = preprocessor.prepare(image)
+            preprocess_ms = (time.perf_counter() - start_time) * 1000
+
+            rgb = cv2.cvtColor(prepared.image, cv2.COLOR_BGR2RGB)
+            detect_times = []
+            with reader.pool.checkout() as ocr_reader:
+                for _ in range(repeats):
+                    start_time = time.perf_counter()
+                    ocr_reader.detect(rgb)
+                    detect_times.append(time.perf_counter() - start_time)
+
+                start_time = time.perf_counter()
+                items = reader._recognize_whole(ocr_reader, image, prepared)
+                total_ms = (time.perf_counter() - start_time) * 1000 + preprocess_ms
+            detect_ms = min(detect_times) * 1000
+
+            found = _recognized_words(items)
+            if truth is None:
+                # 실제 사진은 원본 입력 결과를 기준으로 비교
+                truth = found
+            recall = len(found & truth) / max(len(truth), 1)
+
+            logger.info(
+                f"[{name}] {config_name}: 입력 {prepared.image.shape[1]}x{prepared.image.shape[0]} "
+                f"(배율 {prepared.scale:.2f}), 전처리 {preprocess_ms:.0f}ms, 검출 {detect_ms:.0f}ms, "
+                f"전체 {total_ms:.0f}ms, 단어 재현율 {recall:.3f} ({len(items)}개 영역)"
+            )
+
+def benchmark_ocr_tiling(image_paths=None, repeats=2):
+    """큰 메뉴판 이미지에서 전체 이미지 OCR과 타일 OCR의 처리 시간과 단어 재현율을 비교합니다.
+
+    타일 OCR의 병렬 인식은 리더 풀이 2개 이상(OCR_POOL_SIZE)이고 OCR_TILED가 켜진 상태로 초기화된 경우에만 사용됩니다.
+    """
+    from modules.ocr import OCRReader, _load_image
+
+    reader = OCRReader.get_instance(app)
+    if not reader.initialize(app):
+        logger.error("EasyOCR 모델을 로드할 수 없어 타일 OCR 벤치마크를 건너뜁니다.")
+        return
+
+    if image_paths:
+        samples = [(path, _load_image(path), None) for path in image_paths]
+    else:
+        samples = [(f"합성 메뉴판 {i}", *_synthetic_menu_image(seed=i)) for i in range(2)]
+
+    modes = (
+        ('전체 이미지', reader._recognize_whole),
+        ('타일', reader._recognize_tiled)
+    )
+    logger.info(f"타일 OCR 설정: 작업자 {reader.tile_workers}개, 리더 풀 {reader.pool_size}개, "
+                f"검출 최대 변 {reader.detect_max_side}px, 병렬 인식 {'사용' if reader._executor else '사용 안 함'}")
+
+    for name, image, truth in samples:
+        if image is None:
+            logger.error(f"이미지를 읽을 수 없습니다: {name}")
+            continue
+
+        elapsed = {}
+        for mode_name, recognize in modes:
+            times = []
+            for _ in range(repeats):
+                with reader.pool.checkout() as ocr_reader:
+                    start_time = time.perf_counter()
+                    items = recognize(ocr_reader, image)
+                    times.append(time.perf_counter() - start_time)
+            elapsed[mode_name] = min(times) * 1000
+
+            found = _recognized_words(items)
+            if truth is None:
+                # 실제 사진은 전체 이미지 결과를 기준으로 비교
+                truth = found
+            recall = len(found & truth) / max(len(truth), 1)
+            logger.info(f"[{name}] {mode_name}: {elapsed[mode_name]:.0f}ms, "
+                        f"단어 재현율 {recall:.3f} ({len(items)}개 영역)")
+
+        logger.info(f"[{name}] 타일 OCR 속도 향상: "
+                    f"{elapsed['전체 이미지'] / max(elapsed['타일'], 1e-6):.2f}배 "
+                    f"({image.shape[1]}x{image.shape[0]})")
+
 if __name__ == "__main__":
-    test_recommendation_performance()
\ No newline at end of file
+    test_recommendation_performance()
+    benchmark_nms()
+    benchmark_similarity_index()
+    benchmark_ocr_preprocessing()
+    benchmark_ocr_tiling()
\ No newline at end of file
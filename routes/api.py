@@ -1,8 +1,10 @@
 # routes/api.py
 import logging
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, session
 
 from modules.database import get_food_info, get_db
+from modules.food_index import bump_catalog_version
+from modules.personalization import UserProfile
 from modules.recommender import get_recommender
 
 logger = logging.getLogger(__name__)
@@ -47,6 +49,10 @@ def add_food_api():
         
         # 데이터 삽입
         result = db.foods.insert_one(data)
+        catalog_version = bump_catalog_version(db)
+        
+        # 새 음식의 행/열만 유사도 행렬에 반영
+        _apply_food_change(data, catalog_version)
         return jsonify({
             'success': True, 
             'message': '음식 정보가 추가되었습니다.',
@@ -57,6 +63,72 @@ def add_food_api():
         logger.error(f"음식 정보 추가 중 오류 발생: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@api_bp.route('/food/<dish_id>', methods=['PUT'])
+def update_food_api(dish_id):
+    """음식 정보 수정 API"""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'success': False, 'error': '요청 데이터가 없습니다.'}), 400
+        
+        # dishId와 _id는 변경할 수 없음
+        updates = {key: value for key, value in data.items() if key not in ('_id', 'dishId', 'similarFoods')}
+        if not updates:
+            return jsonify({'success': False, 'error': '수정할 필드가 없습니다.'}), 400
+        
+        db = get_db()
+        result = db.foods.update_one(_dish_id_query(dish_id), {'$set': updates})
+        if result.matched_count == 0:
+            return jsonify({'success': False, 'error': f'존재하지 않는 dishId: {dish_id}'}), 404
+        catalog_version = bump_catalog_version(db)
+        
+        # 수정된 음식의 행/열만 유사도 행렬에 반영
+        food = db.foods.find_one(_dish_id_query(dish_id), {'_id': 0})
+        if food:
+            _apply_food_change(food, catalog_version)
+        return jsonify({'success': True, 'message': '음식 정보가 수정되었습니다.'})
+        
+    except Exception as e:
+        logger.error(f"음식 정보 수정 중 오류 발생: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/food/<dish_id>', methods=['DELETE'])
+def delete_food_api(dish_id):
+    """음식 정보 삭제 API"""
+    try:
+        db = get_db()
+        food = db.foods.find_one(_dish_id_query(dish_id), {'_id': 0, 'dishId': 1})
+        if not food:
+            return jsonify({'success': False, 'error': f'존재하지 않는 dishId: {dish_id}'}), 404
+        
+        db.foods.delete_one(_dish_id_query(dish_id))
+        catalog_version = bump_catalog_version(db)
+        
+        # 삭제된 음식을 이웃으로 가진 목록만 다시 계산
+        recommender = get_recommender()
+        if recommender:
+            recommender.remove_food(food['dishId'], catalog_version)
+        return jsonify({'success': True, 'message': '음식 정보가 삭제되었습니다.'})
+        
+    except Exception as e:
+        logger.error(f"음식 정보 삭제 중 오류 발생: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _dish_id_query(dish_id):
+    """문자열/숫자로 저장된 dishId 모두와 일치하는 쿼리를 만듭니다."""
+    try:
+        return {'dishId': {'$in': [dish_id, int(dish_id)]}}
+    except (ValueError, TypeError):
+        return {'dishId': dish_id}
+
+def _apply_food_change(food, catalog_version=None):
+    """음식 추가/수정을 추천 시스템에 증분 반영합니다."""
+    recommender = get_recommender()
+    if recommender:
+        result = recommender.add_or_update_food(food, catalog_version)
+        if not result.get('success', False):
+            logger.warning(f"유사도 증분 갱신 실패: {result.get('error')}")
+
 @api_bp.route('/recommendations/<int:food_id>')
 def get_recommendations(food_id):
     """유사 음식 추천 API"""
@@ -66,6 +138,19 @@ def get_recommendations(food_id):
             return jsonify({'success': False, 'error': '추천 시스템이 초기화되지 않았습니다.'}), 500
             
         top_n = request.args.get('limit', default=3, type=int)
+        
+        # 로그인 사용자의 선호도가 있으면 개인화 추천 (personalized=0으로 끌 수 있음)
+        preferences = session.get('preferences')
+        if preferences and request.args.get('personalized', default=1, type=int):
+            profile = UserProfile.from_preferences(preferences)
+            if not profile.is_empty:
+                recommendations = recommender.get_personalized_recommendations(food_id, preferences, top_n=top_n)
+                return jsonify({
+                    'success': True,
+                    'recommendations': recommendations,
+                    'profile': profile.to_dict()
+                })
+        
         recommendations = recommender.get_food_recommendations(food_id, top_n=top_n)
         
         return jsonify({'success': True, 'recommendations': recommendations})
@@ -36,6 +36,8 @@ def login():
             session.clear()
             session['user_id'] = str(user['_id'])
             session['email'] = user['email']
+            # 추천 시 DB 조회 없이 쓰도록 선호도를 세션에 보관
+            session['preferences'] = user.get('preferences', {})
             
             # username이 있으면 저장, 없으면 이메일에서 추출
             if 'username' in user:
@@ -189,6 +191,11 @@ def preferences():
                     'preferences.preferred_categories': preferred_categories
                 }}
             )
+            session['preferences'] = {
+                'allergens': allergens,
+                'vegetarian': vegetarian,
+                'preferred_categories': preferred_categories
+            }
             
             flash('선호도 설정이 저장되었습니다.', 'success')
             return redirect(url_for('auth.profile'))
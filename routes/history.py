@@ -5,7 +5,10 @@ from bson.objectid import ObjectId
 import os
 from datetime import datetime
 
-from modules.database import get_recent_recognitions, get_recent_menu_recognitions, get_food_info, get_db
+from modules.database import (
+    get_recent_recognitions, get_recent_menu_recognitions, get_db,
+    get_unified_history, attach_food_snapshots
+)
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +18,10 @@ history_bp = Blueprint('history', __name__)
 def index():
     """인식 기록 메인 페이지"""
     try:
-        # 페이지네이션을 위한 파라미터
-        page = request.args.get('page', 1, type=int)
+        # 페이지네이션을 위한 파라미터 (커서 기준 이전/다음 페이지만 이동)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')  # 기준 기록 위치 (timestamp_id)
+        direction = request.args.get('direction', 'next')  # 'next': 더 오래된 기록, 'prev': 더 최근 기록
         
         # 필터링 옵션
         filter_type = request.args.get('type', 'all')  # 'all', 'food', 'menu'
@@ -46,34 +50,25 @@ def index():
         combined_filter = {**user_filter, **search_filter}
         
         db = get_db()
-        records = []
-        total_records = 0
         
-        # 기록 유형에 따라 다른 컬렉션에서 데이터 가져오기
+        # 목록 화면에 필요한 필드만 조회
+        projection = {
+            'image_path': 1, 'image_filename': 1, 'timestamp': 1, 'is_favorite': 1,
+            'user_id': 1, 'detected_foods': 1, 'original_text': 1, 'translated_text': 1
+        }
+        
+        # 기록 유형에 따라 다른 컬렉션에서 데이터 가져오기 (전체 개수는 세지 않음)
         if filter_type == 'menu':
-            # 메뉴판 인식 기록만 조회
-            menu_records = list(db.menu_recognitions.find(combined_filter).sort('timestamp', -1).skip((page - 1) * per_page).limit(per_page))
-            records = menu_records
-            total_records = db.menu_recognitions.count_documents(combined_filter)
+            collections = ('menu_recognitions',)
         elif filter_type == 'food':
-            # 음식 인식 기록만 조회
-            food_records = list(db.recognitions.find(combined_filter).sort('timestamp', -1).skip((page - 1) * per_page).limit(per_page))
-            records = food_records
-            total_records = db.recognitions.count_documents(combined_filter)
+            collections = ('recognitions',)
         else:
-            # 모든 인식 기록을 통합하여 조회 (타임스탬프 기준 정렬)
-            food_records = list(db.recognitions.find(combined_filter).sort('timestamp', -1))
-            menu_records = list(db.menu_recognitions.find(combined_filter).sort('timestamp', -1))
-            
-            # 두 컬렉션의 레코드를 타임스탬프로 통합하여 정렬
-            all_records = food_records + menu_records
-            all_records.sort(key=lambda x: x['timestamp'], reverse=True)
-            
-            # 페이지네이션 적용
-            start_index = (page - 1) * per_page
-            end_index = start_index + per_page
-            records = all_records[start_index:end_index] if start_index < len(all_records) else []
-            total_records = len(all_records)
+            # 모든 인식 기록을 통합하여 조회 (두 정렬 커서를 병합)
+            collections = ('recognitions', 'menu_recognitions')
+        records, next_cursor, prev_cursor = get_unified_history(
+            db, combined_filter, per_page, cursor=cursor, direction=direction,
+            projection=projection, collections=collections
+        )
         
         # 각 레코드에 타입 정보 추가
         for record in records:
@@ -93,36 +88,18 @@ def index():
             if 'timestamp' in record:
                 record['formatted_timestamp'] = record['timestamp'].strftime('%Y-%m-%d %H:%M')
         
-        # 음식 인식 기록에 음식 정보 추가
+        # 스냅샷이 없는 이전 기록은 인메모리 음식 인덱스로 채움 (DB 추가 조회 없음, 백필 전까지)
         for record in records:
-            if record['type'] == 'food' and 'detected_foods' in record and record['detected_foods']:
-                # 이미 음식 세부 정보가 저장되어 있는지 확인
-                if not any('nameKo' in food for food in record['detected_foods']):
-                    for i, food_data in enumerate(record['detected_foods']):
-                        food_name = food_data['food_name']
-                        food_info = get_food_info(food_name)
-                        if food_info:
-                            # ObjectId 제거
-                            if '_id' in food_info:
-                                food_info.pop('_id')
-                            
-                            # 기존 정보에 음식 세부 정보 추가
-                            record['detected_foods'][i].update({
-                                'nameKo': food_info.get('nameKo', food_name),
-                                'nameEn': food_info.get('nameEn', food_name),
-                                'allergens': food_info.get('allergens', []),
-                                'vegetarianStatus': food_info.get('vegetarianStatus', '알 수 없음')
-                            })
+            if record['type'] == 'food' and record.get('detected_foods'):
+                attach_food_snapshots(record['detected_foods'])
         
         # 페이지네이션 정보
-        total_pages = (total_records + per_page - 1) // per_page
         pagination = {
-            'page': page,
             'per_page': per_page,
-            'total_records': total_records,
-            'total_pages': total_pages,
-            'has_prev': page > 1,
-            'has_next': page < total_pages
+            'has_prev': prev_cursor is not None,
+            'has_next': next_cursor is not None,
+            'prev_cursor': prev_cursor,
+            'next_cursor': next_cursor
         }
         
         return render_template('history.html', 
@@ -206,21 +183,11 @@ def view_detail(record_id):
             flash('접근 권한이 없습니다.', 'error')
             return redirect(url_for('history.index'))
         
-        # 음식 인식 기록인 경우 세부 정보 추가
+        # 음식 인식 기록인 경우 저장된 음식 스냅샷을 세부 정보로 사용
         if record_type == 'food' and 'detected_foods' in record and record['detected_foods']:
-            for i, food in enumerate(record['detected_foods']):
-                food_name = food['food_name']
-                food_info = get_food_info(food_name)
-                
-                
-                if food_info:
-                    # MongoDB ObjectId는 JSON으로 직렬화할 수 없으므로 제거
-                    if '_id' in food_info:
-                        food_info.pop('_id')
-                    # 기존 정보에 음식 세부 정보 추가
-                    record['detected_foods'][i]['food_info'] = food_info
-                    print(f"Food Name: {food_name}")
-                    print(f"Food Info: {food_info}")
+            attach_food_snapshots(record['detected_foods'])
+            for food in record['detected_foods']:
+                food['food_info'] = food['food_snapshot']
         
         # 이미지 URL 생성
         if 'image_path' in record:
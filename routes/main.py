@@ -7,8 +7,12 @@ from werkzeug.utils import secure_filename
 from bson.objectid import ObjectId
 
 from modules.database import get_db, get_food_info, save_recognition_result
-from modules.vision import ensemble_predictions_class_based, verify_image, get_class_to_metadata_mapping
+from modules.vision import ensemble_predictions_class_based, load_image, get_class_to_metadata_mapping
 from modules.visualization import create_text_overlay_image, generate_modal_data, create_interactive_html
+from modules.result_cache import result_cache
+from modules.food_index import get_food_index
+from modules.recommender import get_recommender
+from modules.personalization import UserProfile
 
 logger = logging.getLogger(__name__)
 
@@ -79,14 +83,16 @@ def predict():
         return redirect(url_for('main.index'))
     
     try:
-        # 이미지 검증
-        if not verify_image(image_path):
+        # 이미지 검증 및 디코딩 (요청당 한 번만 수행하고 이후 단계에서 재사용)
+        image = load_image(image_path)
+        if image is None:
             flash('이미지 파일을 읽을 수 없습니다. 다른 이미지로 시도해보세요.', 'error')
             return redirect(url_for('main.index'))
         
         # 클래스 기반 앙상블 예측 수행
         logger.info(f"이미지 경로: {image_path} 인식 중...")
-        boxes, scores, class_ids = ensemble_predictions_class_based(image_path)
+        conf_threshold = 0.25
+        boxes, scores, class_ids = ensemble_predictions_class_based(image, conf_threshold)
         
         # 결과가 비어 있는지 확인
         if len(boxes) == 0:
@@ -101,14 +107,16 @@ def predict():
         detected_foods = []
         food_info_dict = {}  # 클래스 이름별 음식 정보 매핑
         
-        # 모델 가져오기 (클래스 이름을 위해)
-        from modules.vision import get_models
-        model_m, _ = get_models()
-        if model_m is None:
+        # 클래스 이름 가져오기 (로컬 모델 또는 추론 서버)
+        from modules.vision import get_class_names
+        class_names = get_class_names()
+        if class_names is None:
             flash('모델을 로드하는 중 오류가 발생했습니다.', 'error')
             return redirect(url_for('main.index'))
         
-        class_names = model_m.names
+        # 로그인 사용자의 선호도 (알레르기/채식/선호 카테고리)
+        preferences = session.get('preferences')
+        personalize = bool(preferences) and not UserProfile.from_preferences(preferences).is_empty
         
         for i in range(len(boxes)):
             try:
@@ -141,6 +149,14 @@ def predict():
                     
                     # 직접 food_info를 prediction에 할당
                     prediction['food_info'] = food_info
+                    
+                    # 사용자 선호도를 반영한 추천 (사전 계산된 이웃 목록만 사용)
+                    if personalize and food_info.get('dishId') is not None:
+                        recommender = get_recommender()
+                        if recommender:
+                            prediction['personalized_recommendations'] = recommender.get_personalized_recommendations(
+                                food_info['dishId'], preferences, top_n=3
+                            )
                 else:
                     # 기본 정보라도 제공
                     prediction['food_info'] = {
@@ -173,8 +189,14 @@ def predict():
             logger.info(f"예측 결과: {pred['class_name']}, 정보: nameKo={pred['food_info'].get('nameKo')}, nameEn={pred['food_info'].get('nameEn')}")                
         
         # 시각화 결과 생성
-        # 1. 텍스트 오버레이 이미지
-        overlay_image_path = create_text_overlay_image(image_path, boxes, scores, class_ids, class_names, food_info_dict)
+        # 1. 텍스트 오버레이 이미지 (같은 이미지로 이미 생성한 경우 재사용)
+        # (오버레이에 그린 음식 정보가 달라지지 않도록 신뢰도 임계값과 카탈로그 버전이 같을 때만 재사용)
+        catalog_version = get_food_index().version
+        overlay_image_path = result_cache.get_overlay(image, conf_threshold, catalog_version)
+        if overlay_image_path is None:
+            overlay_image_path = create_text_overlay_image(image, boxes, scores, class_ids, class_names, food_info_dict)
+            if overlay_image_path:
+                result_cache.set_overlay(image, overlay_image_path, conf_threshold, catalog_version)
         # 오버레이 이미지 URL 생성 (처리된 이미지를 표시하기 위함)
         overlay_image_url = None
         if overlay_image_path:
@@ -212,7 +234,7 @@ def predict():
                 logger.error(f"사용자 통계 업데이트 중 오류: {e}")
         
         # 인식 결과를 MongoDB에 저장
-        record_id = save_recognition_result(image_path, detected_foods, overlay_image_path)
+        record_id = save_recognition_result(image_path, detected_foods, overlay_image_path, class_mapping)
         logger.info(f"인식 결과 저장 완료, 기록 ID: {record_id}")    
         # 결과 페이지 렌더링
         return render_template('index.html', 
@@ -61,6 +61,23 @@ def update_similar_foods_task():
         logger.error(f"유사 음식 정보 업데이트 태스크 실행 중 오류 발생: {e}")
         return {"success": False, "error": str(e)}
 
+@shared_task
+def backfill_food_snapshots_task(batch_size=200):
+    """기존 인식 기록에 음식 스냅샷을 채우는 백그라운드 마이그레이션 태스크"""
+    try:
+        from modules.database import get_db, backfill_food_snapshots
+        from modules.vision import get_class_to_metadata_mapping
+        
+        logger.info("음식 스냅샷 백필 태스크 시작")
+        updated_count = backfill_food_snapshots(
+            get_db(), batch_size=batch_size,
+            class_to_metadata_mapping=get_class_to_metadata_mapping()
+        )
+        return {"success": True, "updated_count": updated_count}
+    except Exception as e:
+        logger.error(f"음식 스냅샷 백필 태스크 실행 중 오류 발생: {e}")
+        return {"success": False, "error": str(e)}
+
 @shared_task
 def process_uploaded_image_task(image_path):
     """이미지 처리를 위한 백그라운드 태스크"""
@@ -83,14 +100,14 @@ def process_uploaded_image_task(image_path):
         # 결과 포맷팅
         detected_foods = []
         
-        # 모델 클래스 이름 가져오기
-        from modules.vision import get_models
-        model_m, _ = get_models()
+        # 모델 클래스 이름 가져오기 (로컬 모델 또는 추론 서버)
+        from modules.vision import get_class_names
+        class_names = get_class_names()
         
         for i in range(len(boxes)):
             class_id = int(class_ids[i])
             score = scores[i]
-            class_name = model_m.names.get(class_id, f"unknown_{class_id}")
+            class_name = class_names.get(class_id, f"unknown_{class_id}")
             
             detected_foods.append({
                 'food_name': class_name,
@@ -98,7 +115,7 @@ def process_uploaded_image_task(image_path):
             })
         
         # 인식 결과 저장
-        save_recognition_result(image_path, detected_foods)
+        save_recognition_result(image_path, detected_foods, class_to_metadata_mapping=class_mapping)
         
         return {
             "success": True,
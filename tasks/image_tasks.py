@@ -10,10 +10,15 @@ from modules.database import get_db, save_recognition_result
 from modules.vision import (
     ensemble_predictions_class_based, 
     get_class_to_metadata_mapping,
+    load_image
+)
+from modules.visualization import (
     create_text_overlay_image,
     generate_modal_data,
     create_interactive_html
 )
+from modules.result_cache import result_cache
+from modules.food_index import get_food_index
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +49,14 @@ def process_food_image(self, image_path, save_history=True):
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
         
+        # 이미지 디코딩 (예측과 시각화 단계에서 재사용)
+        image = load_image(image_path)
+        if image is None:
+            return {'success': False, 'error': '이미지 파일을 읽을 수 없습니다.'}
+        
         # 이미지 예측 수행
-        boxes, scores, class_ids = ensemble_predictions_class_based(image_path)
+        conf_threshold = 0.25
+        boxes, scores, class_ids = ensemble_predictions_class_based(image, conf_threshold)
         
         # 결과가 비어 있는지 확인
         if len(boxes) == 0:
@@ -54,10 +65,10 @@ def process_food_image(self, image_path, save_history=True):
         # 클래스-메타데이터 매핑 가져오기
         class_mapping = get_class_to_metadata_mapping()
         
-        # YOLO 모델의 클래스 이름 가져오기
-        from modules.vision import get_models
-        model_m, _ = get_models()
-        if model_m is None:
+        # YOLO 모델의 클래스 이름 가져오기 (로컬 모델 또는 추론 서버)
+        from modules.vision import get_class_names
+        class_names = get_class_names()
+        if class_names is None:
             raise RuntimeError("모델 로드 실패")
         
         # 결과 처리
@@ -73,7 +84,7 @@ def process_food_image(self, image_path, save_history=True):
             box = boxes[i]
             class_id = int(class_ids[i])
             score = scores[i]
-            class_name = model_m.names.get(class_id, f"unknown_{class_id}")
+            class_name = class_names.get(class_id, f"unknown_{class_id}")
             
             # MongoDB에서 음식 정보 가져오기
             from modules.database import get_food_info
@@ -131,21 +142,27 @@ def process_food_image(self, image_path, save_history=True):
         # 시각화 결과 생성 (상태 업데이트)
         self.update_state(state='PROCESSING', meta={'status': '결과 시각화 생성 중...'})
         
-        # 1. 텍스트 오버레이 이미지
-        overlay_image_path = create_text_overlay_image(
-            image_path, boxes, scores, class_ids, model_m.names, food_info_dict
-        )
+        # 1. 텍스트 오버레이 이미지 (같은 이미지로 이미 생성한 경우 재사용)
+        # (오버레이에 그린 음식 정보가 달라지지 않도록 신뢰도 임계값과 카탈로그 버전이 같을 때만 재사용)
+        catalog_version = get_food_index().version
+        overlay_image_path = result_cache.get_overlay(image, conf_threshold, catalog_version)
+        if overlay_image_path is None:
+            overlay_image_path = create_text_overlay_image(
+                image, boxes, scores, class_ids, class_names, food_info_dict
+            )
+            if overlay_image_path:
+                result_cache.set_overlay(image, overlay_image_path, conf_threshold, catalog_version)
         
         # 2. 인터랙티브 HTML 결과 페이지
         modal_data = generate_modal_data(
-            image_path, boxes, scores, class_ids, model_m.names, food_info_dict
+            image, boxes, scores, class_ids, class_names, food_info_dict
         )
         interactive_html_path = create_interactive_html(modal_data)
         
         # 히스토리 저장 (선택적)
         if save_history:
             self.update_state(state='PROCESSING', meta={'status': '인식 기록 저장 중...'})
-            record_id = save_recognition_result(image_path, detected_foods)
+            record_id = save_recognition_result(image_path, detected_foods, class_to_metadata_mapping=class_mapping)
             logger.info(f"인식 결과 저장 완료: {record_id}")
         
         # 결과 반환
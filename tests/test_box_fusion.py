@@ -0,0 +1,78 @@
+"""
+앙상블 박스 결합(클래스별 NMS, Weighted Boxes Fusion) 테스트
+"""
+import numpy as np
+
+from modules.vision import (
+    box_iou, non_max_suppression, weighted_box_fusion, merge_class_based
+)
+
+def reference_nms(boxes, scores, class_ids, iou_threshold, score_threshold):
+    """클래스마다 점수 순으로 하나씩 비교하는 기준 NMS 구현"""
+    keep = []
+    for class_id in np.unique(class_ids):
+        indices = [i for i in np.nonzero(class_ids == class_id)[0] if scores[i] >= score_threshold]
+        indices.sort(key=lambda i: -scores[i])
+        while indices:
+            best = indices.pop(0)
+            keep.append(best)
+            indices = [i for i in indices if box_iou(boxes[best], boxes[i])[0, 0] <= iou_threshold]
+    return sorted(keep, key=lambda i: -scores[i])
+
+def test_nms_suppresses_within_class_only():
+    """같은 클래스의 겹치는 박스만 억제하고, 다른 클래스는 같은 위치여도 유지"""
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    class_ids = np.array([0, 0, 1, 0])
+
+    keep = non_max_suppression(boxes, scores, class_ids, iou_threshold=0.45)
+    assert list(keep) == [0, 2, 3]
+
+def test_nms_score_threshold_and_empty_input():
+    """점수 임계값 미만은 제외하고, 빈 입력은 빈 결과"""
+    boxes = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    keep = non_max_suppression(boxes, [0.9, 0.2], [0, 0], score_threshold=0.25)
+    assert list(keep) == [0]
+    assert len(non_max_suppression(np.zeros((0, 4)), [], [])) == 0
+
+def test_nms_matches_reference_on_random_boxes():
+    """무작위 박스에서 기준 구현과 같은 결과"""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 40))
+        top_left = rng.uniform(0, 100, (n, 2))
+        boxes = np.hstack([top_left, top_left + rng.uniform(5, 40, (n, 2))]).astype(np.float32)
+        scores = rng.uniform(0, 1, n).astype(np.float32)
+        class_ids = rng.integers(0, 3, n)
+
+        keep = non_max_suppression(boxes, scores, class_ids, iou_threshold=0.45, score_threshold=0.1)
+        assert list(keep) == reference_nms(boxes, scores, class_ids, 0.45, 0.1)
+
+def test_wbf_fuses_same_class_boxes():
+    """같은 클래스의 겹치는 박스는 점수 가중 평균 좌표와 평균 점수로 융합"""
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10]], dtype=np.float32)
+    scores = np.array([0.9, 0.3, 0.5], dtype=np.float32)
+    class_ids = np.array([0, 0, 1])
+
+    fused_boxes, fused_scores, fused_classes = weighted_box_fusion(boxes, scores, class_ids, iou_threshold=0.5)
+    assert list(fused_classes) == [0, 1]
+    np.testing.assert_allclose(fused_boxes[0], [0.25, 0.25, 10.25, 10.25], rtol=1e-5)
+    np.testing.assert_allclose(fused_scores, [0.6, 0.5], rtol=1e-5)
+
+def test_wbf_empty_input():
+    boxes, scores, class_ids = weighted_box_fusion(np.zeros((0, 4)), [], [])
+    assert boxes.shape == (0, 4) and len(scores) == 0 and len(class_ids) == 0
+
+def test_merge_class_based_uses_model_per_class():
+    """CLASS_MODEL_MAPPING에서 각 클래스를 담당하는 모델의 박스만 사용"""
+    class_names = {0: 'gimbap', 1: 'bibimbap'}  # gimbap -> model_m, bibimbap -> model_l
+    box = np.array([[0, 0, 10, 10]], dtype=np.float32)
+    detections = {
+        'model_m': (np.vstack([box, box + 50]), np.array([0.9, 0.8], dtype=np.float32), np.array([0, 1])),
+        'model_l': (np.vstack([box, box + 50]), np.array([0.7, 0.6], dtype=np.float32), np.array([0, 1]))
+    }
+
+    boxes, scores, class_ids = merge_class_based(detections, class_names, conf_threshold=0.25, fusion='nms')
+    assert list(class_ids) == [0, 1]
+    np.testing.assert_allclose(scores, [0.9, 0.6])
+    np.testing.assert_allclose(boxes[1], [50, 50, 60, 60])
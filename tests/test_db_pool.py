@@ -0,0 +1,129 @@
+"""
+MongoDB 연결 풀(ConnectionPool) 테스트
+실제 MongoDB 대신 가짜 클라이언트를 사용합니다.
+"""
+import threading
+import time
+
+import pytest
+
+import modules.db_manager as db_manager
+from modules.db_manager import ConnectionPool, DatabaseError
+
+class FakeAdmin:
+    def __init__(self, client):
+        self.client = client
+
+    def command(self, name):
+        self.client.pings += 1
+        if self.client.ping_started is not None:
+            self.client.ping_started.set()
+        if self.client.ping_gate is not None:
+            self.client.ping_gate.wait(5)
+        if not self.client.healthy:
+            raise ConnectionError('ping 실패')
+        return {'ok': 1}
+
+class FakeClient:
+    """MongoClient 대신 사용하는 가짜 클라이언트"""
+
+    def __init__(self, uri, **kwargs):
+        self.uri = uri
+        self.healthy = True
+        self.closed = False
+        self.pings = 0
+        self.ping_started = None
+        self.ping_gate = None
+        self.admin = FakeAdmin(self)
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(db_manager, 'MongoClient', FakeClient)
+    pool = ConnectionPool(max_connections=2, checkout_timeout=1.0, health_check_interval=0, max_idle_time=60)
+    yield pool
+    pool.close_all()
+
+def test_checkout_blocks_until_release(pool):
+    """풀이 가득 차면 다른 스레드가 연결을 반환할 때까지 대기"""
+    first = pool.get_connection('mongodb://test')
+    second = pool.get_connection('mongodb://test')
+    received = []
+
+    waiter = threading.Thread(target=lambda: received.append(pool.get_connection('mongodb://test')))
+    waiter.start()
+    time.sleep(0.1)
+    assert received == []
+
+    pool.release_connection(first)
+    waiter.join(1)
+    assert received == [first]
+    assert pool.get_stats()['waits'] == 1
+    assert pool.get_stats()['total'] == 2
+    pool.release_connection(second)
+
+def test_checkout_timeout(pool):
+    """대기 시간 안에 반환되지 않으면 DatabaseError"""
+    pool.get_connection('mongodb://test')
+    pool.get_connection('mongodb://test')
+
+    started = time.monotonic()
+    with pytest.raises(DatabaseError):
+        pool.get_connection('mongodb://test', checkout_timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    assert pool.get_stats()['timeouts'] == 1
+
+def test_evicts_idle_and_broken_connections(pool):
+    """오래된 연결과 ping에 실패한 연결을 제거"""
+    stale = pool.get_connection('mongodb://test')
+    broken = pool.get_connection('mongodb://test')
+    pool.release_connection(stale)
+    pool.release_connection(broken)
+    broken.healthy = False
+
+    # stale만 max_idle_time을 넘긴 것으로 만듦
+    pool.connections[0] = (stale, time.monotonic() - 120)
+
+    assert pool.check_idle_connections() == 2
+    assert stale.closed and broken.closed
+    assert stale.pings == 0
+    stats = pool.get_stats()
+    assert stats['total'] == 0
+    assert stats['idle'] == 0
+    assert stats['evictions'] == 2
+
+def test_health_check_keeps_healthy_connections_in_order(pool):
+    """정상 연결은 반환 시각 순서대로 다시 풀에 들어감"""
+    older = pool.get_connection('mongodb://test')
+    newer = pool.get_connection('mongodb://test')
+    pool.release_connection(older)
+    pool.release_connection(newer)
+
+    assert pool.check_idle_connections() == 0
+    assert [client for client, _ in pool.connections] == [older, newer]
+    assert older.pings == newer.pings == 1
+
+def test_health_check_does_not_block_checkout(pool):
+    """한 연결을 ping하는 동안에도 다른 유휴 연결은 대여 가능"""
+    older = pool.get_connection('mongodb://test')
+    newer = pool.get_connection('mongodb://test')
+    pool.release_connection(older)
+    pool.release_connection(newer)
+
+    older.ping_started = threading.Event()
+    older.ping_gate = threading.Event()
+    checker = threading.Thread(target=pool.check_idle_connections)
+    checker.start()
+    assert older.ping_started.wait(1)
+
+    started = time.monotonic()
+    client = pool.get_connection('mongodb://test', checkout_timeout=0.5)
+    assert client is newer
+    assert time.monotonic() - started < 0.1
+
+    older.ping_gate.set()
+    checker.join(1)
+    assert [client for client, _ in pool.connections] == [older]
+    pool.release_connection(newer)
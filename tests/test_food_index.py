@@ -0,0 +1,112 @@
+"""
+음식 메타데이터 인덱스(FoodIndex) 테스트
+실제 MongoDB 대신 foods/meta 컬렉션만 가진 가짜 DB를 사용합니다.
+"""
+import pytest
+
+from modules.food_index import FoodIndex, CATALOG_META_COLLECTION, CATALOG_VERSION_ID
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.find_calls = 0
+
+    def find(self, query=None, projection=None):
+        self.find_calls += 1
+        return [dict(doc) for doc in self.docs]
+
+    def find_one(self, query):
+        return next((doc for doc in self.docs
+                     if all(doc.get(k) == v for k, v in query.items())), None)
+
+class FakeDB:
+    """db.foods와 db['meta']만 지원하는 가짜 DB"""
+
+    def __init__(self, foods, version=0):
+        self.foods = FakeCollection(foods)
+        self.meta = FakeCollection([{'_id': CATALOG_VERSION_ID, 'version': version}])
+
+    def __getitem__(self, name):
+        assert name == CATALOG_META_COLLECTION
+        return self.meta
+
+    def set_version(self, version):
+        self.meta.docs[0]['version'] = version
+
+FOODS = [
+    {'nameEn': 'Kimchi Jjigae', 'nameKo': '김치찌개', 'dishId': 22, 'aliases': ['kimchi_stew']},
+    {'nameEn': 'Kimchi', 'nameKo': '배추김치', 'dishId': 4},
+    {'nameEn': 'Bibimbap', 'nameKo': '비빔밥', 'dishId': 11},
+    {'nameEn': 'Bibimbap', 'nameKo': '돌솥비빔밥', 'dishId': 99}
+]
+
+@pytest.fixture
+def db():
+    return FakeDB(FOODS, version=1)
+
+@pytest.fixture
+def index(db):
+    index = FoodIndex(refresh_interval=0)
+    index.load(db)
+    return index
+
+@pytest.mark.parametrize('food_name, metadata_name, expected', [
+    ('Kimchi', None, 'Kimchi'),                 # 정확한 영문 이름이 부분 일치보다 우선
+    ('x', '배추김치', 'Kimchi'),                 # 메타데이터 이름(한글)
+    ('Kimchi', 'unknown', 'Kimchi'),            # 메타데이터 이름이 없으면 음식 이름
+    ('kimchi stew', None, 'Kimchi Jjigae'),     # 정규화된 별칭
+    ('KIMCHI-JJIGAE', None, 'Kimchi Jjigae'),   # 대소문자/구분자 무시
+    ('jjig', None, 'Kimchi Jjigae'),            # 영문 부분 일치
+    ('돌솥', None, 'Bibimbap'),                  # 한글 부분 일치
+    ('011', None, 'Bibimbap'),                  # dishId (숫자 문자열 정규화)
+    ('naengmyeon', None, None)
+])
+def test_lookup_order(index, food_name, metadata_name, expected):
+    food = index.lookup(food_name, metadata_name)
+    assert (food['nameEn'] if food else None) == expected
+
+def test_first_document_wins_for_duplicate_names(index):
+    """find_one과 같이 먼저 저장된 문서가 우선"""
+    assert index.lookup('Bibimbap')['dishId'] == 11
+    assert index.lookup('x', '돌솥비빔밥')['dishId'] == 99
+
+def test_lookup_returns_copy(index):
+    """반환된 문서를 수정해도 인덱스는 바뀌지 않음"""
+    food = index.lookup('Kimchi')
+    food['nameKo'] = 'changed'
+    food['aliases'] = []
+    assert index.lookup('Kimchi')['nameKo'] == '배추김치'
+
+def test_reloads_only_when_version_changes(db):
+    """버전이 같으면 foods를 다시 읽지 않고, 버전이 바뀌면 다시 읽음"""
+    index = FoodIndex(refresh_interval=0)
+    assert index.version is None
+    assert index.lookup('Kimchi', db=db)['dishId'] == 4
+    assert index.version == 1
+    assert db.foods.find_calls == 1
+
+    index.lookup('Kimchi', db=db)
+    assert db.foods.find_calls == 1
+
+    db.foods.docs.append({'nameEn': 'Mandu', 'nameKo': '만두', 'dishId': 24})
+    assert index.lookup('Mandu', db=db) is None  # 버전이 그대로이면 변경을 보지 않음
+
+    db.set_version(2)
+    assert index.lookup('Mandu', db=db)['dishId'] == 24
+    assert index.version == 2
+    assert db.foods.find_calls == 2
+
+def test_refresh_interval_limits_version_checks(db):
+    """refresh_interval 안에서는 버전 문서도 조회하지 않음"""
+    index = FoodIndex(refresh_interval=60)
+    index.load(db)
+    db.set_version(2)
+    db.foods.docs = []
+    assert index.lookup('Kimchi', db=db) is not None
+    assert index.version == 1
+
+def test_invalidate_forces_reload(index, db):
+    db.foods.docs = []
+    index.invalidate()
+    assert index.lookup('Kimchi', db=db) is None
+    assert index.get_all(db=db) == []
@@ -0,0 +1,98 @@
+"""
+인식 기록 음식 스냅샷 백필(backfill_food_snapshots) 테스트
+Flask 앱 컨텍스트 없이 가짜 DB만으로 실행합니다.
+"""
+import pytest
+from bson.objectid import ObjectId
+
+import modules.database as database
+from modules.database import backfill_food_snapshots, FOOD_SNAPSHOT_VERSION
+from modules.food_index import FoodIndex, CATALOG_VERSION_ID
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, order):
+        self.docs.sort(key=lambda doc: doc[field], reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+class FakeBulkResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    def find(self, query=None, projection=None):
+        """백필 쿼리 중 _id 범위 조건만 해석"""
+        docs = self.docs
+        last_id = (query or {}).get('_id', {}).get('$gt')
+        if last_id is not None:
+            docs = [doc for doc in docs if doc['_id'] > last_id]
+        return FakeCursor([dict(doc) for doc in docs])
+
+    def find_one(self, query):
+        return next((doc for doc in self.docs if doc.get('_id') == query.get('_id')), None)
+
+    def bulk_write(self, operations, ordered=True):
+        for query, update in operations:
+            self.find_one(query).update(update['$set'])
+        return FakeBulkResult(len(operations))
+
+class FakeDB:
+    def __init__(self, foods, recognitions):
+        self.foods = FakeCollection(foods)
+        self.recognitions = FakeCollection(recognitions)
+        self.meta = FakeCollection([{'_id': CATALOG_VERSION_ID, 'version': 1}])
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+@pytest.fixture(autouse=True)
+def food_index(monkeypatch):
+    index = FoodIndex(refresh_interval=0)
+    monkeypatch.setattr(database, 'get_food_index', lambda: index)
+    monkeypatch.setattr(database, 'UpdateOne', lambda query, update: (query, update))
+    return index
+
+def test_backfill_runs_without_app_context():
+    """앱 컨텍스트 없이 전달받은 db의 음식 정보로 스냅샷을 채우고, 최신 스냅샷은 건드리지 않음"""
+    current = {'food_name': 'Bibimbap', 'food_snapshot': {'v': FOOD_SNAPSHOT_VERSION, 'nameKo': '저장값'}}
+    db = FakeDB(
+        foods=[
+            {'nameEn': 'Kimchi Jjigae', 'nameKo': '김치찌개', 'dishId': 22, 'allergens': ['대두'],
+             'vegetarianStatus': '비채식'},
+            {'nameEn': 'Bibimbap', 'nameKo': '비빔밥', 'dishId': 11}
+        ],
+        recognitions=[
+            {'_id': ObjectId(), 'detected_foods': [{'food_name': 'kimchi_jjigae'}]},
+            {'_id': ObjectId(), 'detected_foods': [{'food_name': 'unknown', 'nameKo': '미상'}, dict(current)]},
+            {'_id': ObjectId(), 'detected_foods': [{'food_name': 'old', 'food_snapshot': {'v': 0}}]}
+        ]
+    )
+
+    updated = backfill_food_snapshots(db, batch_size=2,
+                                      class_to_metadata_mapping={'kimchi_jjigae': 'Kimchi Jjigae'})
+    assert updated == 3
+
+    kimchi = db.recognitions.docs[0]['detected_foods'][0]
+    assert kimchi['food_snapshot']['dishId'] == 22
+    assert kimchi['food_snapshot']['v'] == FOOD_SNAPSHOT_VERSION
+    assert kimchi['allergens'] == ['대두'] and kimchi['vegetarianStatus'] == '비채식'
+
+    # 음식 정보가 없으면 기록에 저장된 값을 기본값으로 사용
+    unknown, bibimbap = db.recognitions.docs[1]['detected_foods']
+    assert unknown['food_snapshot']['nameKo'] == '미상'
+    assert unknown['food_snapshot']['nameEn'] == 'unknown'
+    assert bibimbap == current
+
+    assert db.recognitions.docs[2]['detected_foods'][0]['food_snapshot']['v'] == FOOD_SNAPSHOT_VERSION
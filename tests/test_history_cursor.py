@@ -0,0 +1,127 @@
+"""
+통합 인식 기록 키셋 페이지네이션(get_unified_history) 테스트
+실제 MongoDB 대신 테스트에 필요한 쿼리 연산자만 해석하는 가짜 컬렉션을 사용합니다.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from modules.database import encode_history_cursor, decode_history_cursor, get_unified_history
+
+def matches(doc, query):
+    """$and, $or, $lt, $gt, $type('date')와 값 일치만 지원하는 쿼리 해석기"""
+    for key, condition in query.items():
+        if key == '$and':
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == '$or':
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key)
+            for op, operand in condition.items():
+                if op == '$type':
+                    ok = isinstance(value, datetime)
+                elif value is None:
+                    ok = False
+                elif op == '$lt':
+                    ok = value < operand
+                elif op == '$gt':
+                    ok = value > operand
+                else:
+                    raise NotImplementedError(op)
+                if not ok:
+                    return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[field], reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([dict(doc) for doc in self.docs if matches(doc, query)])
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+BASE = datetime(2024, 5, 1, 12, 0, 0)
+
+@pytest.fixture
+def db():
+    """두 컬렉션에 시각이 섞인 기록과 같은 시각의 기록, timestamp가 없는 기록을 저장"""
+    db = FakeDB()
+    for i in range(12):
+        name = 'recognitions' if i % 3 else 'menu_recognitions'
+        db[name].docs.append({'_id': ObjectId(), 'timestamp': BASE + timedelta(minutes=i), 'n': i})
+    # 같은 timestamp는 _id로 순서 결정
+    for n in (12, 13):
+        db['recognitions'].docs.append({'_id': ObjectId(), 'timestamp': BASE + timedelta(minutes=5), 'n': n})
+    db['recognitions'].docs.append({'_id': ObjectId(), 'n': -1})
+    db['menu_recognitions'].docs.append({'_id': ObjectId(), 'timestamp': None, 'n': -2})
+    return db
+
+def expected_order(db):
+    docs = [doc for name in ('recognitions', 'menu_recognitions') for doc in db[name].docs
+            if isinstance(doc.get('timestamp'), datetime)]
+    return [doc['n'] for doc in sorted(docs, key=lambda d: (d['timestamp'], d['_id']), reverse=True)]
+
+def test_cursor_round_trip():
+    record = {'_id': ObjectId(), 'timestamp': BASE + timedelta(microseconds=123)}
+    assert decode_history_cursor(encode_history_cursor(record)) == (record['timestamp'], record['_id'])
+    assert decode_history_cursor('not-a-cursor') is None
+
+def test_pages_forward_through_merged_collections(db):
+    """다음 페이지를 끝까지 따라가면 두 컬렉션이 (timestamp, _id) 내림차순으로 빠짐없이 병합됨"""
+    seen, cursor = [], None
+    while True:
+        records, next_cursor, prev_cursor = get_unified_history(db, limit=4, cursor=cursor)
+        assert (prev_cursor is None) == (cursor is None)
+        seen.extend(record['n'] for record in records)
+        if next_cursor is None:
+            break
+        cursor = next_cursor
+    assert seen == expected_order(db)
+
+def test_timestamp_less_records_are_skipped(db):
+    records, _, _ = get_unified_history(db, limit=100)
+    assert all(record['n'] >= 0 for record in records)
+
+def test_prev_page_returns_previous_window(db):
+    """다음 페이지의 prev_cursor로 돌아가면 첫 페이지와 같은 기록"""
+    first, next_cursor, _ = get_unified_history(db, limit=5)
+    second, _, prev_cursor = get_unified_history(db, limit=5, cursor=next_cursor)
+    back, back_next, back_prev = get_unified_history(db, limit=5, cursor=prev_cursor, direction='prev')
+
+    assert [r['n'] for r in back] == [r['n'] for r in first]
+    assert back_prev is None
+    assert decode_history_cursor(back_next) == decode_history_cursor(next_cursor)
+    assert [r['n'] for r in first + second] == expected_order(db)[:10]
+
+def test_user_query_is_combined_with_timestamp_filter(db):
+    """사용자 조건은 timestamp 조건과 함께 유지"""
+    records, _, _ = get_unified_history(db, query={'n': 4}, limit=2)
+    assert [record['n'] for record in records] == [4]
+    assert db['recognitions'].queries[-1]['$and'][0] == {'n': 4}
@@ -0,0 +1,106 @@
+"""
+EasyOCR 리더 풀(OCRReaderPool) 테스트
+실제 EasyOCR 모델 대신 가짜 Reader를 만드는 팩토리를 사용합니다.
+"""
+import importlib.util
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+# EasyOCR이 설치되지 않은 환경에서도 풀 로직만 테스트할 수 있도록 빈 모듈로 대체
+if importlib.util.find_spec('easyocr') is None:
+    sys.modules['easyocr'] = types.ModuleType('easyocr')
+
+from modules.exceptions import OCRError, OCRPoolTimeoutError
+from modules.ocr import OCRReaderPool
+
+class StubFactory:
+    """호출될 때마다 새 가짜 Reader를 만들고, fail이 True이면 예외를 발생시키는 팩토리"""
+
+    def __init__(self):
+        self.created = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise RuntimeError('모델 로드 실패')
+        reader = object()
+        self.created.append(reader)
+        return reader
+
+def test_creates_readers_lazily_up_to_max_size():
+    """Reader는 필요할 때만 max_size개까지 생성되고, 반환된 Reader를 재사용"""
+    factory = StubFactory()
+    pool = OCRReaderPool(factory, max_size=2, checkout_timeout=0.1)
+    assert factory.created == []
+
+    first = pool.acquire()
+    assert len(factory.created) == 1
+    second = pool.acquire()
+    assert len(factory.created) == 2
+    assert first is not second
+
+    pool.release(first)
+    assert pool.acquire() is first
+    assert len(factory.created) == 2
+    stats = pool.get_stats()
+    assert stats['total'] == 2
+    assert stats['in_use'] == 2
+    assert stats['created'] == 2
+
+def test_checkout_waits_for_release():
+    """모든 Reader가 사용 중이면 반환될 때까지 대기"""
+    pool = OCRReaderPool(StubFactory(), max_size=1, checkout_timeout=1.0)
+    reader = pool.acquire()
+    threading.Timer(0.1, pool.release, args=(reader,)).start()
+
+    started = time.monotonic()
+    with pool.checkout() as again:
+        assert again is reader
+    assert time.monotonic() - started >= 0.1
+    assert pool.get_stats()['waits'] == 1
+
+def test_checkout_timeout_raises():
+    """checkout_timeout 안에 반환되지 않으면 OCRPoolTimeoutError"""
+    pool = OCRReaderPool(StubFactory(), max_size=1, checkout_timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(OCRPoolTimeoutError) as error:
+        pool.acquire()
+    assert error.value.code == 'ocr_pool_timeout'
+    assert pool.get_stats()['timeouts'] == 1
+
+def test_factory_failure_rolls_back_reader_count():
+    """Reader 생성에 실패하면 확보한 자리를 되돌려 다음 요청이 다시 생성할 수 있음"""
+    factory = StubFactory()
+    pool = OCRReaderPool(factory, max_size=1, checkout_timeout=0.05)
+
+    factory.fail = True
+    with pytest.raises(OCRError):
+        pool.acquire()
+    assert pool.reader_count == 0
+    assert pool.get_stats()['in_use'] == 0
+
+    factory.fail = False
+    assert pool.acquire() is factory.created[0]
+    assert pool.reader_count == 1
+
+def test_try_acquire_does_not_wait():
+    """try_acquire는 남은 자리만큼만 대여하고 기다리지 않음"""
+    factory = StubFactory()
+    pool = OCRReaderPool(factory, max_size=3, checkout_timeout=1.0)
+    held = pool.acquire()
+
+    started = time.monotonic()
+    extra = pool.try_acquire(5)
+    assert time.monotonic() - started < 0.5
+    assert len(extra) == 2
+    assert held not in extra
+    assert pool.try_acquire(1) == []
+
+    for reader in extra:
+        pool.release(reader)
+    assert pool.get_stats()['in_use'] == 1
@@ -0,0 +1,94 @@
+"""
+개인화 추천 필터(비트마스크 프로필, SimilarityMatrices.personalized) 테스트
+"""
+import numpy as np
+
+from modules.personalization import (
+    ALLERGEN_BITS, CATEGORY_BITS, UserProfile, encode_allergens, encode_categories,
+    encode_food_profile, food_categories
+)
+from modules.similarity import FoodFeatures, SimilarityMatrices
+
+def test_allergen_names_and_ids_share_bits():
+    """선호도 화면의 ID와 메타데이터의 한글 이름이 같은 비트로 변환되고, 모르는 이름은 무시"""
+    assert encode_allergens(['soy']) == encode_allergens(['대두']) == ALLERGEN_BITS['soy']
+    assert encode_allergens(['글루텐', 'eggs', '고수']) == ALLERGEN_BITS['gluten'] | ALLERGEN_BITS['eggs']
+    assert encode_allergens(None) == 0
+    assert encode_categories(['rice', 'unknown']) == CATEGORY_BITS['rice']
+
+def test_food_categories_inference():
+    """preferenceCategories가 우선이고, 없으면 분류명/주재료/이름으로 추론"""
+    assert food_categories({'preferenceCategories': ['seafood'], 'className': 'Rice Dishes'}) == ['seafood']
+    assert food_categories({
+        'className': 'Korean Stews', 'nameKo': '순대',
+        'ingredients': {'main': ['돼지고기', '오징어']}
+    }) == ['meat', 'seafood', 'soup', 'street_food']
+    assert food_categories({'ingredients': ['두부']}) == []
+
+def test_encode_food_profile():
+    profile = encode_food_profile({
+        'allergens': ['대두', '계란'], 'className': 'Noodle Dishes', 'vegetarianStatus': '비채식'
+    })
+    assert profile == (ALLERGEN_BITS['soy'] | ALLERGEN_BITS['eggs'], CATEGORY_BITS['noodle'], True)
+    assert encode_food_profile({'vegetarianStatus': '부분채식'})[2] is False
+
+def test_user_profile_filters_and_boosts():
+    profile = UserProfile.from_preferences({
+        'allergens': ['soy'], 'vegetarian': True, 'preferred_categories': ['noodle']
+    })
+    allergens = np.array([0, ALLERGEN_BITS['soy'], ALLERGEN_BITS['gluten'], 0])
+    non_vegetarian = np.array([False, False, False, True])
+    assert profile.allowed(allergens, non_vegetarian).tolist() == [True, False, True, False]
+
+    categories = np.array([CATEGORY_BITS['noodle'], CATEGORY_BITS['rice'] | CATEGORY_BITS['noodle'], 0])
+    np.testing.assert_allclose(profile.boost(categories, 0.5), [1.5, 1.5, 1.0])
+    assert profile.to_dict() == {'allergens': ['soy'], 'vegetarian': True, 'preferred_categories': ['noodle']}
+
+    empty = UserProfile.from_preferences(None)
+    assert empty.is_empty
+    np.testing.assert_allclose(empty.boost(categories), [1.0, 1.0, 1.0])
+
+def test_feature_rows_store_profile_bits():
+    """특징 버퍼의 프로필 행이 encode_food_profile과 같음"""
+    foods = [
+        {'dishId': '1', 'allergens': ['글루텐'], 'className': 'Dumplings', 'vegetarianStatus': '비채식'},
+        {'dishId': '2', 'preferenceCategories': ['vegetable']}
+    ]
+    features = FoodFeatures.from_foods(foods)
+    assert features.profiles.tolist() == [list(encode_food_profile(food)) for food in foods]
+
+def food(dish_id, spiciness, allergens=(), status='완전채식', categories=()):
+    return {
+        'dishId': dish_id, 'nameKo': dish_id, 'nameEn': dish_id,
+        'taste': {'spiciness': spiciness, 'umami': 3},
+        'allergens': list(allergens), 'vegetarianStatus': status,
+        'preferenceCategories': list(categories)
+    }
+
+FOODS = [
+    food('target', 5),
+    food('soy', 5, allergens=['대두']),
+    food('meat', 5, status='비채식'),
+    food('noodle', 3, categories=['noodle']),
+    food('plain', 4),
+    food('far', 0)
+]
+
+def test_personalized_filters_and_boosts_neighbors():
+    matrices = SimilarityMatrices(FOODS, top_k=3)
+    plain = matrices.personalized('target', UserProfile(), top_n=3)
+    assert [dish_id for dish_id, _, _ in plain][:2] == ['soy', 'meat']
+
+    profile = UserProfile(allergens=['soy'], vegetarian=True, preferred_categories=['noodle'])
+    results = matrices.personalized('target', profile, top_n=2, boost=0.5)
+    assert [dish_id for dish_id, _, _ in results] == ['noodle', 'plain']
+    dish_id, score, similarity = results[0]
+    assert score == np.float32(similarity * 1.5)
+    assert matrices.personalized('missing', profile) == []
+
+def test_personalized_falls_back_to_full_row():
+    """이웃 후보가 모두 걸러지면 행 전체에서 다시 고름"""
+    matrices = SimilarityMatrices(FOODS, top_k=2)
+    profile = UserProfile(allergens=['soy'], vegetarian=True)
+    results = matrices.personalized('target', profile, top_n=3)
+    assert [dish_id for dish_id, _, _ in results] == ['plain', 'noodle', 'far']
@@ -0,0 +1,111 @@
+"""
+utils.recommendation.FoodRecommender 벡터화 테스트
+음식 메타데이터 전체에 대해 행렬 계산 결과를 쌍별 정의(기존 구현)와 비교합니다.
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from modules.similarity import SimilarityMatrices
+from utils.recommendation import FoodRecommender
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'food_metadata_extended.json')
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def reference_similarity(food1, food2):
+    """기존 구현과 같은 쌍별 유사도 정의 (기준별 값 사전)"""
+    attrs = ('spiciness', 'sweetness', 'saltiness', 'sourness', 'umami')
+    t1, t2 = food1.get('taste', {}), food2.get('taste', {})
+    v1, v2 = [t1.get(a, 0) for a in attrs], [t2.get(a, 0) for a in attrs]
+    norm = math.sqrt(sum(x * x for x in v1)) * math.sqrt(sum(x * x for x in v2))
+    taste = sum(x * y for x, y in zip(v1, v2)) / norm if norm else 0.0
+    p1, p2 = set(t1.get('profile', [])), set(t2.get('profile', []))
+    if p1 and p2:
+        taste = (taste + jaccard(p1, p2)) / 2
+
+    def ingredients(food):
+        return {item for category in ('main', 'sub', 'sauce') for item in food.get('ingredients', {}).get(category, [])}
+
+    def methods(food):
+        cooking = food.get('cookingMethod', {})
+        return {cooking.get('primary', '')} | set(cooking.get('secondary', []))
+
+    r1, r2 = food1.get('region', {}), food2.get('region', {})
+    region = 0.0
+    if r1 and r2:
+        region = (0.5 * (r1.get('origin') == r2.get('origin'))
+                  + 0.3 * jaccard(set(r1.get('popular', [])), set(r2.get('popular', [])))
+                  + 0.2 * (r1.get('traditional') == r2.get('traditional')))
+        region = min(region, 1.0)
+
+    scores = {
+        'taste': taste,
+        'ingredient': jaccard(ingredients(food1), ingredients(food2)),
+        'cooking': jaccard(methods(food1), methods(food2)),
+        'region': region
+    }
+    scores['overall'] = (0.4 * scores['taste'] + 0.3 * scores['ingredient']
+                         + 0.2 * scores['cooking'] + 0.1 * scores['region'])
+    return scores
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query=None, projection=None):
+        self.finds += 1
+        return [dict(doc) for doc in self.docs]
+
+@pytest.fixture(scope='module')
+def foods():
+    with open(METADATA_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+@pytest.fixture
+def recommender(foods):
+    return FoodRecommender({'foods': FakeCollection(foods)})
+
+def test_matrices_match_pairwise_definitions(foods):
+    matrices = SimilarityMatrices(foods)
+    for food1 in foods:
+        for food2 in foods:
+            expected = reference_similarity(food1, food2)
+            for criteria in ('taste', 'ingredient', 'cooking', 'region'):
+                assert matrices.similarity(food1['dishId'], food2['dishId'], criteria) == \
+                    pytest.approx(expected[criteria], abs=1e-6)
+
+def test_pair_methods_use_same_definitions(recommender, foods):
+    food1, food2 = foods[0], foods[5]
+    expected = reference_similarity(food1, food2)
+    assert recommender.calculate_taste_similarity(food1, food2) == pytest.approx(expected['taste'], abs=1e-6)
+    assert recommender.calculate_ingredient_similarity(food1, food2) == pytest.approx(expected['ingredient'], abs=1e-6)
+    assert recommender.calculate_cooking_similarity(food1, food2) == pytest.approx(expected['cooking'], abs=1e-6)
+    assert recommender.calculate_region_similarity(food1, food2) == pytest.approx(expected['region'], abs=1e-6)
+
+def test_recommendations_match_reference_ranking(recommender, foods):
+    """전체/기준별 추천 점수가 쌍별 정의로 정렬한 상위 N개와 같고, 컬렉션은 한 번만 읽음"""
+    for target in foods:
+        others = [food for food in foods if food['dishId'] != target['dishId']]
+        scores = {food['dishId']: reference_similarity(target, food) for food in others}
+
+        overall = recommender.get_food_recommendations(target['dishId'], top_n=5)
+        expected = sorted((s['overall'] for s in scores.values()), reverse=True)[:5]
+        np.testing.assert_allclose([item['similarity'] for item in overall], expected, atol=1e-6)
+        for item in overall:
+            for criteria, value in item['details'].items():
+                assert value == pytest.approx(scores[item['dishId']][criteria], abs=1e-6)
+
+        for criteria in ('taste', 'ingredient', 'cooking', 'region'):
+            by_criteria = recommender.get_recommendations_by_criteria(target['dishId'], criteria, top_n=3)
+            expected = sorted((s[criteria] for s in scores.values()), reverse=True)[:3]
+            np.testing.assert_allclose([item['similarity'] for item in by_criteria], expected, atol=1e-6)
+
+    assert recommender.foods_collection.finds == 1
+    assert recommender.get_recommendations_by_criteria(foods[0]['dishId'], 'unknown') == []
+    assert recommender.get_food_recommendations('missing') == []
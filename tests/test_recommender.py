@@ -0,0 +1,189 @@
+"""
+음식 추천 시스템(FoodRecommender) 테스트
+실제 MongoDB 대신 foods/meta 컬렉션만 가진 가짜 DB를 사용합니다.
+"""
+import os
+import random
+
+import pytest
+
+import modules.recommender as recommender_module
+import modules.similarity as similarity_module
+from modules.food_index import CATALOG_VERSION_ID
+from modules.recommender import FoodRecommender
+from modules.similarity_snapshot import CURRENT_FILE
+
+class FakeBulkResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+class FakeFoods:
+    """foods 컬렉션 (dishId 조건과 $in, bulk_write의 $set만 지원)"""
+
+    def __init__(self, docs):
+        self.docs = {str(doc['dishId']): dict(doc) for doc in docs}
+        self.writes = 0
+
+    def _match(self, query):
+        dish_id = query.get('dishId')
+        if isinstance(dish_id, dict):
+            return [self.docs[str(d)] for d in dish_id['$in'] if str(d) in self.docs]
+        if dish_id is not None:
+            return [self.docs[str(dish_id)]] if str(dish_id) in self.docs else []
+        return list(self.docs.values())
+
+    def find(self, query=None, projection=None):
+        return [dict(doc) for doc in self._match(query or {})]
+
+    def find_one(self, query, projection=None):
+        docs = self._match(query)
+        return dict(docs[0]) if docs else None
+
+    def bulk_write(self, operations, ordered=True):
+        for query, update in operations:
+            for doc in self._match(query):
+                doc.update(update['$set'])
+        self.writes += len(operations)
+        return FakeBulkResult(len(operations))
+
+class FakeMeta:
+    def __init__(self):
+        self.version = 0
+
+    def find_one(self, query):
+        return {'_id': CATALOG_VERSION_ID, 'version': self.version}
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.version += update['$inc']['version']
+        return {'_id': CATALOG_VERSION_ID, 'version': self.version}
+
+class FakeDB:
+    def __init__(self, foods):
+        self.foods = FakeFoods(foods)
+        self.meta = FakeMeta()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def make_food(rng, dish_id):
+    return {
+        'dishId': str(dish_id),
+        'nameKo': f'음식{dish_id}',
+        'nameEn': f'Food {dish_id}',
+        'taste': {attr: rng.randint(0, 5) for attr in ('spiciness', 'sweetness', 'saltiness', 'sourness', 'umami')},
+        'ingredients': {'main': rng.sample(['쌀', '김', '돼지고기', '두부', '김치', '계란', '간장'], 3)},
+        'cookingMethod': {'primary': rng.choice(['볶기', '끓이기', '굽기'])}
+    }
+
+@pytest.fixture(autouse=True)
+def fake_updates(monkeypatch):
+    monkeypatch.setattr(recommender_module, 'UpdateOne', lambda query, update: (query, update))
+
+@pytest.fixture
+def db():
+    rng = random.Random(0)
+    return FakeDB([make_food(rng, i) for i in range(20)])
+
+def current_snapshot(directory):
+    with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+        return f.read()
+
+def test_similar_foods_write_saves_snapshot_under_bumped_version(db, tmp_path):
+    """similarFoods 저장으로 올린 카탈로그 버전의 스냅샷이 저장되어 다른 프로세스는 다시 계산하지 않음"""
+    recommender = FoodRecommender(db, top_k=5, snapshot_dir=str(tmp_path))
+    result = recommender.update_similar_foods_in_db()
+    assert result['success'] and result['updated_count'] == 20
+    assert db.meta.version == 1
+    assert recommender.catalog_version == 1
+    assert current_snapshot(tmp_path).startswith('v1-')
+
+    # 다른 프로세스는 새 버전의 스냅샷을 불러옴 (foods를 읽지 않음)
+    other = FoodRecommender(db, top_k=5, snapshot_dir=str(tmp_path))
+    db.foods.find = None
+    assert other.initialize()
+    assert other.catalog_version == 1
+    assert other.matrices.most_similar('3') == recommender.matrices.most_similar('3')
+
+def test_unchanged_similar_foods_do_not_bump_version(db, tmp_path):
+    recommender = FoodRecommender(db, top_k=5, snapshot_dir=str(tmp_path))
+    recommender.update_similar_foods_in_db()
+    writes = db.foods.writes
+    assert recommender.update_similar_foods_in_db()['updated_count'] == 0
+    assert db.foods.writes == writes
+    assert db.meta.version == 1
+
+def test_incremental_update_adopts_both_versions(db, tmp_path):
+    """API가 올린 버전과 similarFoods 저장으로 올린 버전을 모두 반영하고 최종 버전으로 스냅샷 저장"""
+    recommender = FoodRecommender(db, top_k=5, snapshot_dir=str(tmp_path))
+    recommender.update_similar_foods_in_db()
+
+    food = make_food(random.Random(1), 3)
+    db.foods.docs['3'].update(food)
+    api_version = db.meta.find_one_and_update({}, {'$inc': {'version': 1}})['version']
+    result = recommender.add_or_update_food(food, api_version)
+    assert result['success'] and result['updated_count'] > 0
+    assert recommender.catalog_version == db.meta.version == api_version + 1
+    assert current_snapshot(tmp_path).startswith(f'v{db.meta.version}-')
+
+def test_large_catalog_uses_similarity_index(db, tmp_path):
+    """dense_max_foods를 넘는 카탈로그는 N x N 행렬 없이 인덱스 이웃으로 추천하고, 결과는 dense 모드와 같음"""
+    dense = FoodRecommender(db, top_k=5, dense_max_foods=100)
+    indexed = FoodRecommender(db, top_k=5, dense_max_foods=10, snapshot_dir=str(tmp_path))
+    assert dense.initialize() and indexed.initialize()
+    assert dense.matrices.dense and not indexed.matrices.dense
+    assert indexed.matrices.matrices == {}
+
+    for dish_id in db.foods.docs:
+        expected = [item['similarity'] for item in dense.find_similar(dish_id, 5)]
+        actual = indexed.find_similar(dish_id, 5)
+        assert [item['similarity'] for item in actual] == pytest.approx(expected, abs=1e-6)
+        assert dish_id not in [item['dishId'] for item in actual]
+    assert indexed.calculate_batch_similarities('3', ['4', '5'], 'combined') == \
+        pytest.approx(dense.calculate_batch_similarities('3', ['4', '5'], 'combined'), abs=1e-6)
+
+    # 인덱스 모드 스냅샷을 불러와도 같은 이웃을 반환하고, 증분 갱신도 인덱스로 처리
+    other = FoodRecommender(db, top_k=5, dense_max_foods=10, snapshot_dir=str(tmp_path))
+    assert other.initialize() and not other.matrices.dense
+    assert other.find_similar('3', 5) == indexed.find_similar('3', 5)
+    assert other.add_or_update_food(make_food(random.Random(2), 20))['success']
+    assert len(other.matrices.search_index) == 21
+
+    # 임계값이 다른 프로세스는 스냅샷 대신 현재 설정의 모드로 다시 계산
+    small = FoodRecommender(db, top_k=5, dense_max_foods=100, snapshot_dir=str(tmp_path))
+    assert small.initialize() and small.matrices.dense
+
+def test_index_mode_pair_similarity_uses_cache(db, monkeypatch):
+    """인덱스 모드의 쌍 유사도는 캐시를 거치고, 변경된 음식의 항목만 무효화하며 적중 여부를 메트릭으로 기록"""
+    metrics = []
+    monkeypatch.setattr(similarity_module, 'record_metric', lambda name, value, tags=None: metrics.append((name, value)))
+    recommender = FoodRecommender(db, top_k=5, dense_max_foods=10, pair_cache_size=3)
+    assert recommender.initialize() and not recommender.matrices.dense
+
+    first = recommender._calculate_taste_similarity_cached('1', '2')
+    assert recommender._calculate_taste_similarity_cached('2', '1') == first
+    assert first == pytest.approx(recommender.matrices.similarity('1', '2', 'taste'))
+    recommender._calculate_ingredient_similarity_cached('1', '3')
+    recommender._calculate_ingredient_similarity_cached('4', '5')
+    assert metrics == [('similarity_cache_hit', 0), ('similarity_cache_hit', 1),
+                       ('similarity_cache_hit', 0), ('similarity_cache_hit', 0)]
+
+    recommender.add_or_update_food(make_food(random.Random(5), 1))
+    stats = recommender.get_cache_stats()
+    assert stats['size'] == 1  # '1'이 포함된 항목만 제거
+    assert stats['hits'] == 1 and stats['misses'] == 3 and stats['hit_rate'] == 0.25
+    assert recommender._calculate_taste_similarity_cached('1', '2') == \
+        pytest.approx(recommender.matrices.similarity('1', '2', 'taste'))
+
+    # 최대 크기를 넘으면 오래된 항목부터 제거
+    for other in ('6', '7', '8'):
+        recommender._calculate_taste_similarity_cached('9', other)
+    stats = recommender.get_cache_stats()
+    assert stats['size'] == 3 and stats['evictions'] >= 1
+
+def test_dense_mode_pair_similarity_reads_matrix(db, monkeypatch):
+    metrics = []
+    monkeypatch.setattr(similarity_module, 'record_metric', lambda name, value, tags=None: metrics.append(name))
+    recommender = FoodRecommender(db, top_k=5)
+    assert recommender.initialize() and recommender.matrices.dense
+    recommender._calculate_taste_similarity_cached('1', '2')
+    assert metrics == [] and recommender.get_cache_stats()['size'] == 0
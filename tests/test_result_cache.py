@@ -0,0 +1,104 @@
+"""
+음식 인식 결과 캐시(RecognitionResultCache) 테스트
+디코딩된 이미지 대신 내용 해시와 지각 해시만 가진 가짜 이미지를 사용합니다.
+"""
+import numpy as np
+
+from modules.result_cache import RecognitionResultCache
+
+class FakeImage:
+    """DecodedImage에서 캐시가 사용하는 속성만 가진 가짜 이미지"""
+
+    def __init__(self, content_hash, perceptual_hash=0, height=100, width=200):
+        self.content_hash = content_hash
+        self.perceptual_hash = perceptual_hash
+        self.height = height
+        self.width = width
+
+BOXES = [[10, 20, 30, 40]]
+SCORES = [0.9]
+CLASS_IDS = [3]
+
+def test_exact_hit_returns_copies():
+    """같은 내용 해시는 정확히 일치하고, 반환값을 수정해도 캐시 항목은 바뀌지 않음"""
+    cache = RecognitionResultCache()
+    image = FakeImage('a')
+    assert cache.get(image) is None
+
+    cache.put(image, BOXES, SCORES, CLASS_IDS)
+    cached = cache.get(image)
+    assert cached['exact']
+    np.testing.assert_array_equal(cached['boxes'], BOXES)
+
+    cached['boxes'][0, 0] = -1
+    cached['scores'][0] = 0
+    again = cache.get(image)
+    np.testing.assert_array_equal(again['boxes'], BOXES)
+    assert again['scores'][0] == np.float32(0.9)
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+
+def test_conf_threshold_is_part_of_key():
+    """신뢰도 임계값이 다르면 다른 항목"""
+    cache = RecognitionResultCache()
+    image = FakeImage('a')
+    cache.put(image, BOXES, SCORES, CLASS_IDS, conf_threshold=0.25)
+    assert cache.get(image, conf_threshold=0.5) is None
+
+def test_near_duplicate_scales_boxes():
+    """지각 해시가 가까운 리사이즈 이미지는 근사 일치하고 박스를 새 크기로 변환"""
+    cache = RecognitionResultCache(use_perceptual_hash=True, max_distance=4)
+    original = FakeImage('a', perceptual_hash=0b1011 << 40, height=100, width=200)
+    cache.put(original, BOXES, SCORES, CLASS_IDS)
+
+    resized = FakeImage('b', perceptual_hash=(0b1011 << 40) ^ 0b111, height=50, width=100)
+    cached = cache.get(resized)
+    assert cached is not None and not cached['exact']
+    np.testing.assert_allclose(cached['boxes'], [[5, 10, 15, 20]])
+    assert cache.get_stats()['near_hits'] == 1
+
+    # 해밍 거리가 max_distance를 넘으면 일치하지 않음
+    far = FakeImage('c', perceptual_hash=(0b1011 << 40) ^ 0b11111)
+    assert cache.get(far) is None
+
+def test_near_duplicate_disabled_by_default():
+    """지각 해시 검색은 기본적으로 꺼져 있음"""
+    cache = RecognitionResultCache()
+    cache.put(FakeImage('a', perceptual_hash=1), BOXES, SCORES, CLASS_IDS)
+    assert cache.get(FakeImage('b', perceptual_hash=1)) is None
+
+def test_eviction_removes_near_duplicate_index():
+    """LRU에서 제거된 항목은 근사 검색 색인에서도 제거"""
+    cache = RecognitionResultCache(max_entries=1, use_perceptual_hash=True)
+    cache.put(FakeImage('a', perceptual_hash=1 << 60), BOXES, SCORES, CLASS_IDS)
+    cache.put(FakeImage('b', perceptual_hash=(1 << 64) - 1), BOXES, SCORES, CLASS_IDS)
+    assert cache.get(FakeImage('c', perceptual_hash=1 << 60)) is None
+    assert cache.get_stats()['evictions'] == 1
+    assert {key[0] for keys in cache._bands.values() for key in keys} == {'b'}
+
+def test_overlay_key_includes_conf_and_catalog_version(tmp_path):
+    """오버레이는 신뢰도 임계값과 카탈로그 버전이 같을 때만 재사용"""
+    cache = RecognitionResultCache()
+    image = FakeImage('a')
+    overlay = tmp_path / 'overlay.jpg'
+    overlay.write_bytes(b'jpeg')
+
+    cache.put(image, BOXES, SCORES, CLASS_IDS, conf_threshold=0.25)
+    cache.set_overlay(image, str(overlay), conf_threshold=0.25, catalog_version=3)
+    assert cache.get_overlay(image, conf_threshold=0.25, catalog_version=3) == str(overlay)
+    assert cache.get_overlay(image, conf_threshold=0.25, catalog_version=4) is None
+    assert cache.get_overlay(image, conf_threshold=0.5, catalog_version=3) is None
+
+    # 파일이 삭제되었으면 재사용하지 않음
+    overlay.unlink()
+    assert cache.get_overlay(image, conf_threshold=0.25, catalog_version=3) is None
+
+def test_put_replaces_overlay():
+    """같은 키로 결과를 다시 저장하면 이전 오버레이는 버림"""
+    cache = RecognitionResultCache()
+    image = FakeImage('a')
+    cache.put(image, BOXES, SCORES, CLASS_IDS)
+    cache.set_overlay(image, __file__, catalog_version=1)
+    cache.put(image, BOXES, SCORES, CLASS_IDS)
+    assert cache.get_overlay(image, catalog_version=1) is None
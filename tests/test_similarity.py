@@ -0,0 +1,184 @@
+"""
+유사도 행렬(SimilarityMatrices) 증분 갱신 테스트
+음식 추가/수정/삭제를 반복한 결과를 같은 카탈로그로 새로 계산한 (dense) 행렬과 비교합니다.
+인덱스 모드(N x N 행렬 없이 SimilarityIndex로 이웃 계산)도 같은 방식으로 확인합니다.
+"""
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from modules.personalization import UserProfile
+from modules.similarity import CRITERIA, SimilarityMatrices
+from modules.similarity_index import ExactSimilarityIndex, LSHSimilarityIndex
+
+INGREDIENTS = ['쌀', '김', '돼지고기', '두부', '김치', '계란', '고추장', '간장', '참기름', '대파']
+METHODS = ['볶기', '끓이기', '굽기', '찌기', '말기']
+PROFILES = ['매운', '고소한', '담백한', '달콤한']
+REGIONS = ['서울', '전주', '부산']
+
+def random_food(rng, dish_id):
+    """무작위 특징을 가진 음식 문서 (정수 점수라 유사도 동점이 자주 생김)"""
+    return {
+        'dishId': str(dish_id),
+        'nameKo': f'음식{dish_id}',
+        'nameEn': f'Food {dish_id}',
+        'taste': {
+            **{attr: rng.randint(0, 3) for attr in ('spiciness', 'sweetness', 'saltiness', 'sourness', 'umami')},
+            'profile': rng.sample(PROFILES, rng.randint(0, 2))
+        },
+        'ingredients': {'main': rng.sample(INGREDIENTS, rng.randint(0, 3)),
+                        'sauce': rng.sample(INGREDIENTS, rng.randint(0, 2))},
+        'cookingMethod': {'primary': rng.choice(METHODS), 'secondary': rng.sample(METHODS, rng.randint(0, 2))},
+        'region': {'origin': rng.choice(REGIONS), 'popular': rng.sample(REGIONS, rng.randint(0, 2)),
+                   'traditional': rng.random() < 0.5} if rng.random() < 0.8 else {},
+        'allergens': rng.sample(['대두', '계란', '글루텐'], rng.randint(0, 2)),
+        'vegetarianStatus': rng.choice(['비채식', '완전채식'])
+    }
+
+def assert_equivalent(matrices, foods, top_k):
+    """증분 갱신한 행렬이 같은 음식들로 새로 계산한 행렬과 같은 유사도와 이웃 점수를 가지는지 확인"""
+    rebuilt = SimilarityMatrices(list(foods.values()), top_k=top_k)
+    assert sorted(matrices.dish_ids) == sorted(rebuilt.dish_ids)
+    assert len(matrices) == len(foods)
+
+    dish_ids = rebuilt.dish_ids
+    for criteria in CRITERIA:
+        for dish_id in dish_ids:
+            np.testing.assert_allclose(
+                [matrices.similarity(dish_id, other, criteria) for other in dish_ids],
+                rebuilt.similarities(dish_id, criteria), rtol=1e-5, atol=1e-6
+            )
+            # 동점 이웃은 순서가 달라도 되므로 점수 목록만 비교
+            expected = [score for _, score in rebuilt.most_similar(dish_id, criteria, top_k)]
+            actual = matrices.most_similar(dish_id, criteria, top_k)
+            assert dish_id not in [other for other, _ in actual]
+            np.testing.assert_allclose([score for _, score in actual], expected, rtol=1e-5, atol=1e-6)
+
+def assert_valid_neighbors(matrices, top_k):
+    """근사 인덱스의 이웃이 자기 자신을 제외한 현재 음식이고, 점수가 정확한 유사도와 같으며 내림차순인지 확인"""
+    for criteria in CRITERIA:
+        for dish_id in matrices.dish_ids:
+            results = matrices.most_similar(dish_id, criteria, top_k)
+            assert len(results) <= min(top_k, len(matrices) - 1)
+            assert dish_id not in [other for other, _ in results]
+            assert len({other for other, _ in results}) == len(results)
+            scores = [score for _, score in results]
+            assert scores == sorted(scores, reverse=True)
+            for other, score in results:
+                assert score == pytest.approx(matrices.similarity(dish_id, other, criteria), abs=1e-6)
+
+def run_random_updates(rng, matrices, foods, check, steps=40):
+    """무작위 추가/수정/삭제를 반복하며 5단계마다 check(matrices, foods)를 호출"""
+    next_id = max(int(dish_id) for dish_id in foods) + 1
+    for step in range(steps):
+        action = rng.random()
+        if action < 0.4 or len(foods) <= 1:
+            food = random_food(rng, next_id)
+            next_id += 1
+        elif action < 0.7:
+            food = random_food(rng, rng.choice(list(foods)))
+        else:
+            dish_id = rng.choice(list(foods))
+            del foods[dish_id]
+            matrices.remove_food(dish_id)
+            continue
+        foods[food['dishId']] = food
+        matrices.upsert_food(food)
+
+        if step % 5 == 4:
+            check(matrices, foods)
+    check(matrices, foods)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_updates_match_full_rebuild(seed):
+    rng = random.Random(seed)
+    top_k = 4
+    foods = {str(i): random_food(rng, i) for i in range(8)}
+    matrices = SimilarityMatrices(list(foods.values()), top_k=top_k)
+    assert matrices.dense
+    run_random_updates(rng, matrices, foods, lambda m, f: assert_equivalent(m, f, top_k))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_exact_index_mode_matches_dense_rebuild(seed):
+    """전수 비교 인덱스 모드는 유사도 행렬 없이도 dense 모드와 같은 이웃 점수를 유지"""
+    rng = random.Random(seed)
+    top_k = 4
+    foods = {str(i): random_food(rng, i) for i in range(8)}
+    matrices = SimilarityMatrices(list(foods.values()), top_k=top_k, search_index=ExactSimilarityIndex())
+    assert not matrices.dense and matrices.matrices == {}
+    run_random_updates(rng, matrices, foods, lambda m, f: assert_equivalent(m, f, top_k))
+
+@pytest.mark.parametrize('seed', range(3))
+def test_lsh_index_mode_keeps_valid_neighbors(seed):
+    """LSH 인덱스 모드의 이웃은 근사지만 항상 현재 음식이고 정확한 유사도로 정렬됨"""
+    rng = random.Random(seed)
+    top_k = 4
+    foods = {str(i): random_food(rng, i) for i in range(40)}
+    index = LSHSimilarityIndex(num_tables=4, num_bits=4)
+    matrices = SimilarityMatrices(list(foods.values()), top_k=top_k, search_index=index)
+    run_random_updates(rng, matrices, foods, lambda m, f: assert_valid_neighbors(m, top_k))
+    assert len(index) == len(matrices)
+
+def test_index_mode_state_round_trip():
+    """인덱스 모드 상태를 복원하면 인덱스를 다시 구축하고 같은 이웃을 반환"""
+    rng = random.Random(7)
+    foods = [random_food(rng, i) for i in range(20)]
+    matrices = SimilarityMatrices(foods, top_k=4, search_index=ExactSimilarityIndex())
+    meta, arrays = matrices.get_state()
+    assert 'similarity_combined' not in arrays
+    restored = SimilarityMatrices.from_state(meta, {name: np.array(a) for name, a in arrays.items()})
+    assert not restored.dense
+    for food in foods:
+        assert restored.most_similar(food['dishId'], 'combined', 4) == matrices.most_similar(food['dishId'], 'combined', 4)
+    restored.upsert_food(random_food(rng, 3))
+    assert len(restored.search_index) == len(restored)
+
+def test_shrinking_below_top_k_and_growing_back():
+    """음식 수가 top_k 이하로 줄었다가 다시 늘어도 새로 계산한 행렬과 같음"""
+    rng = random.Random(10)
+    foods = {str(i): random_food(rng, i) for i in range(4)}
+    matrices = SimilarityMatrices(list(foods.values()), top_k=3)
+    for dish_id in ['0', '1', '2']:
+        del foods[dish_id]
+        matrices.remove_food(dish_id)
+        assert_equivalent(matrices, foods, 3)
+    for i in range(10, 16):
+        foods[str(i)] = random_food(rng, i)
+        matrices.upsert_food(foods[str(i)])
+        assert_equivalent(matrices, foods, 3)
+
+def test_reads_during_updates_see_consistent_state():
+    """다른 스레드가 추가/삭제하는 동안 조회해도 예외 없이 현재 카탈로그의 음식만 반환"""
+    rng = random.Random(3)
+    foods = [random_food(rng, i) for i in range(30)]
+    matrices = SimilarityMatrices(foods, top_k=5)
+    profile = UserProfile(allergens=['soy'])
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        try:
+            while not done.is_set():
+                for dish_id in ('0', '1', '29'):
+                    for other, _ in matrices.most_similar(dish_id, 'combined', 5):
+                        assert other in matrices.foods
+                    row = matrices.similarities(dish_id, 'taste')
+                    assert row is None or len(row) >= 1
+                    matrices.personalized(dish_id, profile, 3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(30, 90):
+            matrices.upsert_food(random_food(rng, i))
+            matrices.remove_food(str(i - 25))
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    assert errors == []
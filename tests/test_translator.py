@@ -0,0 +1,116 @@
+"""
+메뉴 줄 번역(split_price, translate_lines) 테스트
+원격 번역기(GoogleTranslator)는 가짜 번역기로 대체하고, 번역 메모리는 LRU만 사용합니다.
+"""
+import importlib.util
+import sys
+import types
+
+import pytest
+
+# deep-translator가 설치되지 않은 환경에서도 테스트할 수 있도록 빈 모듈로 대체 (실제 번역기는 아래에서 가짜로 교체)
+if importlib.util.find_spec('deep_translator') is None:
+    stub = types.ModuleType('deep_translator')
+    stub.GoogleTranslator = stub.MicrosoftTranslator = None
+    sys.modules['deep_translator'] = stub
+
+import modules.translator as translator
+from modules.translation_memory import TranslationMemory
+
+DICTIONARY = {
+    '김치찌개': 'Kimchi stew',
+    '된장찌개': 'Soybean paste stew',
+    '비빔밥': 'Bibimbap',
+    '김밥': 'Gimbap'
+}
+
+class StubGoogleTranslator:
+    """GoogleTranslator.translate와 같은 형태로 줄마다 사전 번역을 돌려주는 가짜 번역기"""
+
+    def __init__(self, merge_lines=False, fail=False):
+        self.merge_lines = merge_lines  # True이면 여러 줄 요청의 줄바꿈을 없애 줄 수를 틀리게 반환
+        self.fail = fail
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        if self.fail:
+            raise RuntimeError('번역 서비스 응답 없음')
+        lines = [DICTIONARY.get(line, f"T({line})") for line in text.split("\n")]
+        return " ".join(lines) if self.merge_lines else "\n".join(lines)
+
+@pytest.fixture
+def remote(monkeypatch):
+    stub = StubGoogleTranslator()
+    monkeypatch.setattr(translator, 'get_translator', lambda: stub)
+    monkeypatch.setattr(translator, 'translation_memory', TranslationMemory(db_path=None))
+    return stub
+
+@pytest.mark.parametrize('line, expected', [
+    ('김치찌개 8,000원', ('김치찌개', '₩8,000')),
+    ('비빔밥 ₩ 9,500', ('비빔밥', '₩9,500')),
+    ('된장찌개 12000', ('된장찌개', '₩12,000')),
+    ('8,000원', ('', '₩8,000')),
+    ('김밥 2', ('김밥', '2')),
+    ('김치찌개', ('김치찌개', None)),
+    ('김치찌개8,000원', ('김치찌개', '₩8,000')),
+    ('떡볶이4500원', ('떡볶이', '₩4,500')),
+    ('세트A1', ('세트A1', None)),
+    ('비빔밥2', ('비빔밥2', None)),
+    ('세트A12000', ('세트A12000', None))
+])
+def test_split_price(line, expected):
+    assert translator.split_price(line) == expected
+
+def test_price_only_line_is_not_sent(remote):
+    """가격만 있는 줄은 원격 번역 없이 가격 표기만 남음"""
+    lines, error = translator.translate_lines(['8,000원'])
+    assert lines == ['₩8,000']
+    assert error is None
+    assert remote.calls == []
+
+def test_trailing_bare_digit_is_kept(remote):
+    """줄 끝의 짧은 숫자(수량 등)는 통화 표기 없이 유지"""
+    lines, _ = translator.translate_lines(['김밥 2'])
+    assert lines == ['Gimbap 2']
+    assert remote.calls == ['김밥']
+
+def test_latin_only_lines_are_not_sent(remote):
+    """한글이 없는 줄은 원문 그대로 사용"""
+    lines, error = translator.translate_lines(['COFFEE 3,000', 'Set A'])
+    assert lines == ['COFFEE ₩3,000', 'Set A']
+    assert error is None
+    assert remote.calls == []
+
+def test_repeated_lines_use_translation_memory(remote):
+    """한 번 번역한 줄은 다음 요청에서 원격 호출 없이 번역 메모리 사용"""
+    translator.translate_lines(['김치찌개 8,000원', '비빔밥 9,000원'])
+    assert len(remote.calls) == 1
+
+    lines, _ = translator.translate_lines(['비빔밥  9,000원', '김치찌개 8,000원'])
+    assert lines == ['Bibimbap ₩9,000', 'Kimchi stew ₩8,000']
+    assert len(remote.calls) == 1
+
+def test_batch_with_wrong_line_count_falls_back_to_per_line(remote):
+    """묶음 번역 결과의 줄 수가 다르면 줄별로 다시 번역"""
+    remote.merge_lines = True
+    lines, error = translator.translate_lines(['김치찌개 8,000원', '된장찌개 7,000원', '비빔밥'])
+    assert lines == ['Kimchi stew ₩8,000', 'Soybean paste stew ₩7,000', 'Bibimbap']
+    assert error is None
+    # 묶음 1회 + 줄별 3회
+    assert len(remote.calls) == 4
+
+def test_partial_remote_failure_keeps_memory_hits(remote):
+    """원격 번역이 실패해도 번역 메모리에 있는 줄은 번역하고, 나머지는 원문과 오류를 반환"""
+    translator.translation_memory.put_many({'김치찌개': 'Kimchi stew'})
+    remote.fail = True
+
+    lines, error = translator.translate_lines(['김치찌개 8,000원', '비빔밥 9,000원'])
+    assert lines == ['Kimchi stew ₩8,000', '비빔밥 ₩9,000']
+    assert error is not None and '번역 서비스 응답 없음' in error
+
+def test_total_remote_failure_raises(remote):
+    """번역 메모리 적중도 없이 원격 번역이 실패하면 예외를 그대로 전달"""
+    remote.fail = True
+    with pytest.raises(RuntimeError):
+        translator.translate_lines(['비빔밥 9,000원'])